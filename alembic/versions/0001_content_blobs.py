@@ -0,0 +1,107 @@
+"""Move material text into shared content blobs
+
+Revision ID: 0001_content_blobs
+Revises:
+Create Date: 2026-10-17 05:00:00
+
+"""
+from datetime import datetime
+from hashlib import sha256
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_content_blobs'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+blobs = sa.table(
+    "content_blobs",
+    sa.column("hash", sa.String),
+    sa.column("text", sa.Text),
+    sa.column("ref_count", sa.Integer),
+    sa.column("char_count", sa.Integer),
+    sa.column("token_estimate", sa.Integer),
+    sa.column("created_at", sa.DateTime),
+)
+
+
+def _columns(table: str) -> set:
+    return {column["name"] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade() -> None:
+    # The app's create_all on startup may already have built content_blobs,
+    # in its latest shape: text lives in sections from 0002 on
+    inspector = sa.inspect(op.get_bind())
+    if "content_blobs" not in inspector.get_table_names():
+        op.create_table(
+            "content_blobs",
+            sa.Column("hash", sa.String(64), primary_key=True),
+            sa.Column("text", sa.Text(), nullable=False),
+            sa.Column("ref_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("created_at", sa.DateTime()),
+        )
+    blob_columns = _columns("content_blobs")
+
+    columns = _columns("materials")
+    with op.batch_alter_table("materials") as batch:
+        if "blob_hash" not in columns:
+            batch.add_column(sa.Column("blob_hash", sa.String(64), nullable=True))
+            batch.create_index("ix_materials_blob_hash", ["blob_hash"])
+            batch.create_foreign_key("fk_materials_blob_hash", "content_blobs", ["blob_hash"], ["hash"])
+        if "source_hash" not in columns:
+            batch.add_column(sa.Column("source_hash", sa.String(64), nullable=True))
+            batch.create_index("ix_materials_source_hash", ["source_hash"])
+
+    if "content" not in columns:
+        return
+    if "text" not in blob_columns:
+        # Hold the text where 0002 expects it; it moves it into sections
+        with op.batch_alter_table("content_blobs") as batch:
+            batch.add_column(sa.Column("text", sa.Text(), nullable=True))
+
+    bind = op.get_bind()
+    counts = {}
+    texts = {}
+    for material_id, content in bind.execute(sa.text("SELECT id, content FROM materials")):
+        if content is None:
+            continue
+        digest = sha256(content.encode()).hexdigest()
+        texts[digest] = content
+        counts[digest] = counts.get(digest, 0) + 1
+        bind.execute(
+            sa.text("UPDATE materials SET blob_hash = :hash WHERE id = :id"),
+            {"hash": digest, "id": material_id}
+        )
+    # Counts filled in by 0002, but NOT NULL in a create_all table
+    filler = {name: 0 for name in ("char_count", "token_estimate") if name in blob_columns}
+    if texts:
+        op.bulk_insert(blobs, [
+            {"hash": digest, "text": text, "ref_count": counts[digest], "created_at": datetime.utcnow(), **filler}
+            for digest, text in texts.items()
+        ])
+
+    with op.batch_alter_table("materials") as batch:
+        batch.drop_column("content")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("materials") as batch:
+        batch.add_column(sa.Column("content", sa.Text(), nullable=True))
+
+    op.execute(
+        "UPDATE materials SET content = "
+        "(SELECT text FROM content_blobs WHERE content_blobs.hash = materials.blob_hash)"
+    )
+
+    with op.batch_alter_table("materials") as batch:
+        batch.drop_index("ix_materials_source_hash")
+        batch.drop_index("ix_materials_blob_hash")
+        batch.drop_column("source_hash")
+        batch.drop_column("blob_hash")
+    op.drop_table("content_blobs")
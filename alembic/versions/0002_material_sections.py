@@ -0,0 +1,131 @@
+"""Store material text as sections
+
+Revision ID: 0002_material_sections
+Revises: 0001_content_blobs
+Create Date: 2026-10-17 07:00:00
+
+"""
+from datetime import datetime
+from typing import List, Sequence, Tuple, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_material_sections'
+down_revision = '0001_content_blobs'
+branch_labels = None
+depends_on = None
+
+sections = sa.table(
+    "material_sections",
+    sa.column("blob_hash", sa.String),
+    sa.column("index", sa.Integer),
+    sa.column("start", sa.Integer),
+    sa.column("end", sa.Integer),
+    sa.column("text", sa.Text),
+    sa.column("token_estimate", sa.Integer),
+    sa.column("created_at", sa.DateTime),
+)
+
+# The app's section size and helpers as of this revision, copied so later
+# changes to them don't change what this migration does
+SECTION_CHARS = 4000
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4
+
+
+def section_bounds(text: str, max_chars: int) -> List[Tuple[int, int]]:
+    bounds, start = [], 0
+    while len(text) - start > max_chars:
+        limit = start + max_chars
+        cut = limit
+        for separator in ("\n\n", "\n", " "):
+            found = text.rfind(separator, start + max_chars // 2, limit)
+            if found != -1:
+                cut = found + len(separator)
+                break
+        bounds.append((start, cut))
+        start = cut
+    if start < len(text):
+        bounds.append((start, len(text)))
+    return bounds
+
+
+def upgrade() -> None:
+    # Tables created by the app's create_all on startup may already match
+    inspector = sa.inspect(op.get_bind())
+    if "material_sections" not in inspector.get_table_names():
+        op.create_table(
+            "material_sections",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("blob_hash", sa.String(64), sa.ForeignKey("content_blobs.hash"), nullable=False),
+            sa.Column("index", sa.Integer(), nullable=False),
+            sa.Column("start", sa.Integer(), nullable=False),
+            sa.Column("end", sa.Integer(), nullable=False),
+            sa.Column("text", sa.Text(), nullable=False),
+            sa.Column("token_estimate", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime()),
+            sa.UniqueConstraint("blob_hash", "index"),
+        )
+        op.create_index("ix_material_sections_id", "material_sections", ["id"])
+        op.create_index("ix_material_sections_blob_hash", "material_sections", ["blob_hash"])
+
+    columns = {column["name"] for column in inspector.get_columns("content_blobs")}
+    with op.batch_alter_table("content_blobs") as batch:
+        if "char_count" not in columns:
+            batch.add_column(sa.Column("char_count", sa.Integer(), nullable=False, server_default="0"))
+        if "token_estimate" not in columns:
+            batch.add_column(sa.Column("token_estimate", sa.Integer(), nullable=False, server_default="0"))
+
+    if "text" not in columns:
+        return
+
+    bind = op.get_bind()
+    for digest, text in bind.execute(sa.text("SELECT hash, text FROM content_blobs")).fetchall():
+        bounds = section_bounds(text, SECTION_CHARS)
+        if bounds:
+            op.bulk_insert(sections, [
+                {
+                    "blob_hash": digest,
+                    "index": index,
+                    "start": start,
+                    "end": end,
+                    "text": text[start:end],
+                    "token_estimate": estimate_tokens(text[start:end]),
+                    "created_at": datetime.utcnow(),
+                }
+                for index, (start, end) in enumerate(bounds)
+            ])
+        bind.execute(
+            sa.text("UPDATE content_blobs SET char_count = :chars, token_estimate = :tokens WHERE hash = :hash"),
+            {"chars": len(text), "tokens": estimate_tokens(text), "hash": digest}
+        )
+
+    with op.batch_alter_table("content_blobs") as batch:
+        batch.drop_column("text")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("content_blobs") as batch:
+        batch.add_column(sa.Column("text", sa.Text(), nullable=False, server_default=""))
+
+    bind = op.get_bind()
+    texts = {}
+    for digest, text in bind.execute(sa.text(
+        'SELECT blob_hash, text FROM material_sections ORDER BY blob_hash, "index"'
+    )):
+        texts.setdefault(digest, []).append(text)
+    for digest, parts in texts.items():
+        bind.execute(
+            sa.text("UPDATE content_blobs SET text = :text WHERE hash = :hash"),
+            {"text": "".join(parts), "hash": digest}
+        )
+
+    with op.batch_alter_table("content_blobs") as batch:
+        batch.drop_column("token_estimate")
+        batch.drop_column("char_count")
+    op.drop_table("material_sections")
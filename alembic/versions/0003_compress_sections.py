@@ -0,0 +1,82 @@
+"""Compress material section text
+
+Revision ID: 0003_compress_sections
+Revises: 0002_material_sections
+Create Date: 2026-10-17 08:00:00
+
+"""
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_compress_sections'
+down_revision = '0002_material_sections'
+branch_labels = None
+depends_on = None
+
+BATCH = 500
+
+# The stored format of app.db.types as of this revision, copied so later
+# changes to it don't change what this migration does: a one-byte header,
+# then the text raw or compressed. Sections are compressed with zlib, which
+# needs no extra package; reading also accepts zstd written by the app.
+RAW = b"\x00"
+ZLIB = b"\x01"
+ZSTD = b"\x02"
+MIN_BYTES = 256
+
+
+def compress_text(text: str) -> bytes:
+    data = text.encode()
+    if len(data) < MIN_BYTES:
+        return RAW + data
+    packed = ZLIB + zlib.compress(data, 6)
+    return packed if len(packed) <= len(data) else RAW + data
+
+
+def decompress_text(value: bytes) -> str:
+    tag, data = value[:1], value[1:]
+    if tag == RAW:
+        return data.decode()
+    if tag == ZLIB:
+        return zlib.decompress(data).decode()
+    if tag == ZSTD:
+        import zstandard
+        return zstandard.decompress(data).decode()
+    raise ValueError(f"Unknown compressed text header {tag!r}")
+
+
+def _rewrite(convert) -> None:
+    """Pass every section's text through `convert`, a batch of rows at a time."""
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.text("SELECT id, text FROM material_sections WHERE id > :id ORDER BY id LIMIT :limit"),
+            {"id": last_id, "limit": BATCH}
+        ).fetchall()
+        if not rows:
+            return
+        converted = [(section_id, convert(text)) for section_id, text in rows]
+        updates = [{"id": section_id, "text": text} for section_id, text in converted if text is not None]
+        if updates:
+            bind.execute(sa.text("UPDATE material_sections SET text = :text WHERE id = :id"), updates)
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    # Compress before changing the type: SQLite keeps BLOB values as they are
+    # when the table is rebuilt, but would cast leftover text to raw bytes
+    _rewrite(lambda text: compress_text(text) if isinstance(text, str) else None)
+    with op.batch_alter_table("material_sections") as batch:
+        batch.alter_column("text", type_=sa.LargeBinary(), existing_nullable=False)
+
+
+def downgrade() -> None:
+    _rewrite(lambda value: decompress_text(bytes(value)) if isinstance(value, bytes) else None)
+    with op.batch_alter_table("material_sections") as batch:
+        batch.alter_column("text", type_=sa.Text(), existing_nullable=False)
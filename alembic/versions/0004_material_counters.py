@@ -0,0 +1,41 @@
+"""Add flashcard and question counters to materials
+
+Revision ID: 0004_material_counters
+Revises: 0003_compress_sections
+Create Date: 2026-10-17 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_material_counters'
+down_revision = '0003_compress_sections'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Tables created by the app's create_all on startup may already match
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("materials")}
+    with op.batch_alter_table("materials") as batch:
+        if "num_flashcards" not in columns:
+            batch.add_column(sa.Column("num_flashcards", sa.Integer(), nullable=False, server_default="0"))
+        if "num_questions" not in columns:
+            batch.add_column(sa.Column("num_questions", sa.Integer(), nullable=False, server_default="0"))
+
+    # Backfill from the rows; also corrects counters left stale by an older app version
+    op.execute(
+        "UPDATE materials SET "
+        "num_flashcards = (SELECT count(*) FROM flashcards WHERE flashcards.material_id = materials.id), "
+        "num_questions = (SELECT count(*) FROM questions WHERE questions.material_id = materials.id)"
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("materials") as batch:
+        batch.drop_column("num_questions")
+        batch.drop_column("num_flashcards")
@@ -0,0 +1,48 @@
+"""Index items and progress by material and user
+
+Revision ID: 0005_access_indexes
+Revises: 0004_material_counters
+Create Date: 2026-10-17 11:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_access_indexes'
+down_revision = '0004_material_counters'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ("ix_flashcards_material_id_user_id", "flashcards", ["material_id", "user_id"], False),
+    ("ix_questions_material_id_user_id", "questions", ["material_id", "user_id"], False),
+    ("ix_materials_owner_id_created_at", "materials", ["owner_id", "created_at"], False),
+    ("uq_progress_user_id_material_id", "progress", ["user_id", "material_id"], True),
+    ("ix_progress_material_id_user_id", "progress", ["material_id", "user_id"], False),
+)
+
+
+def upgrade() -> None:
+    # Duplicate progress rows from racing get-or-creates would block the
+    # unique index; keep the most recently reviewed one of each pair
+    op.execute(
+        "DELETE FROM progress WHERE id NOT IN ("
+        "SELECT id FROM (SELECT id, ROW_NUMBER() OVER ("
+        "PARTITION BY user_id, material_id ORDER BY last_reviewed DESC, id DESC"
+        ") AS position FROM progress) WHERE position = 1)"
+    )
+
+    # Tables created by the app's create_all on startup may already match
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns, unique in INDEXES:
+        if name not in {index["name"] for index in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns, unique=unique)
+
+
+def downgrade() -> None:
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,32 @@
+"""Add created_at to material sections created without it
+
+Revision ID: 0006_section_created_at
+Revises: 0005_access_indexes
+Create Date: 2026-10-17 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_section_created_at'
+down_revision = '0005_access_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 0002 always created the column; tables made by the app's create_all
+    # before the model declared it lack it
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("material_sections")}
+    if "created_at" not in columns:
+        with op.batch_alter_table("material_sections") as batch:
+            batch.add_column(sa.Column("created_at", sa.DateTime()))
+
+
+def downgrade() -> None:
+    # 0002 created the column, so it stays
+    pass
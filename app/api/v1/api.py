@@ -1,7 +1,9 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, materials, progress
+from app.api.v1.endpoints import admin, auth, jobs, materials, progress
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 api_router.include_router(materials.router, prefix="/materials", tags=["materials"])
-api_router.include_router(progress.router, prefix="/progress", tags=["progress"]) 
\ No newline at end of file
+api_router.include_router(progress.router, prefix="/progress", tags=["progress"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
\ No newline at end of file
@@ -0,0 +1,120 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.dependencies import get_current_admin_user, get_async_db
+from app.models.token_usage import TokenUsage
+from app.models.user import User
+from app.schemas.usage import UsageSummary, UserUsage
+from app.services.generation_cache import GenerationCache
+from app.services.resilience import get_llm_resilience
+from app.services.usage import TokenQuota
+
+router = APIRouter()
+generation_cache = GenerationCache()
+token_quota = TokenQuota()
+
+@router.get(
+    "/generation-cache/stats",
+    response_model=Dict[str, int],
+    responses={403: {"description": "Not enough privileges"}}
+)
+async def get_generation_cache_stats(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Hit and miss counters of the shared generation cache
+    """
+    return await generation_cache.stats()
+
+@router.get(
+    "/llm/resilience",
+    response_model=Dict[str, Any],
+    responses={403: {"description": "Not enough privileges"}}
+)
+async def get_llm_resilience_metrics(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Circuit breaker state and retry/hedging counters of this process's LLM client
+    """
+    return get_llm_resilience().metrics()
+
+def _usage_columns():
+    return (
+        func.coalesce(func.sum(TokenUsage.prompt_tokens), 0).label("prompt_tokens"),
+        func.coalesce(func.sum(TokenUsage.completion_tokens), 0).label("completion_tokens"),
+        func.count(TokenUsage.id).label("generations"),
+        func.coalesce(func.sum(TokenUsage.llm_calls), 0).label("llm_calls"),
+    )
+
+def _summary(row, user_id: int, material_id: Optional[int] = None) -> UsageSummary:
+    return UsageSummary(
+        user_id=user_id,
+        material_id=material_id,
+        prompt_tokens=row.prompt_tokens,
+        completion_tokens=row.completion_tokens,
+        total_tokens=row.prompt_tokens + row.completion_tokens,
+        generations=row.generations,
+        llm_calls=row.llm_calls
+    )
+
+@router.get(
+    "/usage",
+    response_model=List[UsageSummary],
+    responses={403: {"description": "Not enough privileges"}}
+)
+async def get_token_usage(
+    since: Optional[datetime] = Query(None, description="Only count usage after this time"),
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    LLM token usage per user, heaviest users first
+
+    - **since**: Only count generations after this time
+    - **limit**: Maximum number of users returned
+    """
+    stmt = select(TokenUsage.user_id, *_usage_columns()).group_by(TokenUsage.user_id)
+    if since is not None:
+        stmt = stmt.where(TokenUsage.created_at >= since)
+    total = func.sum(TokenUsage.prompt_tokens + TokenUsage.completion_tokens)
+    stmt = stmt.order_by(total.desc()).limit(limit)
+    result = await db.execute(stmt)
+    return [_summary(row, row.user_id) for row in result.all()]
+
+@router.get(
+    "/usage/{user_id}",
+    response_model=UserUsage,
+    responses={403: {"description": "Not enough privileges"}}
+)
+async def get_user_token_usage(
+    user_id: int,
+    since: Optional[datetime] = Query(None, description="Only count usage after this time"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    A user's LLM token usage per material and what is left in their quota
+
+    - **since**: Only count generations after this time
+    """
+    filters = [TokenUsage.user_id == user_id]
+    if since is not None:
+        filters.append(TokenUsage.created_at >= since)
+
+    total = (await db.execute(select(*_usage_columns()).where(*filters))).one()
+    per_material = await db.execute(
+        select(TokenUsage.material_id, *_usage_columns())
+        .where(*filters)
+        .group_by(TokenUsage.material_id)
+        .order_by(TokenUsage.material_id)
+    )
+    return UserUsage(
+        user_id=user_id,
+        quota_remaining=await token_quota.remaining(user_id),
+        total=_summary(total, user_id),
+        materials=[_summary(row, user_id, row.material_id) for row in per_material.all()]
+    )
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, HTTPException
+from app.core.dependencies import get_current_active_user
+from app.models.user import User
+from app.schemas.job import Job
+from app.services.jobs import JobQueue
+
+router = APIRouter()
+job_queue = JobQueue()
+
+@router.get(
+    "/{job_id}",
+    response_model=Job,
+    responses={404: {"description": "Job not found"}}
+)
+async def get_job(
+    job_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get the state of a background generation job
+
+    - **job_id**: ID returned when the job was queued
+    """
+    job = await job_queue.get(job_id)
+    if not job or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -1,35 +1,90 @@
-from typing import List, Optional, Dict
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, status, Query
-from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import json
+from typing import Any, AsyncIterator, List, Optional, Dict, Union
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, status, Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy import select, func
-from app.core.dependencies import get_current_active_user, get_async_db
+from sqlalchemy.exc import SQLAlchemyError
+from app.core.config import settings
+from app.core.dependencies import get_current_active_user, get_async_db, get_session_factory
 from app.models.user import User
 from app.models.material import Material
 from app.models.question import Question
 from app.models.flashcard import Flashcard
-from app.schemas.material import MaterialCreate, MaterialResponse, MaterialStats, MaterialListItem, MaterialList
-from app.schemas.ai_content import Flashcard as FlashcardSchema
+from app.schemas.material import (
+    MaterialCreate, MaterialResponse, MaterialStats, MaterialListItem, MaterialList, MaterialSummary,
+    MaterialUploadResponse, PreprocessingStats,
+    YouTubeImportRequest, YouTubeImportResult, YouTubeImportSummary, YouTubeImportVideo
+)
+from app.schemas.ai_content import Flashcard as FlashcardSchema, StudySet
+from app.schemas.job import Job
 from app.schemas.answers import (
     QuestionResponse, MaterialQuestionsResponse,
     FlashcardsResponse, FlashcardDB,
     EvaluationResponse, QuestionAnswerSubmission, QuestionResult
 )
-from app.services.material_parser import MaterialParser
 from app.services.ai_generator import AIGenerator
+from app.services.content_store import ContentStore
+from app.services.generation import GenerationService
+from app.services.jobs import PRIORITY_BACKGROUND, JobQueue
 from app.services.pdf_service import PDFService
 from app.services.youtube_service import YouTubeService
 from random import sample
 from app.services.question_session import QuestionSessionService
+from app.services.text_preprocessor import TextPreprocessor
 
 router = APIRouter()
 ai_generator = AIGenerator()
+generation_service = GenerationService(ai_generator)
+job_queue = JobQueue()
 pdf_service = PDFService()
+content_store = ContentStore()
 youtube_service = YouTubeService()
 question_session_service = QuestionSessionService()
+text_preprocessor = TextPreprocessor()
+
+async def _schedule_pregeneration(material: Material, pregenerate: Optional[bool]) -> None:
+    """Queue low-priority generation jobs so the generate endpoints find rows ready."""
+    if pregenerate is None:
+        pregenerate = settings.PREGENERATE_ON_UPLOAD
+    if not pregenerate:
+        return
+
+    try:
+        await job_queue.enqueue(
+            "flashcards",
+            material.id,
+            material.owner_id,
+            priority=PRIORITY_BACKGROUND,
+            params={"num_cards": 20}
+        )
+        await job_queue.enqueue(
+            "questions",
+            material.id,
+            material.owner_id,
+            priority=PRIORITY_BACKGROUND,
+            params={"num_questions": 20}
+        )
+    except RedisError:
+        # Pre-generation is an optimisation; the upload itself succeeded
+        pass
+
+def _upload_response(
+    material: Material,
+    preprocessing: Optional[PreprocessingStats],
+    deduplicated: bool = False
+) -> MaterialUploadResponse:
+    response = MaterialUploadResponse.model_validate(material)
+    response.preprocessing = preprocessing
+    response.deduplicated = deduplicated
+    return response
 
 @router.post(
     "/upload/pdf",
-    response_model=MaterialResponse,
+    response_model=MaterialUploadResponse,
     status_code=status.HTTP_201_CREATED,
     responses={
         400: {
@@ -39,20 +94,30 @@ question_session_service = QuestionSessionService()
                     "example": {"detail": "Error processing PDF: Invalid file format"}
                 }
             }
-        }
+        },
+        413: {"description": "File larger than MAX_UPLOAD_BYTES"}
     }
 )
 async def upload_pdf(
     file: UploadFile = File(...),
     title: str = Form(...),
+    pregenerate: Optional[bool] = Form(None),
     db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user),
 ):
     """
     Upload PDF learning material
+
+    Running headers, footers and page numbers are stripped from the text
+    before it is stored; `preprocessing` reports how much it shrank. A file
+    identical to one uploaded before isn't parsed again: its stored text is
+    reused and `deduplicated` is true. Generated items are shared as well
+    through the generation cache.
     
-    - **file**: PDF file (must be a valid PDF)
+    - **file**: PDF file (must be a valid PDF, at most MAX_UPLOAD_BYTES)
     - **title**: Title of the material
+    - **pregenerate**: Generate flashcards and questions in the background
+      right away (defaults to the server's PREGENERATE_ON_UPLOAD setting)
     
     Example curl command:
     ```bash
@@ -69,22 +134,36 @@ async def upload_pdf(
         )
     
     try:
-        content = await pdf_service.extract_text(file)
+        source_hash = await pdf_service.hash_upload(file)
+        blob = await content_store.find_by_source(db, source_hash)
+        preprocessing = None
+        if blob is None:
+            pages = await pdf_service.extract_pages(file)
+            if settings.TEXT_PREPROCESSING_ENABLED:
+                content, preprocessing = text_preprocessor.process_pages(pages)
+            else:
+                content = "\n".join(pages).strip()
         
         # Create the model instance directly
         material = Material(
             title=title,
-            content=content,
+            source_hash=source_hash,
             source_type="pdf",
             source_url=None,
             owner_id=current_user.id
         )
+        if blob is not None:
+            material.blob = blob
+        else:
+            material.content = content
         
         db.add(material)
         await db.commit()
         await db.refresh(material)
-        
-        return material
+        await content_store.load_content(db, material)
+
+        await _schedule_pregeneration(material, pregenerate)
+        return _upload_response(material, preprocessing, deduplicated=blob is not None)
         
     except ValueError as e:
         raise HTTPException(
@@ -94,7 +173,7 @@ async def upload_pdf(
 
 @router.post(
     "/upload/youtube",
-    response_model=MaterialResponse,
+    response_model=MaterialUploadResponse,
     responses={
         400: {
             "description": "Bad Request",
@@ -109,14 +188,20 @@ async def upload_pdf(
 async def upload_youtube(
     youtube_url: str = Form(...),
     title: str = Form(...),
+    pregenerate: Optional[bool] = Form(None),
     db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user),
 ):
     """
     Upload YouTube video transcript
+
+    Filler words and caption notes are stripped from the transcript before
+    it is stored; `preprocessing` reports how much it shrank.
     
     - **youtube_url**: Valid YouTube video URL (e.g., https://www.youtube.com/watch?v=dQw4w9WgXcQ)
     - **title**: Title of the material
+    - **pregenerate**: Generate flashcards and questions in the background
+      right away (defaults to the server's PREGENERATE_ON_UPLOAD setting)
     
     Example curl command:
     ```bash
@@ -128,6 +213,9 @@ async def upload_youtube(
     """
     try:
         content = await youtube_service.get_transcript(youtube_url)
+        preprocessing = None
+        if settings.TEXT_PREPROCESSING_ENABLED:
+            content, preprocessing = text_preprocessor.process_transcript(content)
         
         material_create = MaterialCreate(
             title=title,
@@ -144,8 +232,10 @@ async def upload_youtube(
         db.add(material)
         await db.commit()
         await db.refresh(material)
-        
-        return material
+        await content_store.load_content(db, material)
+
+        await _schedule_pregeneration(material, pregenerate)
+        return _upload_response(material, preprocessing)
         
     except ValueError as e:
         raise HTTPException(
@@ -153,60 +243,261 @@ async def upload_youtube(
             detail=str(e)
         )
 
+def _ndjson(item: BaseModel) -> str:
+    return item.model_dump_json() + "\n"
+
+async def _import_videos(
+    videos: List[YouTubeImportVideo],
+    owner_id: int,
+    pregenerate: Optional[bool],
+    session_factory: async_sessionmaker
+) -> AsyncIterator[str]:
+    limit = asyncio.Semaphore(settings.YOUTUBE_IMPORT_CONCURRENCY)
+
+    async def fetch(index: int, video: YouTubeImportVideo):
+        try:
+            async with limit:
+                content = await youtube_service.get_transcript(video.url)
+            preprocessing = None
+            if settings.TEXT_PREPROCESSING_ENABLED:
+                content, preprocessing = text_preprocessor.process_transcript(content)
+        except ValueError as e:
+            return index, None, None, str(e)
+        except Exception:
+            # One video's failure must not end the stream for the others
+            return index, None, None, "Could not fetch the transcript"
+        return index, content, preprocessing, None
+
+    def new_material(index: int) -> Material:
+        content, _ = fetched[index]
+        return Material(
+            title=videos[index].title,
+            content=content,
+            source_type="youtube",
+            source_url=videos[index].url,
+            owner_id=owner_id
+        )
+
+    tasks = [asyncio.create_task(fetch(index, video)) for index, video in enumerate(videos)]
+    fetched = {}
+    failed = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            index, content, preprocessing, error = await next_done
+            result = YouTubeImportResult(index=index, url=videos[index].url, title=videos[index].title, status="fetched")
+            if error is not None:
+                result.status, result.error = "failed", error
+                failed += 1
+            else:
+                result.preprocessing = preprocessing
+                fetched[index] = (content, result)
+            yield _ndjson(result)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    # One transaction for the whole import, once every fetch has finished;
+    # if it fails, each video is stored on its own so the rest still are.
+    # The flush listeners raise ValueError for content they can't store.
+    stored = {}
+    if fetched:
+        async with session_factory() as db:
+            materials = {index: new_material(index) for index in sorted(fetched)}
+            db.add_all(materials.values())
+            try:
+                await db.commit()
+                stored = materials
+            except (SQLAlchemyError, ValueError):
+                await db.rollback()
+                for index in sorted(fetched):
+                    material = new_material(index)
+                    db.add(material)
+                    try:
+                        await db.commit()
+                    except (SQLAlchemyError, ValueError):
+                        await db.rollback()
+                        _, result = fetched[index]
+                        result.status, result.error = "failed", "Could not store the imported material"
+                        failed += 1
+                        yield _ndjson(result)
+                    else:
+                        # Keep it as committed when a later video rolls back
+                        db.expunge(material)
+                        stored[index] = material
+
+    for index, material in sorted(stored.items()):
+        _, result = fetched[index]
+        result.status, result.material_id = "imported", material.id
+        await _schedule_pregeneration(material, pregenerate)
+        yield _ndjson(result)
+    yield _ndjson(YouTubeImportSummary(imported=len(stored), failed=failed))
+
+@router.post(
+    "/upload/youtube/batch",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"application/x-ndjson": {}}, "description": "Newline-delimited JSON results"},
+        400: {"description": "No videos, or more than YOUTUBE_IMPORT_MAX_VIDEOS"}
+    }
+)
+async def import_youtube_videos(
+    request: YouTubeImportRequest,
+    session_factory: async_sessionmaker = Depends(get_session_factory),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Import many YouTube videos at once, e.g. a whole lecture series
+
+    Transcripts are fetched concurrently (YOUTUBE_IMPORT_CONCURRENCY at a
+    time) and all materials are stored in a single transaction once every
+    fetch has finished (or one by one, should that transaction fail).
+    Results stream back as newline-delimited JSON: a `fetched` or `failed`
+    line per video as its fetch completes, a `failed` line for each video
+    that couldn't be stored, then an `imported` line with the
+    `material_id` for each stored video, and finally a summary with the
+    `imported` and `failed` counts.
+
+    - **urls**: YouTube video URLs
+    - **videos**: Playlist manifest, a list of `{"url", "title"}` objects
+    - **playlist**: Name of the series; untitled videos become "<playlist> #<n>"
+    - **pregenerate**: Generate flashcards and questions in the background
+
+    Example curl command:
+    ```bash
+    curl -N -X POST "http://localhost:8000/api/v1/materials/upload/youtube/batch" \
+      -H "Authorization: Bearer your_token" \
+      -H "Content-Type: application/json" \
+      -d '{"playlist": "Biology 101", "urls": ["https://www.youtube.com/watch?v=dQw4w9WgXcQ"]}'
+    ```
+    """
+    videos = [YouTubeImportVideo(url=url) for url in request.urls] + list(request.videos)
+    if not videos:
+        raise HTTPException(status_code=400, detail="No videos to import")
+    if len(videos) > settings.YOUTUBE_IMPORT_MAX_VIDEOS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.YOUTUBE_IMPORT_MAX_VIDEOS} videos can be imported at once"
+        )
+    for number, video in enumerate(videos, start=1):
+        if not video.title:
+            video.title = f"{request.playlist} #{number}" if request.playlist else f"YouTube video {number}"
+
+    return StreamingResponse(
+        _import_videos(videos, current_user.id, request.pregenerate, session_factory),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post(
     "/{material_id}/generate-flashcards",
-    response_model=List[FlashcardSchema]
+    response_model=Union[List[FlashcardSchema], Job],
+    responses={202: {"model": Job, "description": "Generation job queued"}}
 )
 async def generate_flashcards(
     material_id: int,
+    response: Response,
+    num_cards: int = Query(default=20, ge=1, le=100, description="Total number of flashcards wanted"),
+    additional: int = Query(default=0, ge=0, le=50, description="Generate this many more than already exist"),
+    background: bool = Query(default=False, description="Queue a generation job instead of waiting"),
     db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Generate or retrieve flashcards for a material"""
+    """
+    Generate or retrieve flashcards for a material
+
+    Existing flashcards are kept; only the ones missing are generated.
+
+    - **num_cards**: Total number of flashcards wanted
+    - **additional**: Generate this many more than already exist
+      (takes precedence over num_cards)
+    - **background**: Return a job immediately and generate in a worker;
+      poll `GET /jobs/{job_id}` for its state
+    """
     # Check material exists and belongs to user
     material = await db.get(Material, material_id)
     if not material or material.owner_id != current_user.id:
         raise HTTPException(status_code=404, detail="Material not found")
 
-    # Check if flashcards already exist
-    stmt = select(Flashcard).where(
-        Flashcard.material_id == material_id,
-        Flashcard.user_id == current_user.id
+    if background:
+        response.status_code = status.HTTP_202_ACCEPTED
+        # Queued as a total, so a retried or reclaimed job adds nothing twice
+        return await job_queue.enqueue(
+            "flashcards",
+            material_id,
+            current_user.id,
+            params={"num_cards": material.num_flashcards + additional if additional else num_cards}
+        )
+
+    return await generation_service.get_or_generate_flashcards(
+        db,
+        material,
+        current_user.id,
+        num_cards=num_cards,
+        additional=additional
     )
-    result = await db.execute(stmt)
-    existing_flashcards = result.scalars().all()
-
-    if existing_flashcards:
-        return [
-            FlashcardSchema(
-                id=card.id,
-                front=card.front,
-                back=card.back
-            ) for card in existing_flashcards
-        ]
-
-    # Create AI generator instance
-    ai_generator = AIGenerator()
-    
-    # Generate new flashcards
-    flashcards = await ai_generator.generate_flashcards(
-        material.content,
-        num_cards=20
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _sse_response(items: AsyncIterator[BaseModel], event: str) -> StreamingResponse:
+    async def events():
+        count = 0
+        try:
+            async for item in items:
+                count += 1
+                yield _sse(event, item.model_dump())
+        except Exception as e:
+            yield _sse("error", {"detail": str(e)})
+            return
+        yield _sse("done", {"count": count})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
-    # Save to database
-    for card in flashcards:
-        db_flashcard = Flashcard(
-            id=card.id,
-            front=card.front,
-            back=card.back,
-            material_id=material_id,
-            user_id=current_user.id
-        )
-        db.add(db_flashcard)
-    
-    await db.commit()
-    return flashcards
+async def _stream_with_session(
+    stream_items,
+    session_factory: async_sessionmaker,
+    material_id: int,
+    user_id: int,
+    count: int
+):
+    # The request-scoped session may be closed before the body is sent, so
+    # the stream loads the material and stores its rows through a session
+    # of its own; instances of the request's session can't be used in it
+    async with session_factory() as db:
+        material = await db.get(Material, material_id)
+        async for item in stream_items(db, material, user_id, count):
+            yield item
+
+@router.post(
+    "/{material_id}/generate-flashcards/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}, "description": "Server-sent events"}}
+)
+async def stream_flashcards(
+    material_id: int,
+    num_cards: int = Query(default=20, ge=1, le=100, description="Total number of flashcards wanted"),
+    db: AsyncSession = Depends(get_async_db),
+    session_factory: async_sessionmaker = Depends(get_session_factory),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Generate or retrieve flashcards as server-sent events
+
+    Emits a `flashcard` event for each card as soon as it is parsed from
+    the model's output, then a `done` event with the total count.
+    """
+    material = await db.get(Material, material_id)
+    if not material or material.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Material not found")
+
+    return _sse_response(
+        _stream_with_session(generation_service.stream_flashcards, session_factory, material.id, current_user.id, num_cards),
+        "flashcard"
+    )
 
 @router.get(
     "/{material_id}/flashcards",
@@ -266,51 +557,103 @@ async def get_flashcards(
         total_returned=len(flashcard_list)
     )
 
-@router.post("/{material_id}/generate-questions")
+@router.post(
+    "/{material_id}/generate-questions",
+    responses={202: {"model": Job, "description": "Generation job queued"}}
+)
 async def generate_questions(
     material_id: int,
+    response: Response,
+    num_questions: int = Query(default=20, ge=1, le=100, description="Total number of questions wanted"),
+    additional: int = Query(default=0, ge=0, le=50, description="Generate this many more than already exist"),
+    background: bool = Query(default=False, description="Queue a generation job instead of waiting"),
     db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Generate exactly 20 questions for a material"""
+    """
+    Generate or retrieve questions for a material
+
+    Existing questions are kept; only the ones missing are generated, so
+    going from 20 to 50 questions pays for 30 new ones.
+
+    - **num_questions**: Total number of questions wanted
+    - **additional**: Generate this many more than already exist
+      (takes precedence over num_questions)
+    - **background**: Return a job immediately and generate in a worker;
+      poll `GET /jobs/{job_id}` for its state
+    """
     # Check material exists and belongs to user
     material = await db.get(Material, material_id)
     if not material or material.owner_id != current_user.id:
         raise HTTPException(status_code=404, detail="Material not found")
 
-    # Check if questions already exist
-    stmt = select(Question).where(
-        Question.material_id == material_id,
-        Question.user_id == current_user.id
+    if background:
+        response.status_code = status.HTTP_202_ACCEPTED
+        return await job_queue.enqueue(
+            "questions",
+            material_id,
+            current_user.id,
+            params={"num_questions": material.num_questions + additional if additional else num_questions}
+        )
+
+    return await generation_service.get_or_generate_questions(
+        db,
+        material,
+        current_user.id,
+        num_questions=num_questions,
+        additional=additional
     )
-    result = await db.execute(stmt)
-    existing_questions = result.scalars().all()
 
-    if existing_questions:
-        return existing_questions
+@router.post(
+    "/{material_id}/generate-questions/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}, "description": "Server-sent events"}}
+)
+async def stream_questions(
+    material_id: int,
+    num_questions: int = Query(default=20, ge=1, le=100, description="Total number of questions wanted"),
+    db: AsyncSession = Depends(get_async_db),
+    session_factory: async_sessionmaker = Depends(get_session_factory),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Generate or retrieve questions as server-sent events
+
+    Emits a `question` event for each question as soon as it is parsed
+    from the model's output, then a `done` event with the total count.
+    """
+    material = await db.get(Material, material_id)
+    if not material or material.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Material not found")
 
-    # Generate exactly 20 questions
-    questions = await ai_generator.generate_questions(
-        material.content,
-        num_questions=20  # Fixed at 20
+    return _sse_response(
+        _stream_with_session(generation_service.stream_questions, session_factory, material.id, current_user.id, num_questions),
+        "question"
     )
 
-    # Save questions to database
-    for q in questions:
-        db_question = Question(
-            id=q.id,
-            question_text=q.question,
-            options=q.options,
-            answer=q.answer,
-            explanation=q.explanation,
-            category=q.category,
-            material_id=material_id,
-            user_id=current_user.id
-        )
-        db.add(db_question)
-    
-    await db.commit()
-    return questions
+@router.post("/{material_id}/generate-all", response_model=StudySet)
+async def generate_study_set(
+    material_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Generate or retrieve flashcards and questions for a material together
+
+    Both sets come from a single model call over the material, so its
+    content is sent once instead of twice, and are stored in one transaction.
+    """
+    material = await db.get(Material, material_id)
+    if not material or material.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Material not found")
+
+    return await generation_service.get_or_generate_study_set(
+        db,
+        material,
+        current_user.id,
+        num_cards=20,
+        num_questions=20
+    )
 
 @router.get(
     "/{material_id}/questions",
@@ -475,14 +818,17 @@ async def evaluate_questions(
 async def get_user_materials(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=1, le=100),
-    source_type: Optional[str] = Query(None, regex="^(pdf|youtube)$"),
-    sort_by: str = Query("created_at", regex="^(created_at)$"),
-    order: str = Query("desc", regex="^(asc|desc)$"),
+    source_type: Optional[str] = Query(None, pattern="^(pdf|youtube)$"),
+    sort_by: str = Query("created_at", pattern="^(created_at)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
     db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Get all materials for the current user with optional filtering and sorting.
+
+    Items carry the material's metadata and flashcard/question counts but
+    not its content; fetch the material itself for that.
     
     - **page**: Page number (default: 1)
     - **per_page**: Items per page (default: 20, max: 100)
@@ -490,60 +836,86 @@ async def get_user_materials(
     - **sort_by**: Sort field (currently only 'created_at')
     - **order**: Sort order ('asc' or 'desc')
     """
-    # Build query
-    query = select(Material).where(Material.owner_id == current_user.id)
-    
-    # Apply filters
+    filters = [Material.owner_id == current_user.id]
     if source_type:
-        query = query.where(Material.source_type == source_type)
-    
-    # Apply sorting
+        filters.append(Material.source_type == source_type)
+    # Ties broken by id in the same direction, so the owner/created_at index yields the order
     if order == "desc":
-        query = query.order_by(Material.created_at.desc())
+        sort = (Material.created_at.desc(), Material.id.desc())
     else:
-        query = query.order_by(Material.created_at.asc())
-    
-    # Get total count
-    count_query = select(func.count()).select_from(query.subquery())
-    total = await db.scalar(count_query)
-    
-    # Apply pagination
-    query = query.offset((page - 1) * per_page).limit(per_page)
-    
-    # Execute query
-    result = await db.execute(query)
-    materials = result.scalars().all()
-    
-    # Get stats for each material
-    material_list = []
-    for material in materials:
-        # Count flashcards and questions
-        flashcards_count = await db.scalar(
-            select(func.count()).select_from(Flashcard).where(
-                Flashcard.material_id == material.id,
-                Flashcard.user_id == current_user.id
-            )
-        )
-        questions_count = await db.scalar(
-            select(func.count()).select_from(Question).where(
-                Question.material_id == material.id,
-                Question.user_id == current_user.id
-            )
+        sort = (Material.created_at.asc(), Material.id.asc())
+
+    # Both statements are answered from the owner/created_at index: the
+    # total by counting its entries, the page by reading it in order
+    total = await db.scalar(select(func.count()).select_from(Material).where(*filters))
+    rows = (await db.execute(
+        select(
+            Material.id, Material.title, Material.source_type, Material.source_url,
+            Material.owner_id, Material.created_at,
+            Material.num_flashcards, Material.num_questions
         )
-        
-        material_list.append(
-            MaterialListItem(
-                **material.__dict__,
-                stats=MaterialStats(
-                    num_flashcards=flashcards_count,
-                    num_questions=questions_count
-                )
-            )
+        .where(*filters)
+        .order_by(*sort)
+        .offset((page - 1) * per_page)
+        .limit(per_page)
+    )).all()
+
+    material_list = [
+        MaterialListItem(
+            **MaterialSummary.model_validate(row).model_dump(),
+            stats=MaterialStats(num_flashcards=row.num_flashcards, num_questions=row.num_questions)
         )
+        for row in rows
+    ]
     
     return MaterialList(
         materials=material_list,
         total=total,
         page=page,
         per_page=per_page
-    ) 
\ No newline at end of file
+    ) 
+
+@router.get(
+    "/{material_id}",
+    response_model=MaterialResponse,
+    responses={404: {"description": "Material not found"}}
+)
+async def get_material(
+    material_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Get one material with its full content
+
+    - **material_id**: ID of the material
+    """
+    material = await db.get(Material, material_id)
+    if not material or material.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Material not found")
+    await content_store.load_content(db, material)
+    return MaterialResponse.model_validate(material)
+
+@router.delete(
+    "/{material_id}",
+    status_code=status.HTTP_204_NO_CONTENT
+)
+async def delete_material(
+    material_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Delete a material with its flashcards, questions and progress
+
+    The stored text is shared by identical uploads and is only removed
+    with the last material using it.
+
+    - **material_id**: ID of the material
+    """
+    material = await db.get(Material, material_id)
+    if not material or material.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Material not found")
+
+    await content_store.delete_material(db, material)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,72 @@
+"""
+Consistency check of the materials' flashcard and question counters.
+
+Compares `num_flashcards` / `num_questions` on every material with the
+rows actually stored and lists the materials that disagree. Exits with
+status 1 when any do; `--fix` resets them to the counted values.
+
+    python -m app.check_counters [--fix]
+"""
+import argparse
+import asyncio
+import sys
+from typing import List, NamedTuple
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import AsyncSessionLocal
+from app.models.flashcard import Flashcard
+from app.models.material import Material
+from app.models.question import Question
+
+class CounterDrift(NamedTuple):
+    material_id: int
+    num_flashcards: int
+    actual_flashcards: int
+    num_questions: int
+    actual_questions: int
+
+async def find_drift(db: AsyncSession) -> List[CounterDrift]:
+    """Materials whose counters differ from their rows."""
+    flashcards = (
+        select(func.count()).where(Flashcard.material_id == Material.id).scalar_subquery()
+    )
+    questions = (
+        select(func.count()).where(Question.material_id == Material.id).scalar_subquery()
+    )
+    rows = await db.execute(
+        select(Material.id, Material.num_flashcards, flashcards, Material.num_questions, questions)
+        .where((Material.num_flashcards != flashcards) | (Material.num_questions != questions))
+        .order_by(Material.id)
+    )
+    return [CounterDrift(*row) for row in rows]
+
+async def repair(db: AsyncSession, drift: List[CounterDrift]) -> None:
+    for entry in drift:
+        await db.execute(
+            update(Material)
+            .where(Material.id == entry.material_id)
+            .values(num_flashcards=entry.actual_flashcards, num_questions=entry.actual_questions)
+        )
+    await db.commit()
+
+async def main(fix: bool) -> int:
+    async with AsyncSessionLocal() as db:
+        drift = await find_drift(db)
+        for entry in drift:
+            print(
+                f"material {entry.material_id}: "
+                f"flashcards {entry.num_flashcards} (counted {entry.actual_flashcards}), "
+                f"questions {entry.num_questions} (counted {entry.actual_questions})"
+            )
+        if drift and fix:
+            await repair(db, drift)
+            print(f"Fixed {len(drift)} materials")
+            return 0
+    print("Counters are consistent" if not drift else f"{len(drift)} materials have stale counters")
+    return 1 if drift else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fix", action="store_true", help="reset stale counters to the counted rows")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.fix)))
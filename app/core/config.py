@@ -18,7 +18,86 @@ class Settings(BaseSettings):
     # External Services
     SENDGRID_API_KEY: Optional[str] = None
     STRIPE_API_KEY: Optional[str] = None
-    GEMINI_API_KEY: str
+    GEMINI_API_KEY: Optional[str] = None  # required by the gemini provider
+    GEMINI_BASE_URL: str = "https://generativelanguage.googleapis.com/v1beta/openai/"
+
+    # LLM client
+    LLM_PROVIDER: str = "gemini"  # "gemini", or "stub" for offline runs and load tests
+    LLM_MODEL: str = "gemini-1.5-flash"
+    LLM_STUB_LATENCY: float = 0.0  # seconds the stub provider takes per call
+    LLM_REQUEST_TIMEOUT: float = 60.0  # seconds allowed for a single generation call
+    LLM_CONNECT_TIMEOUT: float = 10.0
+    LLM_MAX_CONNECTIONS: int = 20  # size of the shared HTTP connection pool
+    LLM_MAX_CONCURRENCY: int = 8  # generation calls allowed in flight per process
+
+    # LLM resilience (retries, hedging, circuit breaker)
+    LLM_RETRY_ATTEMPTS: int = 3  # attempts per call on 429/5xx/timeouts
+    LLM_RETRY_BACKOFF: float = 0.5  # seconds, doubled per attempt with full jitter
+    LLM_RETRY_MAX_BACKOFF: float = 8.0
+    LLM_HEDGE_PERCENTILE: Optional[float] = None  # e.g. 95 hedges calls slower than p95
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5  # consecutive failures that open the circuit
+    LLM_BREAKER_RESET_TIMEOUT: float = 30.0  # seconds before a trial call is let through
+
+    # Chunked generation for long materials
+    GENERATION_CHUNK_SIZE: int = 12000  # max characters of material sent per call
+    GENERATION_CHUNK_OVERLAP: int = 400  # characters repeated between neighbouring chunks
+    GENERATION_PARALLELISM: int = 4  # chunks of one material generated concurrently
+
+    # Generation cache (shared across users with identical material text)
+    GENERATION_CACHE_ENABLED: bool = True
+    GENERATION_CACHE_TTL: int = 7 * 24 * 3600  # seconds, refreshed on every hit
+    GENERATION_CACHE_DIR: Optional[str] = None  # enables the on-disk tier when set
+    GENERATION_CACHE_DISK_MAX_BYTES: int = 512 * 1024 * 1024
+
+    # Uploads
+    MAX_UPLOAD_BYTES: int = 50 * 1024 * 1024  # larger request bodies are rejected with 413
+
+    # YouTube transcripts
+    YOUTUBE_TRANSCRIPT_PROVIDER: str = "youtube"  # "youtube", or "fake" for offline runs and benchmarks
+    YOUTUBE_FAKE_LATENCY: float = 0.0  # seconds the fake provider blocks per fetch
+    YOUTUBE_FETCH_WORKERS: int = 8  # threads fetching transcripts concurrently per process
+    YOUTUBE_FETCH_TIMEOUT: float = 30.0  # seconds before a fetch is given up
+    YOUTUBE_TRANSCRIPT_CACHE_TTL: int = 7 * 24 * 3600  # seconds a fetched transcript is reused
+    YOUTUBE_TRANSCRIPT_CACHE_ENTRIES: int = 256  # transcripts kept in process memory
+    YOUTUBE_IMPORT_MAX_VIDEOS: int = 100  # videos accepted by one batch import
+    YOUTUBE_IMPORT_CONCURRENCY: int = 4  # transcripts one batch import fetches at a time
+
+    # PDF text extraction (process pool)
+    PDF_EXTRACTION_BACKEND: Optional[str] = None  # "pdfium", "pymupdf" or "pypdf2"; fastest installed if unset
+    PDF_EXTRACTION_WORKERS: Optional[int] = None  # worker processes, defaults to the CPU count
+    PDF_PAGES_PER_TASK: int = 50  # longer documents are split into ranges extracted in parallel
+    PDF_EXTRACTION_TIMEOUT: float = 120.0  # seconds before a document is abandoned and its workers killed
+
+    # Material storage
+    MATERIAL_SECTION_CHARS: int = 4000  # stored text is split into sections of at most this size
+    MATERIAL_COMPRESSION: Optional[str] = None  # "zstd", "zlib" or "none"; default zstd when installed, else zlib
+    MATERIAL_COMPRESSION_LEVEL: Optional[int] = None  # codec default (zstd 3, zlib 6) when unset
+    MATERIAL_COMPRESSION_MIN_BYTES: int = 256  # shorter sections are stored uncompressed
+
+    # Text preprocessing at upload (boilerplate, hyphenation, whitespace, filler)
+    TEXT_PREPROCESSING_ENABLED: bool = True
+
+    # Per-user LLM token quotas (token bucket)
+    USER_TOKEN_QUOTA_ENABLED: bool = True
+    USER_TOKEN_BUCKET_CAPACITY: int = 500_000  # tokens a user may spend in a burst
+    USER_TOKEN_REFILL_PER_SECOND: float = 100.0  # sustained rate, ~360k tokens an hour
+    GENERATION_TOKENS_PER_ITEM: int = 80  # output tokens assumed per item when reserving
+
+    # Single-flight locking of concurrent generate calls
+    SINGLE_FLIGHT_LOCK_TTL: int = 60  # seconds before a dead holder's lock expires (renewed while held)
+    SINGLE_FLIGHT_POLL_INTERVAL: float = 0.25  # seconds between lock attempts
+
+    # Background generation jobs
+    WORKER_CONCURRENCY: int = 4  # jobs processed concurrently per worker process
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF: float = 2.0  # seconds, doubled on every retry
+    JOB_TTL: int = 24 * 3600  # seconds a finished job stays queryable
+    JOB_VISIBILITY_TIMEOUT: int = 300  # seconds without a heartbeat before a running job is requeued
+    WORKER_REDIS_BACKOFF_MAX: float = 30.0  # seconds, cap on the wait after Redis errors
+
+    # Eager generation after upload
+    PREGENERATE_ON_UPLOAD: bool = False  # default when the upload form doesn't say
+    PREGENERATION_CONCURRENCY: int = 1  # worker slots background jobs may occupy
     
     # OAuth2 configs
     GOOGLE_CLIENT_ID: Optional[str] = None
@@ -5,7 +5,7 @@ from jose import jwt, JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.core.config import settings
-from app.db.session import get_async_db
+from app.db.session import get_async_db, get_session_factory
 from app.models.user import User, UserRole
 from app.services import auth
 
@@ -0,0 +1,60 @@
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+def _format_size(num_bytes: int) -> str:
+    for unit, size in (("MB", 1024 * 1024), ("KB", 1024)):
+        if num_bytes >= size:
+            return f"{round(num_bytes / size, 1):g} {unit}"
+    return f"{num_bytes} bytes"
+
+class BodySizeLimitMiddleware:
+    """
+    Rejects request bodies larger than `max_bytes` with 413.
+
+    A declared Content-Length over the limit is refused before any of the
+    body is read. Otherwise bytes are counted as they arrive, so a chunked
+    upload is cut off as soon as it crosses the limit instead of being
+    spooled to disk in full first.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    @property
+    def detail(self) -> str:
+        return f"Request body exceeds the maximum size of {_format_size(self.max_bytes)}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        length = Headers(scope=scope).get("content-length")
+        if length and length.isdigit() and int(length) > self.max_bytes:
+            response = JSONResponse(
+                status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                content={"detail": self.detail}
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Raised while the route parses the body, so the
+                    # regular exception handlers turn it into a response
+                    raise HTTPException(
+                        status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                        detail=self.detail
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -24,4 +24,8 @@ async def get_async_db():
         try:
             yield session
         finally:
-            await session.close() 
\ No newline at end of file
+            await session.close() 
+
+def get_session_factory() -> async_sessionmaker:
+    """Session factory for work that outlives the request, such as a streamed response body."""
+    return AsyncSessionLocal
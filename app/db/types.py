@@ -0,0 +1,69 @@
+import importlib.util
+import zlib
+from typing import Optional
+from sqlalchemy.types import LargeBinary, TypeDecorator
+from app.core.config import settings
+
+# First byte of every stored value says how the rest is encoded
+RAW = b"\x00"
+ZLIB = b"\x01"
+ZSTD = b"\x02"
+
+def zstd_available() -> bool:
+    return importlib.util.find_spec("zstandard") is not None
+
+def compression_codec() -> str:
+    """MATERIAL_COMPRESSION, or zstd when installed and zlib otherwise."""
+    codec = settings.MATERIAL_COMPRESSION or ("zstd" if zstd_available() else "zlib")
+    if codec not in ("zstd", "zlib", "none"):
+        raise ValueError(f"Unknown compression codec '{codec}'. Available: none, zlib, zstd")
+    if codec == "zstd" and not zstd_available():
+        raise ValueError("zstd compression needs the zstandard package")
+    return codec
+
+def compress_text(text: str) -> bytes:
+    data = text.encode()
+    codec = compression_codec()
+    if codec == "none" or len(data) < settings.MATERIAL_COMPRESSION_MIN_BYTES:
+        return RAW + data
+    if codec == "zstd":
+        import zstandard
+        packed = ZSTD + zstandard.compress(data, settings.MATERIAL_COMPRESSION_LEVEL or 3)
+    else:
+        packed = ZLIB + zlib.compress(data, settings.MATERIAL_COMPRESSION_LEVEL or 6)
+    # Incompressible text is not worth the decompression on every read
+    return packed if len(packed) <= len(data) else RAW + data
+
+def decompress_text(value: bytes) -> str:
+    tag, data = value[:1], value[1:]
+    if tag == RAW:
+        return data.decode()
+    if tag == ZLIB:
+        return zlib.decompress(data).decode()
+    if tag == ZSTD:
+        if not zstd_available():
+            raise ValueError("Stored text is zstd-compressed; install the zstandard package to read it")
+        import zstandard
+        return zstandard.decompress(data).decode()
+    raise ValueError(f"Unknown compressed text header {tag!r}")
+
+class CompressedText(TypeDecorator):
+    """
+    Text stored compressed as a BLOB.
+
+    Values of at least MATERIAL_COMPRESSION_MIN_BYTES are compressed with
+    MATERIAL_COMPRESSION (zstd or zlib) and smaller ones stored as is; a
+    one-byte header records which, so changing the settings never breaks
+    reading existing rows. Plain text left over from before the column was
+    compressed is returned unchanged.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[str], dialect) -> Optional[bytes]:
+        return None if value is None else compress_text(value)
+
+    def process_result_value(self, value, dialect) -> Optional[str]:
+        if value is None or isinstance(value, str):
+            return value
+        return decompress_text(bytes(value))
@@ -1,10 +1,17 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.core.config import settings
+from app.core.middleware import BodySizeLimitMiddleware
 from app.api.v1.api import api_router
 from app.db.session import engine
 from app.models import Base
+from app.services.llm_providers import close_llm_provider
+from app.services.pdf_service import close_extraction_pool
+from app.services.youtube_service import close_transcript_executor
+from app.services.resilience import CircuitOpenError
+from app.services.usage import QuotaExceeded
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -12,6 +19,9 @@ async def lifespan(app: FastAPI):
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     yield
+    await close_llm_provider()
+    close_extraction_pool()
+    close_transcript_executor()
     await engine.dispose()
 
 app = FastAPI(
@@ -23,6 +33,10 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Refuse oversized uploads before they are spooled to disk (added first so
+# CORS headers still wrap its 413 responses)
+app.add_middleware(BodySizeLimitMiddleware, max_bytes=settings.MAX_UPLOAD_BYTES)
+
 # Set up CORS - Allow all origins for testing
 app.add_middleware(
     CORSMiddleware,
@@ -32,6 +46,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError):
+    # The LLM upstream is unhealthy; tell clients to back off instead of erroring
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(int(settings.LLM_BREAKER_RESET_TIMEOUT))}
+    )
+
+@app.exception_handler(QuotaExceeded)
+async def quota_exceeded_handler(request: Request, exc: QuotaExceeded):
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(int(exc.retry_after))}
+    )
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -1,9 +1,12 @@
 from app.models.base import Base
 from app.models.user import User
+from app.models.material_section import MaterialSection
+from app.models.content_blob import ContentBlob
 from app.models.material import Material
 from app.models.flashcard import Flashcard
 from app.models.question import Question
 from app.models.progress import Progress
+from app.models.token_usage import TokenUsage
 
 # This ensures all models are registered with SQLAlchemy
-__all__ = ["Base", "User", "Material", "Flashcard", "Question", "Progress"] 
\ No newline at end of file
+__all__ = ["Base", "User", "MaterialSection", "ContentBlob", "Material", "Flashcard", "Question", "Progress", "TokenUsage"] 
\ No newline at end of file
@@ -0,0 +1,70 @@
+from datetime import datetime
+from hashlib import sha256
+from sqlalchemy import Column, Integer, String, DateTime, event
+from sqlalchemy.orm import relationship
+from app.core.config import settings
+from app.models.base import Base
+from app.models.material_section import MaterialSection
+from app.utils.text import estimate_tokens, section_bounds
+
+def content_hash(text: str) -> str:
+    return sha256(text.encode()).hexdigest()
+
+class ContentBlob(Base):
+    """
+    Extracted material text, stored once per distinct text.
+
+    Materials reference a blob by the SHA-256 of its text, so identical
+    uploads share one copy. The text itself is stored as sections and
+    assembled on access; load them first (ContentStore.load_content) when
+    the whole text is needed. `ref_count` is the number of materials
+    pointing at the blob and is kept up to date on flush (see
+    app.models.material); a blob is deleted along with its last material.
+    """
+    __tablename__ = "content_blobs"
+
+    hash = Column(String(64), primary_key=True)
+    char_count = Column(Integer, nullable=False, default=0)
+    token_estimate = Column(Integer, nullable=False, default=0)
+    ref_count = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    sections = relationship(
+        MaterialSection,
+        order_by=MaterialSection.index,
+        cascade="all, delete-orphan"
+    )
+
+    @classmethod
+    def from_text(cls, text: str) -> "ContentBlob":
+        sections = [
+            MaterialSection(
+                index=index,
+                start=start,
+                end=end,
+                text=text[start:end],
+                token_estimate=estimate_tokens(text[start:end])
+            )
+            for index, (start, end) in enumerate(section_bounds(text, settings.MATERIAL_SECTION_CHARS))
+        ]
+        blob = cls(
+            hash=content_hash(text),
+            char_count=len(text),
+            token_estimate=estimate_tokens(text),
+            sections=sections
+        )
+        blob._text = text
+        return blob
+
+    @property
+    def text(self) -> str:
+        # Joined once per load of the sections, not on every access
+        text = self.__dict__.get("_text")
+        if text is None:
+            text = self._text = "".join(section.text for section in self.sections)
+        return text
+
+@event.listens_for(ContentBlob, "refresh")
+@event.listens_for(ContentBlob, "expire")
+def _forget_text(blob: ContentBlob, *args) -> None:
+    blob.__dict__.pop("_text", None)
@@ -1,10 +1,12 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Index, Integer, String, Text, ForeignKey, DateTime
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.models.base import Base
 
 class Flashcard(Base):
     __tablename__ = "flashcards"
+    # Items are always looked up by material and user together
+    __table_args__ = (Index("ix_flashcards_material_id_user_id", "material_id", "user_id"),)
 
     id = Column(String, primary_key=True, index=True)
     front = Column(Text, nullable=False)
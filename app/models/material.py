@@ -1,21 +1,171 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
-from sqlalchemy.orm import relationship
+from collections import defaultdict
+from typing import Dict, List, Optional
+from sqlalchemy import Column, Index, Integer, String, Text, ForeignKey, DateTime, event, inspect, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session, relationship, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from app.db.base_class import Base
+from app.models.content_blob import ContentBlob
+from app.models.flashcard import Flashcard
+from app.models.material_section import MaterialSection
+from app.models.question import Question
 
 class Material(Base):
     __tablename__ = "materials"
+    # The listing filters by owner and sorts by creation time
+    __table_args__ = (Index("ix_materials_owner_id_created_at", "owner_id", "created_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
-    content = Column(Text)
+    blob_hash = Column(String(64), ForeignKey("content_blobs.hash"), index=True)
+    source_hash = Column(String(64), index=True, nullable=True)  # SHA-256 of the uploaded file
     source_type = Column(String)  # 'pdf' or 'youtube'
     source_url = Column(String, nullable=True)
     owner_id = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Maintained on flush (see below), so stats never count rows
+    num_flashcards = Column(Integer, nullable=False, default=0, server_default="0")
+    num_questions = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Relationships
     owner = relationship("User", back_populates="materials")
+    blob = relationship(ContentBlob, lazy="joined")
     flashcards = relationship("Flashcard", back_populates="material", lazy="dynamic")
     questions = relationship("Question", back_populates="material", lazy="dynamic")
-    progress = relationship("Progress", back_populates="material", lazy="dynamic") 
\ No newline at end of file
+    progress = relationship("Progress", back_populates="material", lazy="dynamic")
+
+    @property
+    def content(self) -> Optional[str]:
+        return self.blob.text if self.blob is not None else None
+
+    @content.setter
+    def content(self, text: str) -> None:
+        # Resolved to the stored blob with the same hash on flush
+        self.blob = ContentBlob.from_text(text)
+
+    @property
+    def content_sections(self) -> List[str]:
+        """The text as its stored sections, which generation chunks by."""
+        return [section.text for section in self.blob.sections] if self.blob is not None else []
+
+def _store_blob(session: Session, blob: ContentBlob) -> ContentBlob:
+    """
+    Insert the blob's row and sections unless its hash is already stored,
+    and return the session's persistent instance of it.
+    """
+    if "sections" not in inspect(blob).unloaded:
+        # Concurrent first uploads of a text race here; the primary key lets
+        # one insert through and the others share its row
+        session.execute(
+            insert(ContentBlob)
+            .values(hash=blob.hash, char_count=blob.char_count,
+                    token_estimate=blob.token_estimate, ref_count=0, created_at=datetime.utcnow())
+            .on_conflict_do_nothing(index_elements=["hash"])
+        )
+        if blob.sections:
+            session.execute(
+                insert(MaterialSection)
+                .values([
+                    {"blob_hash": blob.hash, "index": section.index, "start": section.start,
+                     "end": section.end, "text": section.text, "token_estimate": section.token_estimate,
+                     "created_at": datetime.utcnow()}
+                    for section in blob.sections
+                ])
+                .on_conflict_do_nothing(index_elements=["blob_hash", "index"])
+            )
+    if inspect(blob).persistent:
+        return blob
+    # With its sections, so the text stays readable like the copy it replaces
+    return session.get(ContentBlob, blob.hash, options=[selectinload(ContentBlob.sections)])
+
+@event.listens_for(Session, "before_flush")
+def _count_blob_references(session: Session, flush_context, instances) -> None:
+    # Blobs assigned to materials are stored (or found stored) first, then
+    # their reference counts change with an UPDATE relative to the stored
+    # value, so concurrent uploads and deletes never lose a reference
+    deltas: Dict[str, int] = defaultdict(int)
+    stored: Dict[str, ContentBlob] = {}
+
+    def reference(material: Material, blob: ContentBlob) -> None:
+        if blob.hash not in stored:
+            stored[blob.hash] = _store_blob(session, blob)
+        if blob is not stored[blob.hash]:
+            # A transient copy of the text; the stored row replaces it
+            if blob in session:
+                session.expunge(blob)
+            material.blob = stored[blob.hash]
+        deltas[blob.hash] += 1
+
+    with session.no_autoflush:
+        for material in list(session.new):
+            if isinstance(material, Material) and material.blob is not None:
+                reference(material, material.blob)
+
+        for material in list(session.dirty):
+            if not isinstance(material, Material):
+                continue
+            history = inspect(material).attrs.blob.history
+            for old in history.deleted or ():
+                if old is not None:
+                    deltas[old.hash] -= 1
+            if history.added and history.added[0] is not None:
+                reference(material, history.added[0])
+
+        for material in list(session.deleted):
+            if isinstance(material, Material) and material.blob_hash is not None:
+                deltas[material.blob_hash] -= 1
+
+        for blob_hash, delta in deltas.items():
+            if not delta:
+                continue
+            ref_count = session.execute(
+                update(ContentBlob)
+                .where(ContentBlob.hash == blob_hash)
+                .values(ref_count=ContentBlob.ref_count + delta)
+                .returning(ContentBlob.ref_count)
+                .execution_options(synchronize_session=False)
+            ).scalar()
+            if ref_count is None:
+                if delta > 0:
+                    # Deleted with its last material after this one was loaded
+                    raise ValueError("The material's content was deleted, please upload it again")
+                continue
+            blob = stored.get(blob_hash) or session.get(ContentBlob, blob_hash)
+            set_committed_value(blob, "ref_count", ref_count)
+            if ref_count <= 0:
+                # Goes with its last material in this flush
+                session.delete(blob)
+
+_COUNTERS = {Flashcard: "num_flashcards", Question: "num_questions"}
+
+@event.listens_for(Session, "before_flush")
+def _count_generated_items(session: Session, flush_context, instances) -> None:
+    # Added and deleted flashcards and questions adjust their material's
+    # counters in the same transaction, with an UPDATE relative to the
+    # stored value so concurrent writers never lose an increment
+    deltas = defaultdict(lambda: defaultdict(int))
+    for change, objects in ((1, session.new), (-1, session.deleted)):
+        for item in objects:
+            counter = _COUNTERS.get(type(item))
+            if counter is None:
+                continue
+            if item.material_id is not None:
+                deltas[item.material_id][counter] += change
+            elif item.material is not None:
+                # Material inserted in the same flush; its counters start here
+                setattr(item.material, counter, (getattr(item.material, counter) or 0) + change)
+
+    for material_id, changes in deltas.items():
+        with session.no_autoflush:
+            counts = session.execute(
+                update(Material)
+                .where(Material.id == material_id)
+                .values({name: getattr(Material, name) + delta for name, delta in changes.items()})
+                .returning(Material.num_flashcards, Material.num_questions)
+                .execution_options(synchronize_session=False)
+            ).first()
+        loaded = session.identity_map.get(inspect(Material).identity_key_from_primary_key((material_id,)))
+        if counts is not None and loaded is not None:
+            set_committed_value(loaded, "num_flashcards", counts.num_flashcards)
+            set_committed_value(loaded, "num_questions", counts.num_questions)
@@ -0,0 +1,25 @@
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, String, ForeignKey, UniqueConstraint
+from app.db.types import CompressedText
+from app.models.base import Base
+
+class MaterialSection(Base):
+    """
+    One contiguous slice of a stored material text.
+
+    Sections are cut at upload (see utils.text.section_bounds) and belong to
+    the shared content blob, so deduplicated materials share them too.
+    `start` and `end` are character offsets into the full text; the
+    section's own text is stored compressed (see app.db.types).
+    """
+    __tablename__ = "material_sections"
+    __table_args__ = (UniqueConstraint("blob_hash", "index"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    blob_hash = Column(String(64), ForeignKey("content_blobs.hash"), nullable=False, index=True)
+    index = Column(Integer, nullable=False)  # position within the text, from 0
+    start = Column(Integer, nullable=False)
+    end = Column(Integer, nullable=False)
+    text = Column(CompressedText, nullable=False)
+    token_estimate = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
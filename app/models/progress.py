@@ -1,10 +1,16 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Float, JSON
+from sqlalchemy import Column, Index, Integer, ForeignKey, DateTime, Float, JSON
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.models.base import Base
 
 class Progress(Base):
     __tablename__ = "progress"
+    # One row per user and material, which makes get-or-create race-free;
+    # the second index serves lookups by material alone (deletes)
+    __table_args__ = (
+        Index("uq_progress_user_id_material_id", "user_id", "material_id", unique=True),
+        Index("ix_progress_material_id_user_id", "material_id", "user_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
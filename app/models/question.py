@@ -1,10 +1,12 @@
-from sqlalchemy import Column, String, Text, Integer, ForeignKey, JSON, DateTime
+from sqlalchemy import Column, Index, String, Text, Integer, ForeignKey, JSON, DateTime
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.models.base import Base
 
 class Question(Base):
     __tablename__ = "questions"
+    # Items are always looked up by material and user together
+    __table_args__ = (Index("ix_questions_material_id_user_id", "material_id", "user_id"),)
 
     id = Column(String, primary_key=True, index=True)
     question_text = Column(Text, nullable=False)
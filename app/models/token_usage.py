@@ -0,0 +1,17 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from app.models.base import Base
+
+class TokenUsage(Base):
+    """LLM tokens spent by one generate call of a user on a material."""
+    __tablename__ = "token_usage"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    material_id = Column(Integer, ForeignKey("materials.id"), index=True)
+    kind = Column(String)  # 'flashcards', 'questions' or 'study_set'
+    model = Column(String)
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    llm_calls = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
@@ -20,6 +20,10 @@ class MultipleQuestions(BaseModel):
 class MultipleFlashcards(BaseModel):
     flashcards: List[Flashcard] = Field(..., description="List of flashcards")
 
+class StudySet(BaseModel):
+    flashcards: List[Flashcard] = Field(..., description="List of flashcards")
+    questions: List[SingleQuestion] = Field(..., description="List of questions")
+
 class AIGenerationRequest(BaseModel):
     text: str = Field(..., description="The text to generate content from")
     num_items: int = Field(default=5, ge=1, le=20, description="Number of items to generate")
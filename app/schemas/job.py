@@ -0,0 +1,27 @@
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Optional
+from pydantic import BaseModel, Field
+
+PRIORITY_INTERACTIVE = 10
+PRIORITY_BACKGROUND = 0
+
+class JobState(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class Job(BaseModel):
+    id: str
+    kind: str = Field(..., description="What to generate: 'flashcards' or 'questions'")
+    material_id: int
+    user_id: int
+    priority: int = Field(default=PRIORITY_INTERACTIVE, description="Higher priorities are processed first")
+    state: JobState = JobState.QUEUED
+    attempts: int = 0
+    params: Dict[str, Any] = Field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -19,6 +19,20 @@ class MaterialResponse(MaterialBase):
     class Config:
         from_attributes = True
 
+class PreprocessingStats(BaseModel):
+    original_bytes: int
+    processed_bytes: int
+    bytes_saved: int
+    original_tokens: int
+    processed_tokens: int
+    tokens_saved: int
+
+class MaterialUploadResponse(MaterialResponse):
+    # How much the stored content shrank through text preprocessing
+    preprocessing: Optional[PreprocessingStats] = None
+    # The file was uploaded before; its stored text was reused
+    deduplicated: bool = False
+
 # This is used for internal operations
 class MaterialInDB(MaterialResponse):
     pass
@@ -27,7 +41,19 @@ class MaterialStats(BaseModel):
     num_flashcards: int
     num_questions: int
 
-class MaterialListItem(MaterialResponse):
+class MaterialSummary(BaseModel):
+    # Listing columns only; fetch a single material for its content
+    id: int
+    title: str
+    source_type: str
+    source_url: Optional[str] = None
+    owner_id: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class MaterialListItem(MaterialSummary):
     stats: MaterialStats
 
     class Config:
@@ -37,4 +63,29 @@ class MaterialList(BaseModel):
     materials: List[MaterialListItem]
     total: int
     page: int
-    per_page: int 
\ No newline at end of file
+    per_page: int
+
+class YouTubeImportVideo(BaseModel):
+    url: str
+    title: Optional[str] = None
+
+class YouTubeImportRequest(BaseModel):
+    # A bare list of URLs, a playlist manifest of videos with titles, or both
+    urls: List[str] = []
+    videos: List[YouTubeImportVideo] = []
+    # Untitled videos are named "<playlist> #<n>"
+    playlist: Optional[str] = None
+    pregenerate: Optional[bool] = None
+
+class YouTubeImportResult(BaseModel):
+    index: int  # position in the request, URLs first, then videos
+    url: str
+    title: str
+    status: str  # "fetched", then "imported"; or "failed"
+    material_id: Optional[int] = None
+    error: Optional[str] = None
+    preprocessing: Optional[PreprocessingStats] = None
+
+class YouTubeImportSummary(BaseModel):
+    imported: int
+    failed: int
@@ -0,0 +1,17 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+class UsageSummary(BaseModel):
+    user_id: int
+    material_id: Optional[int] = None
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    generations: int
+    llm_calls: int
+
+class UserUsage(BaseModel):
+    user_id: int
+    quota_remaining: float
+    total: UsageSummary
+    materials: List[UsageSummary]
@@ -1,39 +1,159 @@
-from typing import List, Optional
-from openai import OpenAI
+import asyncio
+import re
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, List, Optional, Sequence, Tuple, Type, TypeVar, Union
+from openai import AsyncOpenAI
+from pydantic import BaseModel
 from app.core.config import settings
-from app.schemas.ai_content import SingleQuestion, MultipleQuestions, Flashcard, MultipleFlashcards
-import openai
+from app.schemas.ai_content import SingleQuestion, MultipleQuestions, Flashcard, MultipleFlashcards, StudySet
+from app.services.chunking import pack_sections, split_into_chunks, spread_counts
+from app.services.json_stream import JSONArrayItemParser
+from app.services.llm_providers import LLMProvider, OpenAICompatibleProvider, get_llm_provider
+from app.services.resilience import Resilience, get_llm_resilience
 from uuid import uuid4
 
+T = TypeVar("T")
+
+# Material text, whole or as its stored sections (see Material.content_sections)
+Content = Union[str, Sequence[str]]
+
+# Bump whenever the prompts change so cached generations are not reused
+PROMPT_VERSION = 1
+
+_MAX_FILL_ROUNDS = 2
+
+def _flashcards_prompt(num_cards: int) -> str:
+    return f"Generate {num_cards} flashcards strictly based on the content given. Do not include any other information and do not go beyond the content."
+
+def _questions_prompt(num_questions: int) -> str:
+    return f"Generate {num_questions} questions strictly based on the content given. Do not include any other information and do not go beyond the content."
+
+def _study_set_prompt(num_cards: int, num_questions: int) -> str:
+    return f"Generate {num_cards} flashcards and {num_questions} questions strictly based on the content given. The questions must not simply restate the flashcards. Do not include any other information and do not go beyond the content."
+
+def _messages(system_prompt: str, text: str, avoid: Sequence[str] = ()) -> List[dict]:
+    content = f"Content: {text}"
+    if avoid:
+        # Items the user already has, so top-ups don't come back as duplicates
+        content += "\n\nAlready covered (do not repeat or rephrase these):\n"
+        content += "\n".join(f"- {item}" for item in avoid)
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": content},
+    ]
+
+def _chunks(text: Content) -> List[str]:
+    """Bounded pieces of the material, one generation request each."""
+    if isinstance(text, str):
+        return split_into_chunks(
+            text,
+            settings.GENERATION_CHUNK_SIZE,
+            settings.GENERATION_CHUNK_OVERLAP
+        ) or [text]
+    # Stored sections are packed as cut at upload rather than re-split
+    return pack_sections(
+        text,
+        settings.GENERATION_CHUNK_SIZE,
+        settings.GENERATION_CHUNK_OVERLAP
+    ) or ["".join(text)]
+
+def _dedup_key(value: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9 ]", " ", value.lower()).split())
+
+def _fill_rounds(
+    chunk_count: int,
+    counts: Sequence[int],
+    missing: Callable[[], Sequence[int]]
+) -> Iterator[List[List[int]]]:
+    """
+    Per-chunk counts to request of each kind, round by round: the requested
+    counts first, then whatever `missing()` reports is still short after the
+    previous round, for at most `_MAX_FILL_ROUNDS` rounds.
+    """
+    wanted = list(counts)
+    for _ in range(_MAX_FILL_ROUNDS):
+        yield [spread_counts(n, chunk_count) for n in wanted]
+        wanted = [max(n, 0) for n in missing()]
+        if not any(wanted):
+            return
+
+def _take_spread(per_chunk: List[List[T]], count: int) -> List[T]:
+    """
+    Keep `count` items picked round-robin across chunks, returned in
+    document order, so the result covers the whole material.
+    """
+    taken = [0] * len(per_chunk)
+    remaining = count
+    while remaining > 0:
+        progressed = False
+        for index, items in enumerate(per_chunk):
+            if remaining and taken[index] < len(items):
+                taken[index] += 1
+                remaining -= 1
+                progressed = True
+        if not progressed:
+            break
+    return [item for index, items in enumerate(per_chunk) for item in items[:taken[index]]]
+
 class AIGenerator:
-    def __init__(self):
-        self.client = OpenAI(
-            api_key=settings.GEMINI_API_KEY,
-            base_url="https://generativelanguage.googleapis.com/v1beta/openai/"
+    def __init__(
+        self,
+        client: Optional[AsyncOpenAI] = None,
+        max_concurrency: Optional[int] = None,
+        resilience: Optional[Resilience] = None,
+        provider: Optional[LLMProvider] = None
+    ):
+        if provider is None:
+            provider = (
+                OpenAICompatibleProvider(client, settings.LLM_MODEL)
+                if client is not None else get_llm_provider()
+            )
+        self.provider = provider
+        self.resilience = resilience or get_llm_resilience()
+        # Caps the number of generation calls in flight; extra callers wait
+        # here instead of piling onto the upstream API. Generators sharing a
+        # provider share its cap unless given one of their own.
+        self._semaphore = (
+            asyncio.Semaphore(max_concurrency) if max_concurrency else provider.call_limit
         )
 
     async def generate_flashcards(
         self,
-        text: str,
+        text: Content,
         num_cards: int = 20,
-        topics: Optional[List[str]] = None
+        topics: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+        exclude: Sequence[str] = ()
     ) -> List[Flashcard]:
-        completion = self.client.beta.chat.completions.parse(
-            model="gemini-1.5-flash",
-            messages=[
-                {"role": "system", "content": f"Generate {num_cards} flashcards strictly based on the content given. Do not include any other information and do not go beyond the content."},
-                {"role": "user", "content": f"Content: {text}"},
-            ],
-            response_format=MultipleFlashcards,
+        """Generate flashcards, avoiding the fronts listed in `exclude`."""
+        flashcards = await self._generate_chunked(
+            text,
+            num_cards,
+            lambda chunk, n: self._request_flashcards(chunk, n, timeout, exclude),
+            key=lambda card: card.front,
+            exclude=exclude
         )
-        
+
         # Add unique IDs to each flashcard
-        flashcards = completion.choices[0].message.parsed.flashcards
         for card in flashcards:
             card.id = f"fc_{uuid4()}"
-        
+
         return flashcards
 
+    async def _request_flashcards(
+        self,
+        text: str,
+        num_cards: int,
+        timeout: Optional[float] = None,
+        exclude: Sequence[str] = ()
+    ) -> List[Flashcard]:
+        async with self._semaphore:
+            parsed = await self.resilience.call(lambda: self.provider.parse(
+                _messages(_flashcards_prompt(num_cards), text, exclude),
+                MultipleFlashcards,
+                timeout
+            ))
+        return parsed.flashcards
+
     def _parse_ai_response(self, response: str) -> List[dict]:
         """
         Parse the AI response into a list of flashcard dictionaries
@@ -47,22 +167,261 @@ class AIGenerator:
 
     async def generate_questions(
         self,
-        text: str,
+        text: Content,
         num_questions: int = 5,
-        topics: Optional[List[str]] = None
+        topics: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+        exclude: Sequence[str] = ()
     ) -> List[SingleQuestion]:
-        completion = self.client.beta.chat.completions.parse(
-            model="gemini-1.5-flash",
-            messages=[
-                {"role": "system", "content": f"Generate {num_questions} questions strictly based on the content given. Do not include any other information and do not go beyond the content."},
-                {"role": "user", "content": f"Content: {text}"},
-            ],
-            response_format=MultipleQuestions,
+        """Generate questions, avoiding the question texts listed in `exclude`."""
+        questions = await self._generate_chunked(
+            text,
+            num_questions,
+            lambda chunk, n: self._request_questions(chunk, n, timeout, exclude),
+            key=lambda question: question.question,
+            exclude=exclude
         )
-        
+
         # Add unique IDs to each question
-        questions = completion.choices[0].message.parsed.questions
         for question in questions:
             question.id = f"q_{uuid4()}"
-        
-        return questions
\ No newline at end of file
+
+        return questions
+
+    async def _request_questions(
+        self,
+        text: str,
+        num_questions: int,
+        timeout: Optional[float] = None,
+        exclude: Sequence[str] = ()
+    ) -> List[SingleQuestion]:
+        async with self._semaphore:
+            parsed = await self.resilience.call(lambda: self.provider.parse(
+                _messages(_questions_prompt(num_questions), text, exclude),
+                MultipleQuestions,
+                timeout
+            ))
+        return parsed.questions
+
+    async def generate_study_set(
+        self,
+        text: Content,
+        num_cards: int = 20,
+        num_questions: int = 20,
+        timeout: Optional[float] = None
+    ) -> StudySet:
+        """
+        Generate flashcards and questions together in one structured-output
+        call per chunk, so the material is sent to the model only once.
+        """
+        flashcards, questions = await self._generate_chunked_multi(
+            text,
+            [num_cards, num_questions],
+            lambda chunk, counts: self._request_study_set(chunk, counts[0], counts[1], timeout),
+            keys=[lambda card: card.front, lambda question: question.question]
+        )
+
+        for card in flashcards:
+            card.id = f"fc_{uuid4()}"
+        for question in questions:
+            question.id = f"q_{uuid4()}"
+
+        return StudySet(flashcards=flashcards, questions=questions)
+
+    async def _request_study_set(
+        self,
+        text: str,
+        num_cards: int,
+        num_questions: int,
+        timeout: Optional[float] = None
+    ) -> Tuple[List[Flashcard], List[SingleQuestion]]:
+        async with self._semaphore:
+            parsed = await self.resilience.call(lambda: self.provider.parse(
+                _messages(_study_set_prompt(num_cards, num_questions), text),
+                StudySet,
+                timeout
+            ))
+        return parsed.flashcards, parsed.questions
+
+    async def _generate_chunked(
+        self,
+        text: Content,
+        count: int,
+        request: Callable[[str, int], Awaitable[List[T]]],
+        key: Callable[[T], str],
+        exclude: Sequence[str] = ()
+    ) -> List[T]:
+        """Single-kind form of `_generate_chunked_multi`."""
+        async def request_one(chunk: str, counts: Sequence[int]) -> Sequence[List[T]]:
+            return [await request(chunk, counts[0])]
+
+        [items] = await self._generate_chunked_multi(text, [count], request_one, [key], [exclude])
+        return items
+
+    async def _generate_chunked_multi(
+        self,
+        text: Content,
+        counts: Sequence[int],
+        request: Callable[[str, Sequence[int]], Awaitable[Sequence[List[Any]]]],
+        keys: Sequence[Callable[[Any], str]],
+        excludes: Sequence[Sequence[str]] = ()
+    ) -> List[List[Any]]:
+        """
+        Map-reduce generation over bounded chunks of the material.
+
+        Each requested count is spread across the chunks, which are generated
+        concurrently; one request per chunk may ask for several kinds of item
+        at once. Results are deduplicated per kind, any shortfall is requested
+        again from the chunks, and exactly `counts[k]` items of each kind are
+        kept, picked evenly from across the document. Items matching
+        `excludes[k]` (ones the caller already has) count as duplicates.
+        """
+        chunks = _chunks(text)
+        parallelism = asyncio.Semaphore(settings.GENERATION_PARALLELISM)
+
+        async def run(index: int, chunk_counts: List[int]) -> Tuple[int, Sequence[List[Any]]]:
+            async with parallelism:
+                return index, await request(chunks[index], chunk_counts)
+
+        # per_chunk[kind][chunk] holds the unique items of that kind per chunk
+        per_chunk: List[List[List[Any]]] = [[[] for _ in chunks] for _ in counts]
+        seen = [set() for _ in counts]
+        for kind, exclude in enumerate(excludes):
+            seen[kind].update(_dedup_key(value) for value in exclude)
+
+        def missing() -> List[int]:
+            return [
+                count - sum(len(items) for items in per_chunk[kind])
+                for kind, count in enumerate(counts)
+            ]
+
+        for wanted in _fill_rounds(len(chunks), counts, missing):
+            requests = []
+            for index in range(len(chunks)):
+                chunk_counts = [kind_wanted[index] for kind_wanted in wanted]
+                if any(chunk_counts):
+                    requests.append(run(index, chunk_counts))
+            for index, results in await asyncio.gather(*requests):
+                for kind, items in enumerate(results):
+                    for item in items:
+                        item_key = _dedup_key(keys[kind](item))
+                        if item_key and item_key not in seen[kind]:
+                            seen[kind].add(item_key)
+                            per_chunk[kind][index].append(item)
+
+        return [_take_spread(per_chunk[kind], count) for kind, count in enumerate(counts)]
+
+    async def stream_flashcards(
+        self,
+        text: Content,
+        num_cards: int = 20,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[Flashcard]:
+        """Yield flashcards one by one as they are parsed from the model's streamed output."""
+        stream = self._stream_chunked(
+            text,
+            num_cards,
+            lambda chunk, n: self._stream_items(
+                _messages(_flashcards_prompt(n), chunk),
+                MultipleFlashcards,
+                "flashcards",
+                Flashcard,
+                timeout
+            ),
+            key=lambda card: card.front
+        )
+        async for card in stream:
+            card.id = f"fc_{uuid4()}"
+            yield card
+
+    async def stream_questions(
+        self,
+        text: Content,
+        num_questions: int = 20,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[SingleQuestion]:
+        """Yield questions one by one as they are parsed from the model's streamed output."""
+        stream = self._stream_chunked(
+            text,
+            num_questions,
+            lambda chunk, n: self._stream_items(
+                _messages(_questions_prompt(n), chunk),
+                MultipleQuestions,
+                "questions",
+                SingleQuestion,
+                timeout
+            ),
+            key=lambda question: question.question
+        )
+        async for question in stream:
+            question.id = f"q_{uuid4()}"
+            yield question
+
+    async def _stream_items(
+        self,
+        messages: List[dict],
+        response_format: Type[BaseModel],
+        key: str,
+        item_schema: Type[T],
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[T]:
+        parser = JSONArrayItemParser(key)
+        async with self._semaphore, self.resilience.guard():
+            async for delta in self.provider.stream(messages, response_format, timeout):
+                for raw in parser.feed(delta):
+                    yield item_schema.model_validate(raw)
+
+    async def _stream_chunked(
+        self,
+        text: Content,
+        count: int,
+        stream_chunk: Callable[[str, int], AsyncIterator[T]],
+        key: Callable[[T], str]
+    ) -> AsyncIterator[T]:
+        """
+        Streaming counterpart of `_generate_chunked`.
+
+        Chunks are streamed concurrently and items are yielded in arrival
+        order, deduplicated, until `count` items have been produced. If the
+        chunks run out first, the shortfall is streamed again from them in
+        the same fill rounds `_generate_chunked_multi` uses.
+        """
+        chunks = _chunks(text)
+        parallelism = asyncio.Semaphore(settings.GENERATION_PARALLELISM)
+        queue: asyncio.Queue = asyncio.Queue()
+        finished = object()
+
+        async def pump(chunk: str, n: int) -> None:
+            try:
+                async with parallelism:
+                    async for item in stream_chunk(chunk, n):
+                        await queue.put(item)
+            except Exception as e:
+                await queue.put(e)
+
+        async def pump_all(chunk_counts: List[int]) -> None:
+            await asyncio.gather(*(
+                pump(chunk, n)
+                for chunk, n in zip(chunks, chunk_counts)
+                if n > 0
+            ))
+            await queue.put(finished)
+
+        seen = set()
+        produced = 0
+        for [chunk_counts] in _fill_rounds(len(chunks), [count], lambda: [count - produced]):
+            producer = asyncio.create_task(pump_all(chunk_counts))
+            try:
+                while produced < count:
+                    item = await queue.get()
+                    if item is finished:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    item_key = _dedup_key(key(item))
+                    if item_key and item_key not in seen:
+                        seen.add(item_key)
+                        produced += 1
+                        yield item
+            finally:
+                producer.cancel()
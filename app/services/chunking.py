@@ -0,0 +1,130 @@
+import re
+from typing import List, Sequence
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_SEPARATOR = "\n\n"
+
+
+def _split_unit(unit: str, max_chars: int) -> List[str]:
+    """Break a single oversized paragraph on lines, then sentences, then words."""
+    if len(unit) <= max_chars:
+        return [unit]
+
+    for pattern in (re.compile(r"\n"), _SENTENCE_END):
+        parts = [p for p in pattern.split(unit) if p.strip()]
+        if len(parts) > 1:
+            pieces = []
+            for part in parts:
+                pieces.extend(_split_unit(part, max_chars))
+            return pieces
+
+    pieces, current = [], ""
+    for word in unit.split():
+        if current and len(current) + len(word) + 1 > max_chars:
+            pieces.append(current)
+            current = ""
+        current = f"{current} {word}" if current else word[:max_chars]
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _overlap_tail(chunk: str, overlap: int) -> str:
+    """Return roughly the last `overlap` characters of a chunk, cut at a word boundary."""
+    if overlap <= 0 or len(chunk) <= overlap:
+        return ""
+    tail = chunk[-overlap:]
+    space = tail.find(" ")
+    return tail[space + 1:] if space != -1 else tail
+
+
+def split_into_chunks(text: str, max_chars: int, overlap: int = 0) -> List[str]:
+    """
+    Split text into bounded, overlapping segments.
+
+    Paragraphs (blank-line separated sections) are packed greedily so a
+    chunk never exceeds `max_chars`; paragraphs that are too long on their
+    own are broken on lines, sentences and finally words. Each chunk after
+    the first starts with the tail of the previous one so facts spanning a
+    boundary are not lost.
+
+    Args:
+        text: Full material text
+        max_chars: Upper bound on the size of each chunk
+        overlap: Characters carried over from the end of the previous chunk
+
+    Returns:
+        List[str]: Chunks in document order
+    """
+    text = text.strip()
+    if len(text) <= max_chars:
+        return [text] if text else []
+
+    overlap = min(overlap, max_chars // 4)
+    # A chunk may start with an overlap tail and its separator, so a unit
+    # has to leave room for both
+    unit_chars = max(1, max_chars - overlap - len(_SEPARATOR)) if overlap else max_chars
+    units = []
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        if paragraph.strip():
+            units.extend(_split_unit(paragraph.strip(), unit_chars))
+
+    chunks, current = [], ""
+    for unit in units:
+        if current and len(current) + len(_SEPARATOR) + len(unit) > max_chars:
+            chunks.append(current)
+            tail = _overlap_tail(current, overlap)
+            current = f"{tail}{_SEPARATOR}{unit}" if tail else unit
+        else:
+            current = f"{current}{_SEPARATOR}{unit}" if current else unit
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def spread_counts(total: int, num_chunks: int) -> List[int]:
+    """
+    Distribute `total` items across `num_chunks` as evenly as possible.
+
+    Any remainder is handed to chunks spaced evenly through the document
+    rather than to the first few, so short requests still sample the
+    beginning, middle and end of the material.
+    """
+    if num_chunks <= 0:
+        return []
+    counts = [total // num_chunks] * num_chunks
+    remainder = total % num_chunks
+    for i in range(remainder):
+        counts[((2 * i + 1) * num_chunks) // (2 * remainder)] += 1
+    return counts
+
+
+def pack_sections(sections: Sequence[str], max_chars: int, overlap: int = 0) -> List[str]:
+    """
+    Pack stored sections (see utils.text.section_bounds) into generation chunks.
+
+    Consecutive sections are joined as stored, so chunks follow the cuts
+    made at upload instead of re-splitting the whole text; a section too
+    long to fit next to the overlap is split with `split_into_chunks`.
+    Each chunk after the first starts with the text just before it (about
+    `overlap` characters), and no chunk exceeds `max_chars`.
+    """
+    overlap = min(overlap, max_chars // 4)
+    units = []
+    for section in sections:
+        if len(section) <= max_chars - overlap:
+            units.append(section)
+        else:
+            units.extend(f"{piece} " for piece in split_into_chunks(section, max_chars - overlap - 1))
+
+    chunks, current = [], ""
+    for unit in units:
+        if current.strip() and len(current) + len(unit) > max_chars:
+            chunks.append(current.strip())
+            # Units are consecutive, so the tail reads on into the next one
+            current = _overlap_tail(current, overlap)
+        current += unit
+    if current.strip():
+        chunks.append(current.strip())
+    return chunks
@@ -0,0 +1,46 @@
+from typing import Optional
+from sqlalchemy import delete, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.models.content_blob import ContentBlob
+from app.models.flashcard import Flashcard
+from app.models.material import Material
+from app.models.progress import Progress
+from app.models.question import Question
+
+class ContentStore:
+    """
+    Shared storage of extracted material text.
+
+    Text lives in content-addressed blobs (see ContentBlob) whose reference
+    counts are maintained on flush; this service loads a material's text,
+    finds reusable text for an upload and removes materials so their
+    blobs can be released.
+    """
+
+    async def load_content(self, db: AsyncSession, material: Material) -> Optional[str]:
+        """Load the sections of the material's text, making `material.content` readable."""
+        blob = material.blob
+        if blob is None:
+            return None
+        if "sections" in inspect(blob).unloaded:
+            await db.refresh(blob, ["sections"])
+        return blob.text
+
+    async def find_by_source(self, db: AsyncSession, source_hash: str) -> Optional[ContentBlob]:
+        """The blob extracted from an identical file uploaded before, if any."""
+        result = await db.execute(
+            select(ContentBlob)
+            .join(Material, Material.blob_hash == ContentBlob.hash)
+            .where(Material.source_hash == source_hash)
+            .options(selectinload(ContentBlob.sections))
+            .limit(1)
+        )
+        return result.scalars().first()
+
+    async def delete_material(self, db: AsyncSession, material: Material) -> None:
+        """Delete a material with its items and progress, releasing its blob."""
+        for model in (Flashcard, Question, Progress):
+            await db.execute(delete(model).where(model.material_id == material.id))
+        await db.delete(material)
+        await db.commit()
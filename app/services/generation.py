@@ -0,0 +1,569 @@
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple, Type, TypeVar
+from uuid import uuid4
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models.material import Material
+from app.models.flashcard import Flashcard
+from app.models.question import Question
+from app.models.token_usage import TokenUsage
+from app.schemas.ai_content import Flashcard as FlashcardSchema, SingleQuestion, StudySet
+from app.services.ai_generator import AIGenerator
+from app.services.content_store import ContentStore
+from app.services.generation_cache import GenerationCache
+from app.services.single_flight import SingleFlight
+from app.services.usage import TokenQuota, UsageMeter, estimate_generation_tokens, metered
+
+T = TypeVar("T", bound=BaseModel)
+R = TypeVar("R")
+
+class GenerationService:
+    """
+    Produces a user's flashcards and questions for a material.
+
+    Existing rows are returned as-is; otherwise items come from the
+    generation cache or the LLM and are stored as the user's own rows.
+    Asking for more items than exist generates only the difference.
+    Concurrent calls asking the same user, material and kind for the same
+    items share a single generation; other calls and streams of that kind
+    wait for it and then generate only what is still missing. Calls that
+    reach the LLM are charged to the user's token quota and their usage is
+    recorded.
+    """
+
+    def __init__(
+        self,
+        generator: AIGenerator = None,
+        cache: GenerationCache = None,
+        single_flight: SingleFlight = None,
+        quota: TokenQuota = None
+    ):
+        self.generator = generator or AIGenerator()
+        self.cache = cache or GenerationCache()
+        self.single_flight = single_flight or SingleFlight()
+        self.quota = quota or TokenQuota()
+        self.content_store = ContentStore()
+
+    async def get_or_generate_flashcards(
+        self,
+        db: AsyncSession,
+        material: Material,
+        user_id: int,
+        num_cards: int = 20,
+        additional: int = 0
+    ) -> List[FlashcardSchema]:
+        """
+        Return the user's flashcards, generating only what is missing to
+        reach `num_cards` in total, or `additional` more than they have.
+        """
+        await self.content_store.load_content(db, material)
+        key = self._key(user_id, material, "flashcards")
+        return await self.single_flight.run(
+            self._flight_key(key, num_cards, additional),
+            lambda: self._get_or_generate_flashcards(db, material, user_id, num_cards, additional),
+            lock_keys=[key]
+        )
+
+    async def get_or_generate_questions(
+        self,
+        db: AsyncSession,
+        material: Material,
+        user_id: int,
+        num_questions: int = 20,
+        additional: int = 0
+    ) -> List[SingleQuestion]:
+        """Questions counterpart of `get_or_generate_flashcards`."""
+        await self.content_store.load_content(db, material)
+        key = self._key(user_id, material, "questions")
+        return await self.single_flight.run(
+            self._flight_key(key, num_questions, additional),
+            lambda: self._get_or_generate_questions(db, material, user_id, num_questions, additional),
+            lock_keys=[key]
+        )
+
+    async def get_or_generate_study_set(
+        self,
+        db: AsyncSession,
+        material: Material,
+        user_id: int,
+        num_cards: int = 20,
+        num_questions: int = 20
+    ) -> StudySet:
+        """
+        Return the user's flashcards and questions, generating whichever set
+        is missing. Runs under the locks of both kinds, so it never races a
+        flashcards or questions call for the same material.
+        """
+        await self.content_store.load_content(db, material)
+        return await self.single_flight.run(
+            self._flight_key(self._key(user_id, material, "study_set"), num_cards, num_questions),
+            lambda: self._get_or_generate_study_set(db, material, user_id, num_cards, num_questions),
+            lock_keys=[self._key(user_id, material, "flashcards"), self._key(user_id, material, "questions")]
+        )
+
+    async def _get_or_generate_flashcards(
+        self,
+        db: AsyncSession,
+        material: Material,
+        user_id: int,
+        num_cards: int,
+        additional: int
+    ) -> List[FlashcardSchema]:
+        existing_flashcards = await self._existing_flashcards(db, material, user_id)
+        missing = self._missing(len(existing_flashcards), num_cards, additional)
+        if missing <= 0:
+            return existing_flashcards
+
+        if existing_flashcards:
+            # Top-up: generate only the delta, steering the model away from
+            # the user's own cards (so it isn't shared through the cache)
+            flashcards = await self._metered(
+                db, material, user_id, "flashcards", missing,
+                lambda: self.generator.generate_flashcards(
+                    material.content_sections,
+                    num_cards=missing,
+                    exclude=[card.front for card in existing_flashcards]
+                )
+            )
+        else:
+            flashcards = await self._cached(
+                material.content,
+                "flashcards",
+                num_cards,
+                FlashcardSchema,
+                lambda: self._metered(
+                    db, material, user_id, "flashcards", num_cards,
+                    lambda: self.generator.generate_flashcards(
+                        material.content_sections,
+                        num_cards=num_cards
+                    )
+                )
+            )
+
+        # Cached items carry the IDs of whoever generated them first
+        for card in flashcards:
+            card.id = f"fc_{uuid4()}"
+            db.add(self._flashcard_row(card, material, user_id))
+
+        await db.commit()
+        return existing_flashcards + flashcards
+
+    async def _get_or_generate_questions(
+        self,
+        db: AsyncSession,
+        material: Material,
+        user_id: int,
+        num_questions: int,
+        additional: int
+    ) -> List[SingleQuestion]:
+        existing_questions = await self._existing_questions(db, material, user_id)
+        missing = self._missing(len(existing_questions), num_questions, additional)
+        if missing <= 0:
+            return existing_questions
+
+        if existing_questions:
+            questions = await self._metered(
+                db, material, user_id, "questions", missing,
+                lambda: self.generator.generate_questions(
+                    material.content_sections,
+                    num_questions=missing,
+                    exclude=[q.question for q in existing_questions]
+                )
+            )
+        else:
+            questions = await self._cached(
+                material.content,
+                "questions",
+                num_questions,
+                SingleQuestion,
+                lambda: self._metered(
+                    db, material, user_id, "questions", num_questions,
+                    lambda: self.generator.generate_questions(
+                        material.content_sections,
+                        num_questions=num_questions
+                    )
+                )
+            )
+
+        for q in questions:
+            q.id = f"q_{uuid4()}"
+            db.add(self._question_row(q, material, user_id))
+
+        await db.commit()
+        return existing_questions + questions
+
+    async def _get_or_generate_study_set(
+        self,
+        db: AsyncSession,
+        material: Material,
+        user_id: int,
+        num_cards: int,
+        num_questions: int
+    ) -> StudySet:
+        """
+        Produce both sets, asking the model for them in a single call when
+        neither is stored or cached, and store them in one transaction.
+        """
+        existing_flashcards = await self._existing_flashcards(db, material, user_id)
+        existing_questions = await self._existing_questions(db, material, user_id)
+
+        flashcards = existing_flashcards or await self._cache_get(
+            material.content, "flashcards", num_cards, FlashcardSchema
+        )
+        questions = existing_questions or await self._cache_get(
+            material.content, "questions", num_questions, SingleQuestion
+        )
+
+        if flashcards is None and questions is None:
+            study_set = await self._metered(
+                db, material, user_id, "study_set", num_cards + num_questions,
+                lambda: self.generator.generate_study_set(
+                    material.content_sections,
+                    num_cards=num_cards,
+                    num_questions=num_questions
+                )
+            )
+            flashcards, questions = study_set.flashcards, study_set.questions
+            # Cached under the single-kind keys so either endpoint can reuse them
+            await self._cache_set(material.content, "flashcards", num_cards, flashcards)
+            await self._cache_set(material.content, "questions", num_questions, questions)
+        elif flashcards is None:
+            flashcards = await self._cached(
+                material.content,
+                "flashcards",
+                num_cards,
+                FlashcardSchema,
+                lambda: self._metered(
+                    db, material, user_id, "flashcards", num_cards,
+                    lambda: self.generator.generate_flashcards(material.content_sections, num_cards=num_cards)
+                )
+            )
+        elif questions is None:
+            questions = await self._cached(
+                material.content,
+                "questions",
+                num_questions,
+                SingleQuestion,
+                lambda: self._metered(
+                    db, material, user_id, "questions", num_questions,
+                    lambda: self.generator.generate_questions(material.content_sections, num_questions=num_questions)
+                )
+            )
+
+        if not existing_flashcards:
+            for card in flashcards:
+                card.id = f"fc_{uuid4()}"
+                db.add(self._flashcard_row(card, material, user_id))
+        if not existing_questions:
+            for q in questions:
+                q.id = f"q_{uuid4()}"
+                db.add(self._question_row(q, material, user_id))
+
+        await db.commit()
+        return StudySet(flashcards=flashcards, questions=questions)
+
+    async def stream_flashcards(
+        self,
+        db: AsyncSession,
+        material: Material,
+        user_id: int,
+        num_cards: int = 20
+    ) -> AsyncIterator[FlashcardSchema]:
+        """
+        Yield the user's flashcards as they become available.
+
+        Each generated card is committed as soon as it is parsed from the
+        model's streamed output, so a dropped connection keeps whatever was
+        already delivered.
+        """
+        await self.content_store.load_content(db, material)
+        # Under the lock of the non-streaming path, so a concurrent generate
+        # call or a repeated stream finds these rows instead of adding its own
+        async with self.single_flight.lock(self._key(user_id, material, "flashcards")):
+            existing_flashcards = await self._existing_flashcards(db, material, user_id)
+            stream = self._stream_cached(
+                existing_flashcards,
+                material.content,
+                "flashcards",
+                num_cards,
+                FlashcardSchema,
+                lambda: self._metered_stream(
+                    db, material, user_id, "flashcards", num_cards,
+                    lambda: self.generator.stream_flashcards(material.content_sections, num_cards=num_cards)
+                )
+            )
+            async for card, is_new in stream:
+                if is_new:
+                    card.id = f"fc_{uuid4()}"
+                    db.add(self._flashcard_row(card, material, user_id))
+                    await db.commit()
+                yield card
+            # Token usage is recorded once the generation has finished
+            await db.commit()
+
+    async def stream_questions(
+        self,
+        db: AsyncSession,
+        material: Material,
+        user_id: int,
+        num_questions: int = 20
+    ) -> AsyncIterator[SingleQuestion]:
+        """Yield the user's questions as they become available, storing each one."""
+        await self.content_store.load_content(db, material)
+        async with self.single_flight.lock(self._key(user_id, material, "questions")):
+            existing_questions = await self._existing_questions(db, material, user_id)
+            stream = self._stream_cached(
+                existing_questions,
+                material.content,
+                "questions",
+                num_questions,
+                SingleQuestion,
+                lambda: self._metered_stream(
+                    db, material, user_id, "questions", num_questions,
+                    lambda: self.generator.stream_questions(material.content_sections, num_questions=num_questions)
+                )
+            )
+            async for q, is_new in stream:
+                if is_new:
+                    q.id = f"q_{uuid4()}"
+                    db.add(self._question_row(q, material, user_id))
+                    await db.commit()
+                yield q
+            await db.commit()
+
+    async def _existing_flashcards(
+        self,
+        db: AsyncSession,
+        material: Material,
+        user_id: int
+    ) -> List[FlashcardSchema]:
+        stmt = select(Flashcard).where(
+            Flashcard.material_id == material.id,
+            Flashcard.user_id == user_id
+        )
+        result = await db.execute(stmt)
+        return [
+            FlashcardSchema(
+                id=card.id,
+                front=card.front,
+                back=card.back
+            ) for card in result.scalars().all()
+        ]
+
+    async def _existing_questions(
+        self,
+        db: AsyncSession,
+        material: Material,
+        user_id: int
+    ) -> List[SingleQuestion]:
+        stmt = select(Question).where(
+            Question.material_id == material.id,
+            Question.user_id == user_id
+        )
+        result = await db.execute(stmt)
+        return [
+            SingleQuestion(
+                id=q.id,
+                category=q.category,
+                question=q.question_text,
+                options=q.options,
+                answer=q.answer,
+                explanation=q.explanation
+            ) for q in result.scalars().all()
+        ]
+
+    @staticmethod
+    def _key(user_id: int, material: Material, kind: str) -> str:
+        """Single-flight key of a user's items of one kind for a material."""
+        return f"{user_id}:{material.id}:{kind}"
+
+    @staticmethod
+    def _flight_key(key: str, *request: int) -> str:
+        """
+        Key of calls that share a result: only those asking for the same
+        items, so a top-up arriving mid-generation runs after it instead of
+        returning its items.
+        """
+        return ":".join([key, *map(str, request)])
+
+    @staticmethod
+    def _missing(existing: int, total: int, additional: int) -> int:
+        """Items to generate to reach `total`, or `additional` more than `existing`."""
+        if additional:
+            return additional
+        return total - existing
+
+    @staticmethod
+    def _flashcard_row(card: FlashcardSchema, material: Material, user_id: int) -> Flashcard:
+        return Flashcard(
+            id=card.id,
+            front=card.front,
+            back=card.back,
+            material_id=material.id,
+            user_id=user_id
+        )
+
+    @staticmethod
+    def _question_row(q: SingleQuestion, material: Material, user_id: int) -> Question:
+        return Question(
+            id=q.id,
+            question_text=q.question,
+            options=q.options,
+            answer=q.answer,
+            explanation=q.explanation,
+            category=q.category,
+            material_id=material.id,
+            user_id=user_id
+        )
+
+    async def _metered(
+        self,
+        db: AsyncSession,
+        material: Material,
+        user_id: int,
+        kind: str,
+        count: int,
+        generate: Callable[[], Awaitable[R]]
+    ) -> R:
+        """
+        Run an LLM generation against the user's token quota.
+
+        An estimate is reserved up front (failing with QuotaExceeded when
+        the bucket can't cover it) and settled against the actual usage,
+        which is added to the session as a TokenUsage row. When the
+        generation fails the row is committed on its own instead, so the
+        tokens it spent are still billed.
+        """
+        estimate = estimate_generation_tokens(material.content, count)
+        await self.quota.acquire(user_id, estimate)
+        with metered() as meter:
+            succeeded = False
+            try:
+                result = await generate()
+                succeeded = True
+                return result
+            finally:
+                await self._settle(db, material, user_id, kind, estimate, meter, succeeded)
+
+    async def _metered_stream(
+        self,
+        db: AsyncSession,
+        material: Material,
+        user_id: int,
+        kind: str,
+        count: int,
+        stream: Callable[[], AsyncIterator[T]]
+    ) -> AsyncIterator[T]:
+        """Streaming counterpart of `_metered`."""
+        estimate = estimate_generation_tokens(material.content, count)
+        await self.quota.acquire(user_id, estimate)
+        with metered() as meter:
+            succeeded = False
+            try:
+                async for item in stream():
+                    yield item
+                succeeded = True
+            finally:
+                # A stream given up by its client counts as failed too
+                await self._settle(db, material, user_id, kind, estimate, meter, succeeded)
+
+    async def _settle(
+        self,
+        db: AsyncSession,
+        material: Material,
+        user_id: int,
+        kind: str,
+        estimate: int,
+        meter: UsageMeter,
+        succeeded: bool
+    ) -> None:
+        await self.quota.adjust(user_id, meter.total_tokens - estimate)
+        if not meter.calls:
+            return
+        usage = TokenUsage(
+            user_id=user_id,
+            material_id=material.id,
+            kind=kind,
+            model=f"{settings.LLM_PROVIDER}/{settings.LLM_MODEL}",
+            prompt_tokens=meter.prompt_tokens,
+            completion_tokens=meter.completion_tokens,
+            llm_calls=meter.calls
+        )
+        if succeeded:
+            # Committed by the caller along with the generated items
+            db.add(usage)
+            return
+        # The caller's transaction won't be committed
+        async with AsyncSession(db.bind, expire_on_commit=False) as usage_db:
+            usage_db.add(usage)
+            await usage_db.commit()
+
+    async def _cached(
+        self,
+        content: str,
+        kind: str,
+        count: int,
+        schema: Type[T],
+        generate: Callable[[], Awaitable[List[T]]]
+    ) -> List[T]:
+        cached = await self._cache_get(content, kind, count, schema)
+        if cached is not None:
+            return cached
+
+        items = await generate()
+        await self._cache_set(content, kind, count, items)
+        return items
+
+    async def _cache_get(
+        self,
+        content: str,
+        kind: str,
+        count: int,
+        schema: Type[T]
+    ) -> Optional[List[T]]:
+        if not settings.GENERATION_CACHE_ENABLED:
+            return None
+        cached = await self.cache.get(self.cache.make_key(content, kind, count))
+        if cached is None:
+            return None
+        return [schema.model_validate(item) for item in cached]
+
+    async def _cache_set(self, content: str, kind: str, count: int, items: List[T]) -> None:
+        # Only complete generations are worth sharing; a short one would be
+        # served short to every later caller with the same text
+        if settings.GENERATION_CACHE_ENABLED and len(items) == count:
+            await self.cache.set(
+                self.cache.make_key(content, kind, count),
+                [item.model_dump() for item in items]
+            )
+
+    async def _stream_cached(
+        self,
+        existing: List[T],
+        content: str,
+        kind: str,
+        count: int,
+        schema: Type[T],
+        stream: Callable[[], AsyncIterator[T]]
+    ) -> AsyncIterator[Tuple[T, bool]]:
+        """Yield (item, is_new) pairs from existing rows, the cache or the model."""
+        if existing:
+            for item in existing:
+                yield item, False
+            return
+
+        key = self.cache.make_key(content, kind, count)
+        if settings.GENERATION_CACHE_ENABLED:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                for item in cached:
+                    yield schema.model_validate(item), True
+                return
+
+        generated = []
+        async for item in stream():
+            generated.append(item)
+            yield item, True
+
+        await self._cache_set(content, kind, count, generated)
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import os
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import redis.asyncio as redis
+from app.core.config import settings
+from app.services.ai_generator import PROMPT_VERSION
+
+class GenerationCache:
+    """
+    Content-addressed cache of generated flashcards and questions.
+
+    Entries are keyed on a hash of the normalized material text plus
+    everything else that shapes the output (kind, count, model and prompt
+    version), so identical uploads from different users share a single
+    generation. Redis is the primary tier; entries expire after
+    GENERATION_CACHE_TTL and the expiry is refreshed on every hit, which
+    makes Redis (configured with an LRU maxmemory policy) evict the least
+    recently used generations first. The optional disk tier is bounded by
+    GENERATION_CACHE_DISK_MAX_BYTES and evicts least recently used files.
+    """
+
+    STATS_KEY = "gencache:stats"
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None):
+        self.redis = redis_client or redis.from_url(settings.REDIS_URL)
+        self.ttl = settings.GENERATION_CACHE_TTL
+        self.disk_dir = Path(settings.GENERATION_CACHE_DIR) if settings.GENERATION_CACHE_DIR else None
+        self.disk_max_bytes = settings.GENERATION_CACHE_DISK_MAX_BYTES
+        # Process-local counters, kept even when Redis is unreachable
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, content: str, kind: str, count: int) -> str:
+        normalized = " ".join(content.split())
+        model = f"{settings.LLM_PROVIDER}/{settings.LLM_MODEL}"
+        digest = sha256(
+            f"{kind}\0{count}\0{model}\0{PROMPT_VERSION}\0{normalized}".encode()
+        ).hexdigest()
+        return f"gencache:{kind}:{digest}"
+
+    async def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        items = None
+        try:
+            value = await self.redis.get(key)
+            if value:
+                items = json.loads(value)
+                await self.redis.expire(key, self.ttl)
+        except redis.RedisError:
+            pass
+
+        if items is None and self.disk_dir:
+            items = await asyncio.to_thread(self._read_disk, key)
+            if items is not None:
+                await self._set_redis(key, items)
+
+        await self._count("hits" if items is not None else "misses")
+        return items
+
+    async def set(self, key: str, items: List[Dict[str, Any]]) -> None:
+        await self._set_redis(key, items)
+        if self.disk_dir:
+            await asyncio.to_thread(self._write_disk, key, items)
+
+    async def stats(self) -> Dict[str, int]:
+        """Fleet-wide hit/miss counters, falling back to this process's counts."""
+        try:
+            counters = await self.redis.hgetall(self.STATS_KEY)
+            hits = int(counters.get(b"hits", 0))
+            misses = int(counters.get(b"misses", 0))
+        except redis.RedisError:
+            hits, misses = self.hits, self.misses
+        return {"hits": hits, "misses": misses}
+
+    async def _count(self, field: str) -> None:
+        setattr(self, field, getattr(self, field) + 1)
+        try:
+            await self.redis.hincrby(self.STATS_KEY, field, 1)
+        except redis.RedisError:
+            pass
+
+    async def _set_redis(self, key: str, items: List[Dict[str, Any]]) -> None:
+        try:
+            await self.redis.setex(key, self.ttl, json.dumps(items))
+        except redis.RedisError:
+            pass
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f"{key.replace(':', '_')}.json"
+
+    def _read_disk(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        path = self._disk_path(key)
+        try:
+            items = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+        os.utime(path)  # mark as recently used for eviction
+        return items
+
+    def _write_disk(self, key: str, items: List[Dict[str, Any]]) -> None:
+        self.disk_dir.mkdir(parents=True, exist_ok=True)
+        path = self._disk_path(key)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(items))
+        tmp_path.replace(path)
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        entries = []
+        for path in self.disk_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.disk_max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
@@ -0,0 +1,159 @@
+import random
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+from uuid import uuid4
+import redis.asyncio as redis
+from app.core.config import settings
+from app.schemas.job import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, Job, JobState
+
+class JobFailed(Exception):
+    """Raised by a job handler to fail a job without retrying it."""
+
+class JobQueue:
+    """
+    Redis-backed priority queue of generation jobs.
+
+    Jobs are stored as JSON under `jobs:<id>`. Ready jobs sit in a sorted
+    set scored by priority and then enqueue time, so workers pop the most
+    urgent, oldest job first. Background-priority jobs use a sorted set of
+    their own, which workers only read from while they have background
+    capacity to spare. Failed attempts are parked in a third sorted set
+    scored by the time they become due again and are moved back onto their
+    queue by whichever worker dequeues next. Running jobs are tracked in a
+    fourth sorted set scored by a visibility deadline that the worker keeps
+    pushing back (`touch`) while it works; a job whose worker died misses
+    its deadline and is requeued the same way, counting as a failed attempt.
+    """
+
+    QUEUE_KEY = "jobs:queue"
+    BACKGROUND_QUEUE_KEY = "jobs:queue:background"
+    DELAYED_KEY = "jobs:delayed"
+    PROCESSING_KEY = "jobs:processing"
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None):
+        self.redis = redis_client or redis.from_url(settings.REDIS_URL)
+        self.ttl = settings.JOB_TTL
+        self.max_attempts = settings.JOB_MAX_ATTEMPTS
+        self.retry_backoff = settings.JOB_RETRY_BACKOFF
+        self.visibility_timeout = settings.JOB_VISIBILITY_TIMEOUT
+
+    def _job_key(self, job_id: str) -> str:
+        return f"jobs:{job_id}"
+
+    def _queue_key(self, job: Job) -> str:
+        if job.priority <= PRIORITY_BACKGROUND:
+            return self.BACKGROUND_QUEUE_KEY
+        return self.QUEUE_KEY
+
+    def _score(self, job: Job) -> float:
+        # Priority dominates; within a priority, earlier jobs come first
+        return -job.priority * 1e10 + job.created_at.timestamp()
+
+    async def enqueue(
+        self,
+        kind: str,
+        material_id: int,
+        user_id: int,
+        priority: int = PRIORITY_INTERACTIVE,
+        params: Optional[Dict[str, Any]] = None
+    ) -> Job:
+        job = Job(
+            id=f"job_{uuid4()}",
+            kind=kind,
+            material_id=material_id,
+            user_id=user_id,
+            priority=priority,
+            params=params or {}
+        )
+        await self._save(job)
+        await self.redis.zadd(self._queue_key(job), {job.id: self._score(job)})
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        data = await self.redis.get(self._job_key(job_id))
+        if not data:
+            return None
+        return Job.model_validate_json(data)
+
+    async def dequeue(
+        self,
+        timeout: float = 1.0,
+        include_background: bool = True
+    ) -> Optional[Job]:
+        """
+        Wait up to `timeout` seconds for the next ready job and mark it running.
+
+        Interactive jobs always win over background ones; with
+        `include_background=False` background jobs are left queued.
+        """
+        await self._promote_due()
+        await self._reclaim_stale()
+        keys = [self.QUEUE_KEY]
+        if include_background:
+            keys.append(self.BACKGROUND_QUEUE_KEY)
+        popped = await self.redis.bzpopmin(keys, timeout=timeout)
+        if not popped:
+            return None
+
+        job_id = popped[1].decode() if isinstance(popped[1], bytes) else popped[1]
+        await self.touch(job_id)
+        job = await self.get(job_id)
+        if job is None:
+            await self.redis.zrem(self.PROCESSING_KEY, job_id)
+            return None
+        job.state = JobState.RUNNING
+        job.attempts += 1
+        await self._save(job)
+        return job
+
+    async def touch(self, job_id: str) -> None:
+        """Push back the visibility deadline of a running job."""
+        await self.redis.zadd(self.PROCESSING_KEY, {job_id: time.time() + self.visibility_timeout})
+
+    async def complete(self, job: Job, result: Dict[str, Any]) -> None:
+        job.state = JobState.SUCCEEDED
+        job.result = result
+        job.error = None
+        await self._save(job)
+        await self.redis.zrem(self.PROCESSING_KEY, job.id)
+
+    async def fail(self, job: Job, error: str, retry: bool = True) -> None:
+        """Record a failed attempt, scheduling a retry with exponential backoff."""
+        await self._fail(job, error, retry)
+        await self.redis.zrem(self.PROCESSING_KEY, job.id)
+
+    async def _fail(self, job: Job, error: str, retry: bool = True) -> None:
+        job.error = error
+        if retry and job.attempts < self.max_attempts:
+            delay = self.retry_backoff * 2 ** (job.attempts - 1)
+            delay *= random.uniform(0.8, 1.2)
+            job.state = JobState.QUEUED
+            await self._save(job)
+            await self.redis.zadd(self.DELAYED_KEY, {job.id: time.time() + delay})
+        else:
+            job.state = JobState.FAILED
+            await self._save(job)
+
+    async def _promote_due(self) -> None:
+        due = await self.redis.zrangebyscore(self.DELAYED_KEY, 0, time.time())
+        for job_id in due:
+            # Only the worker that removes the entry re-queues it
+            if await self.redis.zrem(self.DELAYED_KEY, job_id):
+                job = await self.get(job_id.decode() if isinstance(job_id, bytes) else job_id)
+                if job is not None:
+                    await self.redis.zadd(self._queue_key(job), {job.id: self._score(job)})
+
+    async def _reclaim_stale(self) -> None:
+        """Requeue running jobs whose worker stopped sending heartbeats."""
+        stale = await self.redis.zrangebyscore(self.PROCESSING_KEY, 0, time.time())
+        for job_id in stale:
+            # Only the worker that removes the entry reclaims the job
+            if await self.redis.zrem(self.PROCESSING_KEY, job_id):
+                job = await self.get(job_id.decode() if isinstance(job_id, bytes) else job_id)
+                if job is not None and job.state == JobState.RUNNING:
+                    await self._fail(job, "Worker stopped while running the job")
+
+    async def _save(self, job: Job) -> None:
+        job.updated_at = datetime.utcnow()
+        await self.redis.set(self._job_key(job.id), job.model_dump_json(), ex=self.ttl)
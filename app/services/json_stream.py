@@ -0,0 +1,72 @@
+import json
+import re
+from typing import Any, Dict, List
+
+class JSONArrayItemParser:
+    """
+    Incrementally extract the items of one array from a JSON document that
+    arrives in pieces, e.g. `{"flashcards": [{...}, {...}]}` streamed by the
+    model token by token.
+
+    `feed` returns every object of the array that was completed by the new
+    text, so callers can act on each item long before the document ends.
+    """
+
+    def __init__(self, key: str):
+        self._key_pattern = re.compile(rf'"{re.escape(key)}"\s*:\s*\[')
+        self._buffer = ""
+        self._pos = 0
+        self._in_array = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._item_start = None
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        self._buffer += text
+        items = []
+        if self._done:
+            return items
+
+        if not self._in_array:
+            match = self._key_pattern.search(self._buffer)
+            if not match:
+                return items
+            self._in_array = True
+            self._pos = match.end()
+
+        buffer = self._buffer
+        for index in range(self._pos, len(buffer)):
+            char = buffer[index]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0:
+                    self._item_start = index
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    # Closing bracket of the array itself
+                    self._done = True
+                    break
+                self._depth -= 1
+                if self._depth == 0:
+                    items.append(json.loads(buffer[self._item_start:index + 1]))
+                    self._item_start = None
+
+        # Drop text that can no longer be part of an item
+        if self._item_start is None:
+            self._buffer = ""
+        else:
+            self._buffer = buffer[self._item_start:]
+            self._item_start = 0
+        self._pos = len(self._buffer)
+        return items
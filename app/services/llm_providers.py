@@ -0,0 +1,268 @@
+import asyncio
+import json
+import re
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Type, TypeVar
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from pydantic import BaseModel
+from app.core.config import settings
+from app.services.usage import record_usage
+from app.utils.text import estimate_tokens
+
+M = TypeVar("M", bound=BaseModel)
+
+class LLMProvider(ABC):
+    """
+    A backend that answers structured-output chat requests.
+
+    `parse` returns the whole response validated against `response_format`;
+    `stream` yields the raw JSON text of the response as it is produced.
+    """
+
+    name: str
+    model: str
+
+    @abstractmethod
+    async def parse(
+        self,
+        messages: List[dict],
+        response_format: Type[M],
+        timeout: Optional[float] = None
+    ) -> M:
+        ...
+
+    @abstractmethod
+    def stream(
+        self,
+        messages: List[dict],
+        response_format: Type[BaseModel],
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        ...
+
+    async def close(self) -> None:
+        pass
+
+    _call_limit: Optional[asyncio.Semaphore] = None
+
+    @property
+    def call_limit(self) -> asyncio.Semaphore:
+        """Caps the calls in flight through this provider (`LLM_MAX_CONCURRENCY`)."""
+        if self._call_limit is None:
+            self._call_limit = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        return self._call_limit
+
+_registry: Dict[str, Callable[[], LLMProvider]] = {}
+
+def register_provider(name: str):
+    """Class or factory decorator adding a provider under `name` (the `LLM_PROVIDER` value)."""
+    def decorator(factory):
+        _registry[name] = factory
+        return factory
+    return decorator
+
+def create_provider(name: Optional[str] = None) -> LLMProvider:
+    name = name or settings.LLM_PROVIDER
+    if name not in _registry:
+        raise ValueError(
+            f"Unknown LLM provider '{name}'. Available: {', '.join(sorted(_registry))}"
+        )
+    return _registry[name]()
+
+class OpenAICompatibleProvider(LLMProvider):
+    """Any API speaking the OpenAI chat completions protocol, e.g. Gemini's."""
+
+    name = "openai-compatible"
+
+    def __init__(self, client: AsyncOpenAI, model: str):
+        self.client = client
+        self.model = model
+
+    async def parse(
+        self,
+        messages: List[dict],
+        response_format: Type[M],
+        timeout: Optional[float] = None
+    ) -> M:
+        completion = await self.client.beta.chat.completions.parse(
+            model=self.model,
+            messages=messages,
+            response_format=response_format,
+            timeout=timeout or settings.LLM_REQUEST_TIMEOUT,
+        )
+        if completion.usage is not None:
+            record_usage(completion.usage.prompt_tokens, completion.usage.completion_tokens)
+        return completion.choices[0].message.parsed
+
+    async def stream(
+        self,
+        messages: List[dict],
+        response_format: Type[BaseModel],
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        async with self.client.beta.chat.completions.stream(
+            model=self.model,
+            messages=messages,
+            response_format=response_format,
+            timeout=timeout or settings.LLM_REQUEST_TIMEOUT,
+            stream_options={"include_usage": True},
+        ) as stream:
+            output = []
+            async for event in stream:
+                if event.type == "content.delta":
+                    output.append(event.delta)
+                    yield event.delta
+                elif event.type == "chunk" and event.chunk.usage is not None:
+                    usage = event.chunk.usage
+                    record_usage(usage.prompt_tokens, usage.completion_tokens)
+                    output = None
+            if output is not None:
+                # The upstream didn't report usage for the stream
+                record_usage(
+                    sum(estimate_tokens(m["content"]) for m in messages),
+                    estimate_tokens("".join(output))
+                )
+
+    async def close(self) -> None:
+        await self.client.close()
+
+@register_provider("gemini")
+def gemini_provider() -> OpenAICompatibleProvider:
+    """
+    Gemini through its OpenAI-compatible endpoint.
+
+    The client owns a single pooled HTTP connection pool, so every
+    generator in the process reuses the same keep-alive connections.
+    """
+    if not settings.GEMINI_API_KEY:
+        raise ValueError("GEMINI_API_KEY must be set to use the gemini provider")
+    client = AsyncOpenAI(
+        api_key=settings.GEMINI_API_KEY,
+        base_url=settings.GEMINI_BASE_URL,
+        # Retries are handled by the resilience layer
+        max_retries=0,
+        timeout=httpx.Timeout(
+            settings.LLM_REQUEST_TIMEOUT,
+            connect=settings.LLM_CONNECT_TIMEOUT
+        ),
+        http_client=DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_MAX_CONNECTIONS
+            )
+        )
+    )
+    return OpenAICompatibleProvider(client, settings.LLM_MODEL)
+
+def _count(prompt: str, noun: str) -> int:
+    match = re.search(rf"(\d+) {noun}", prompt)
+    return int(match.group(1)) if match else 0
+
+def _snippet(content: str, index: int) -> str:
+    words = content.split()
+    if not words:
+        return "the material"
+    # Start mid-chunk: overlapping chunks share their first words
+    start = (len(words) // 2 + index * 7) % len(words)
+    return " ".join(words[start:start + 6])
+
+def build_stub_payload(prompt: str, content: str, fields: Iterable[str]) -> dict:
+    """
+    Deterministic response document for the requested top-level fields.
+
+    Item counts are read from the prompt ("Generate 20 flashcards ...") and
+    the text of every item is derived from the content, so identical
+    requests always get identical answers.
+    """
+    fields = set(fields)
+    # Items listed as already covered shift the numbering, so top-ups
+    # come back as new items
+    content, _, covered = content.partition("\n\nAlready covered")
+    first = len(re.findall(r"^- ", covered, flags=re.M))
+    payload = {}
+    if "flashcards" in fields:
+        payload["flashcards"] = [
+            {
+                "id": str(i),
+                "front": f"({i}) What does the material say about {_snippet(content, i)}?",
+                "back": f"It explains {_snippet(content, i + 1)}."
+            }
+            for i in range(first, first + _count(prompt, "flashcards"))
+        ]
+    if "questions" in fields:
+        payload["questions"] = [
+            {
+                "id": str(i),
+                "category": f"Topic {i % 4}",
+                "question": f"({i}) Which statement matches {_snippet(content, i)}?",
+                "options": ["Option A", "Option B", "Option C", "Option D"],
+                "answer": "Option A",
+                "explanation": f"The material states {_snippet(content, i + 1)}."
+            }
+            for i in range(first, first + _count(prompt, "questions"))
+        ]
+    return payload
+
+@register_provider("stub")
+class StubProvider(LLMProvider):
+    """
+    Offline provider for load tests and local development.
+
+    Answers instantly (or after `LLM_STUB_LATENCY` seconds) with
+    schema-valid, deterministic items built from the prompt and content,
+    without any network access.
+    """
+
+    name = "stub"
+    model = "stub"
+
+    def __init__(self, latency: Optional[float] = None):
+        self.latency = latency if latency is not None else settings.LLM_STUB_LATENCY
+
+    def _answer(self, messages: List[dict], response_format: Type[BaseModel]) -> str:
+        prompt = " ".join(m["content"] for m in messages if m["role"] == "system")
+        content = " ".join(m["content"] for m in messages if m["role"] == "user")
+        return json.dumps(build_stub_payload(prompt, content, response_format.model_fields))
+
+    async def parse(
+        self,
+        messages: List[dict],
+        response_format: Type[M],
+        timeout: Optional[float] = None
+    ) -> M:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        text = self._answer(messages, response_format)
+        record_usage(sum(estimate_tokens(m["content"]) for m in messages), estimate_tokens(text))
+        return response_format.model_validate_json(text)
+
+    async def stream(
+        self,
+        messages: List[dict],
+        response_format: Type[BaseModel],
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        text = self._answer(messages, response_format)
+        record_usage(sum(estimate_tokens(m["content"]) for m in messages), estimate_tokens(text))
+        pieces = [text[i:i + 40] for i in range(0, len(text), 40)]
+        for piece in pieces:
+            if self.latency:
+                await asyncio.sleep(self.latency / len(pieces))
+            yield piece
+
+_provider: Optional[LLMProvider] = None
+
+def get_llm_provider() -> LLMProvider:
+    """Return the process-wide provider selected by `LLM_PROVIDER`."""
+    global _provider
+    if _provider is None:
+        _provider = create_provider()
+    return _provider
+
+async def close_llm_provider() -> None:
+    """Close the shared provider and its connections (called on shutdown)."""
+    global _provider
+    if _provider is not None:
+        await _provider.close()
+        _provider = None
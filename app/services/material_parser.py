@@ -1,42 +1,27 @@
 from typing import Optional
-from PyPDF2 import PdfReader
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api.formatters import TextFormatter
 from fastapi import UploadFile, HTTPException
-import re
-from io import BytesIO
+from app.services.pdf_service import PDFService
+from app.services.youtube_service import create_transcript_provider, extract_video_id
 
 class MaterialParser:
     @staticmethod
     async def parse_pdf(file: UploadFile) -> str:
+        # Same extractor as the upload endpoints, with HTTP errors
         try:
-            content = await file.read()
-            pdf = PdfReader(BytesIO(content))
-            text = ""
-            for page in pdf.pages:
-                text += page.extract_text() + "\n"
-            return text.strip()
-        except Exception as e:
+            return await PDFService().extract_text(file)
+        except ValueError as e:
             raise HTTPException(
                 status_code=400,
-                detail=f"Error parsing PDF: {str(e)}"
+                detail=str(e)
             )
 
     @staticmethod
     def parse_youtube_url(url: str) -> str:
+        # Blocking fetch without the cache; the endpoints use YouTubeService
         try:
-            # Extract video ID from URL
-            video_id = re.findall(
-                r'(?:v=|\/)([0-9A-Za-z_-]{11}).*',
-                url
-            )[0]
-            
-            transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
-            formatter = TextFormatter()
-            text = formatter.format_transcript(transcript_list)
-            return text.strip()
+            return create_transcript_provider().fetch(extract_video_id(url))
         except Exception as e:
             raise HTTPException(
                 status_code=400,
                 detail=f"Error extracting YouTube transcript: {str(e)}"
-            ) 
\ No newline at end of file
+            )
@@ -0,0 +1,158 @@
+import importlib.util
+from abc import ABC, abstractmethod
+import re
+import unicodedata
+from contextlib import contextmanager
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Type
+from app.core.config import settings
+
+# Fastest first; PyPDF2 is pure Python and always installed
+PREFERENCE = ("pdfium", "pymupdf", "pypdf2")
+
+# Control and invisible formatting characters (soft hyphens, zero-width
+# spaces, byte order marks, pdfium's line-break markers), except \t and \n
+_INVISIBLE = re.compile(
+    "[\x00-\x08\x0b-\x1f\x7f-\x9f\u00ad\u200b-\u200f\u2028-\u202e\u2060-\u2064\ufeff\ufffe\uffff]"
+)
+
+def normalize_page_text(text: str) -> str:
+    """
+    Canonical form of a page's text, so every backend gives the same
+    result: compatibility characters (ligatures, non-breaking spaces)
+    folded, control characters dropped, line endings unified and runs of
+    whitespace within a line collapsed.
+    """
+    text = unicodedata.normalize("NFKC", text).replace("\r\n", "\n").replace("\r", "\n")
+    text = _INVISIBLE.sub("", text)
+    return "\n".join(" ".join(line.split()) for line in text.split("\n")).strip()
+
+class PDFBackend(ABC):
+    """
+    A library that reads the text layer of PDF pages.
+
+    Subclasses open a document and return the raw text of one page;
+    `iter_pages` normalizes it so all backends agree on the output.
+    """
+
+    name: str
+    module: str  # import name, used to detect whether the library is installed
+
+    @classmethod
+    def available(cls) -> bool:
+        return importlib.util.find_spec(cls.module) is not None
+
+    @abstractmethod
+    def open(self, path: str) -> ContextManager[Any]:
+        ...
+
+    @abstractmethod
+    def page_count(self, document: Any) -> int:
+        ...
+
+    @abstractmethod
+    def page_text(self, document: Any, index: int) -> Optional[str]:
+        ...
+
+    def iter_pages(self, document: Any, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+        """Text of pages [start, stop) in order; pages without a text layer give ""."""
+        total = self.page_count(document)
+        stop = total if stop is None else min(stop, total)
+        for index in range(start, stop):
+            yield normalize_page_text(self.page_text(document, index) or "")
+
+_backends: Dict[str, Type[PDFBackend]] = {}
+
+def register_backend(cls: Type[PDFBackend]) -> Type[PDFBackend]:
+    _backends[cls.name] = cls
+    return cls
+
+@register_backend
+class PdfiumBackend(PDFBackend):
+    """PDFium, Chrome's PDF engine, through pypdfium2."""
+
+    name = "pdfium"
+    module = "pypdfium2"
+
+    @contextmanager
+    def open(self, path: str) -> Iterator[Any]:
+        import pypdfium2
+        document = pypdfium2.PdfDocument(path)
+        try:
+            yield document
+        finally:
+            document.close()
+
+    def page_count(self, document: Any) -> int:
+        return len(document)
+
+    def page_text(self, document: Any, index: int) -> Optional[str]:
+        page = document[index]
+        textpage = page.get_textpage()
+        try:
+            return textpage.get_text_range()
+        finally:
+            textpage.close()
+            page.close()
+
+@register_backend
+class PyMuPDFBackend(PDFBackend):
+    """MuPDF through PyMuPDF."""
+
+    name = "pymupdf"
+    module = "pymupdf"
+
+    @contextmanager
+    def open(self, path: str) -> Iterator[Any]:
+        import pymupdf
+        document = pymupdf.open(path)
+        try:
+            yield document
+        finally:
+            document.close()
+
+    def page_count(self, document: Any) -> int:
+        return document.page_count
+
+    def page_text(self, document: Any, index: int) -> Optional[str]:
+        import pymupdf
+        # MuPDF drops text running off the page by default; the others keep it
+        return document[index].get_text("text", clip=pymupdf.INFINITE_RECT())
+
+@register_backend
+class PyPDF2Backend(PDFBackend):
+    """Pure-Python fallback."""
+
+    name = "pypdf2"
+    module = "PyPDF2"
+
+    @contextmanager
+    def open(self, path: str) -> Iterator[Any]:
+        from PyPDF2 import PdfReader
+        with open(path, "rb") as pdf:
+            yield PdfReader(pdf)
+
+    def page_count(self, document: Any) -> int:
+        return len(document.pages)
+
+    def page_text(self, document: Any, index: int) -> Optional[str]:
+        return document.pages[index].extract_text()
+
+def available_backends() -> List[str]:
+    """Installed backends, fastest first."""
+    return [name for name in PREFERENCE if _backends[name].available()]
+
+def create_backend(name: Optional[str] = None) -> PDFBackend:
+    """
+    The backend called `name` (default PDF_EXTRACTION_BACKEND), or the
+    fastest installed one when neither is set.
+    """
+    name = name or settings.PDF_EXTRACTION_BACKEND
+    if name is None:
+        return _backends[available_backends()[0]]()
+    if name not in _backends:
+        raise ValueError(
+            f"Unknown PDF backend '{name}'. Available: {', '.join(sorted(_backends))}"
+        )
+    if not _backends[name].available():
+        raise ValueError(f"PDF backend '{name}' needs the {_backends[name].module} package")
+    return _backends[name]()
@@ -1,36 +1,215 @@
-from typing import Optional
-from PyPDF2 import PdfReader
+import asyncio
+import multiprocessing
+import os
+import shutil
+import tempfile
+from hashlib import sha256
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, List, Optional, Tuple
 from fastapi import UploadFile
-from io import BytesIO
+from app.core.config import settings
+from app.services.pdf_backends import create_backend
+
+def _extract_range(backend: str, path: str, start: int, stop: int) -> Tuple[int, List[str]]:
+    """Runs in a pool worker: the page count and the text of pages [start, stop)."""
+    extractor = create_backend(backend)
+    with extractor.open(path) as document:
+        return extractor.page_count(document), list(extractor.iter_pages(document, start, stop))
+
+class ExtractionPool:
+    """
+    Bounded process pool for CPU-bound PDF parsing.
+
+    Workers are spawned on first use. A worker stuck on a pathological
+    document can't be interrupted, so `kill` terminates every worker and
+    the next call starts a fresh pool; extractions that were sharing the
+    killed pool see `generation` change and can retry.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or settings.PDF_EXTRACTION_WORKERS or os.cpu_count() or 1
+        self.generation = 0
+        # Documents in flight; more would queue inside the executor and
+        # spend their timeout waiting for a worker
+        self.slots = asyncio.Semaphore(self.workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                # Forking a process that runs an event loop and DB threads is unsafe
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+
+    def kill(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        self.generation += 1
+        for process in list((executor._processes or {}).values()):
+            process.terminate()
+        # Queued work fails with BrokenProcessPool rather than being cancelled
+        executor.shutdown(wait=False)
+
+    def shutdown(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+_pool: Optional[ExtractionPool] = None
+
+def get_extraction_pool() -> ExtractionPool:
+    """Return the process-wide extraction pool."""
+    global _pool
+    if _pool is None:
+        _pool = ExtractionPool()
+    return _pool
+
+def close_extraction_pool() -> None:
+    """Stop the pool's worker processes (called on shutdown)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
 
 class PDFService:
+    """
+    Extracts PDF text in worker processes, off the event loop.
+
+    Documents longer than PDF_PAGES_PER_TASK pages are split into page
+    ranges extracted in parallel and reassembled in order. A document
+    taking longer than PDF_EXTRACTION_TIMEOUT is abandoned and the workers
+    parsing it are killed. Text is read by the backend named by
+    PDF_EXTRACTION_BACKEND, or the fastest installed one.
+    """
+
+    def __init__(
+        self,
+        pool: Optional[ExtractionPool] = None,
+        pages_per_task: Optional[int] = None,
+        timeout: Optional[float] = None,
+        backend: Optional[str] = None
+    ):
+        self._pool = pool
+        # Resolved here so a missing library fails at startup, not per upload
+        self.backend = create_backend(backend).name
+        self.pages_per_task = pages_per_task or settings.PDF_PAGES_PER_TASK
+        self.timeout = timeout or settings.PDF_EXTRACTION_TIMEOUT
+
+    @property
+    def pool(self) -> ExtractionPool:
+        return self._pool or get_extraction_pool()
+
+    async def hash_upload(self, file: UploadFile) -> str:
+        """SHA-256 of the uploaded file, streamed from its spooled copy in chunks."""
+        return await asyncio.to_thread(self._hash, file)
+
+    @staticmethod
+    def _hash(file: UploadFile) -> str:
+        file.file.seek(0)
+        digest = sha256()
+        for chunk in iter(lambda: file.file.read(1024 * 1024), b""):
+            digest.update(chunk)
+        return digest.hexdigest()
+
     async def extract_text(self, file: UploadFile) -> Optional[str]:
         """
         Extract text from a PDF file.
-        
+
         Args:
             file: UploadFile object containing the PDF
-            
+
         Returns:
             str: Extracted text from the PDF
-            
+
         Raises:
             ValueError: If file is not a valid PDF
         """
+        return "\n".join([page async for page in self.iter_pages(file)]).strip()
+
+    async def extract_pages(self, file: UploadFile) -> List[str]:
+        """
+        Extract the text of each page of a PDF file.
+
+        Raises:
+            ValueError: If file is not a valid PDF or extraction times out
+        """
+        return [page async for page in self.iter_pages(file)]
+
+    async def iter_pages(self, file: UploadFile) -> AsyncIterator[str]:
+        """
+        Yield the text of each page of a PDF file in order, as soon as the
+        range it belongs to has been extracted.
+
+        Raises:
+            ValueError: If file is not a valid PDF or extraction times out
+        """
+        path = await asyncio.to_thread(self._spill, file)
+        try:
+            yielded = 0
+            while True:
+                pool = self.pool
+                async with pool.slots:
+                    generation = pool.generation
+                    deadline = asyncio.get_running_loop().time() + self.timeout
+                    try:
+                        async for page in self._iter_ranges(pool, path, yielded, deadline):
+                            yielded += 1
+                            yield page
+                        return
+                    except asyncio.TimeoutError:
+                        pool.kill()
+                        raise ValueError(f"Error processing PDF: extraction took longer than {self.timeout:g}s")
+                    except BrokenProcessPool:
+                        if pool.generation == generation:
+                            pool.kill()
+                            raise ValueError("Error processing PDF: the extraction worker crashed")
+                    except Exception as e:
+                        raise ValueError(f"Error processing PDF: {str(e)}")
+                # The pool was killed for another document's timeout; carry
+                # on from the first page not yet yielded
+        finally:
+            os.unlink(path)
+
+    @staticmethod
+    def _spill(file: UploadFile) -> str:
+        # Workers open the document by path. The upload's spooled file has
+        # no name, so copy it to one in chunks rather than through memory
+        file.file.seek(0)
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as spilled:
+            shutil.copyfileobj(file.file, spilled)
+        return spilled.name
+
+    async def _iter_ranges(
+        self,
+        pool: ExtractionPool,
+        path: str,
+        start: int,
+        deadline: float
+    ) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        step = self.pages_per_task
+        # The first range also reports the page count for the rest
+        total, pages = await asyncio.wait_for(
+            pool.run(_extract_range, self.backend, path, start, start + step), deadline - loop.time()
+        )
+        rest = [
+            asyncio.ensure_future(pool.run(_extract_range, self.backend, path, begin, begin + step))
+            for begin in range(start + step, total, step)
+        ]
         try:
-            # Read the uploaded file into memory
-            content = await file.read()
-            pdf_file = BytesIO(content)
-            
-            # Create PDF reader object
-            reader = PdfReader(pdf_file)
-            
-            # Extract text from all pages
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-            
-            return text.strip()
-            
-        except Exception as e:
-            raise ValueError(f"Error processing PDF: {str(e)}") 
\ No newline at end of file
+            for page in pages:
+                yield page
+            for task in rest:
+                _, pages = await asyncio.wait_for(task, deadline - loop.time())
+                for page in pages:
+                    yield page
+        finally:
+            for task in rest:
+                task.cancel()
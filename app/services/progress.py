@@ -3,10 +3,10 @@ from typing import List, Optional, Dict
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
+from sqlalchemy.dialects.sqlite import insert
 from app.models.progress import Progress
 from app.models.material import Material
 from app.models.question import Question
-from app.models.flashcard import Flashcard
 from app.schemas.progress import (
     ProgressStats, CategoryProgress, WeakAreasResponse,
     MaterialProgress, MaterialProgressList
@@ -45,13 +45,7 @@ class ProgressService:
         # Verify material exists and user has access
         await self._verify_material_access(db, material_id, user_id)
 
-        progress = await self.get_progress(db, user_id, material_id)
-        if not progress:
-            progress = Progress(
-                user_id=user_id,
-                material_id=material_id
-            )
-            db.add(progress)
+        progress = await self._get_or_create_progress(db, material_id, user_id)
 
         try:
             if is_flashcard:
@@ -150,24 +144,10 @@ class ProgressService:
         # Get progress record
         progress = await self._get_or_create_progress(db, material_id, user_id)
         
-        # Get question stats
-        questions_query = select(func.count(Question.id)).where(
-            Question.material_id == material_id,
-            Question.user_id == user_id
-        )
-        total_questions = await db.scalar(questions_query)
-        
-        # Get flashcard stats
-        flashcards_query = select(func.count(Flashcard.id)).where(
-            Flashcard.material_id == material_id,
-            Flashcard.user_id == user_id
-        )
-        total_flashcards = await db.scalar(flashcards_query)
-        
         return ProgressStats(
-            total_questions=total_questions,
+            total_questions=material.num_questions,
             questions_attempted=len(progress.question_scores),
-            total_flashcards=total_flashcards,
+            total_flashcards=material.num_flashcards,
             flashcards_reviewed=len(progress.flashcard_scores),
             overall_mastery=progress.overall_mastery,
             last_reviewed=progress.last_reviewed,
@@ -249,18 +229,24 @@ class ProgressService:
     ) -> Progress:
         progress = await self.get_progress(db, user_id, material_id)
         if not progress:
-            progress = Progress(
-                user_id=user_id,
-                material_id=material_id,
-                flashcard_scores={},
-                question_scores={},
-                overall_mastery=0.0,
-                last_reviewed=datetime.utcnow(),
-                next_review=datetime.utcnow()
+            # Concurrent first visits race here; the unique (user_id,
+            # material_id) index lets exactly one insert through and the
+            # others read back its row
+            await db.execute(
+                insert(Progress)
+                .values(
+                    user_id=user_id,
+                    material_id=material_id,
+                    flashcard_scores={},
+                    question_scores={},
+                    overall_mastery=0.0,
+                    last_reviewed=datetime.utcnow(),
+                    next_review=datetime.utcnow()
+                )
+                .on_conflict_do_nothing(index_elements=["user_id", "material_id"])
             )
-            db.add(progress)
             await db.commit()
-            await db.refresh(progress)
+            progress = await self.get_progress(db, user_id, material_id)
         return progress
 
     def _get_lowest_scoring_questions(
@@ -300,19 +286,6 @@ class ProgressService:
             # Get progress record
             progress = await self._get_or_create_progress(db, material.id, user_id)
             
-            # Count questions and flashcards
-            questions_query = select(func.count(Question.id)).where(
-                Question.material_id == material.id,
-                Question.user_id == user_id
-            )
-            questions_completed = await db.scalar(questions_query)
-            
-            flashcards_query = select(func.count(Flashcard.id)).where(
-                Flashcard.material_id == material.id,
-                Flashcard.user_id == user_id
-            )
-            flashcards_reviewed = await db.scalar(flashcards_query)
-            
             # Count weak areas (categories with mastery < 0.7)
             weak_areas = len([
                 cat for cat in set(q.category for q in material.questions)
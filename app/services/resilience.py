@@ -0,0 +1,262 @@
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+import openai
+from app.core.config import settings
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the upstream while the circuit is open."""
+
+def is_transient(error: BaseException) -> bool:
+    """Rate limits, 5xx responses, timeouts and connection errors."""
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+class CircuitBreaker:
+    """
+    Fails fast while the upstream is unhealthy.
+
+    After `failure_threshold` consecutive transient failures the circuit
+    opens and calls are rejected for `reset_timeout` seconds. It then goes
+    half-open and lets a single trial call through: success closes the
+    circuit, failure opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: Optional[int] = None,
+        reset_timeout: Optional[float] = None
+    ):
+        self.failure_threshold = failure_threshold or settings.LLM_BREAKER_FAILURE_THRESHOLD
+        self.reset_timeout = reset_timeout or settings.LLM_BREAKER_RESET_TIMEOUT
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self.transitions: Dict[str, int] = {CLOSED: 0, OPEN: 0, HALF_OPEN: 0}
+
+    def allow(self) -> None:
+        """Raise CircuitOpenError unless a call may go ahead now."""
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError("LLM upstream unavailable, try again later")
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._trial_in_flight:
+                raise CircuitOpenError("LLM upstream unavailable, try again later")
+            self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        self._trial_in_flight = False
+        self.consecutive_failures = 0
+        if self.state != CLOSED:
+            self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        self._trial_in_flight = False
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            if self.state != OPEN:
+                self._transition(OPEN)
+
+    def release(self) -> None:
+        """Give back a half-open trial slot without an outcome (e.g. cancelled)."""
+        self._trial_in_flight = False
+
+    def _transition(self, state: str) -> None:
+        self.state = state
+        self.transitions[state] += 1
+
+class Resilience:
+    """
+    Retries, hedging and circuit breaking around calls to the LLM API.
+
+    Transient failures (429, 5xx, timeouts) are retried up to
+    `max_attempts` times with full-jitter exponential backoff, honouring
+    `Retry-After` when the upstream sends one. With `hedge_percentile`
+    set, an attempt that is slower than that percentile of recent
+    successful calls gets a duplicate request, and whichever finishes first
+    wins. Every transient failure is reported to the circuit breaker.
+    """
+
+    def __init__(
+        self,
+        breaker: Optional[CircuitBreaker] = None,
+        max_attempts: Optional[int] = None,
+        backoff: Optional[float] = None,
+        max_backoff: Optional[float] = None,
+        hedge_percentile: Optional[float] = None,
+        hedge_min_samples: int = 20
+    ):
+        self.breaker = breaker or CircuitBreaker()
+        self.max_attempts = max_attempts or settings.LLM_RETRY_ATTEMPTS
+        self.backoff = backoff if backoff is not None else settings.LLM_RETRY_BACKOFF
+        self.max_backoff = max_backoff if max_backoff is not None else settings.LLM_RETRY_MAX_BACKOFF
+        self.hedge_percentile = (
+            hedge_percentile if hedge_percentile is not None else settings.LLM_HEDGE_PERCENTILE
+        )
+        self.hedge_min_samples = hedge_min_samples
+        self._latencies: Deque[float] = deque(maxlen=500)
+        self.counters: Dict[str, int] = {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "retries": 0,
+            "rejected": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+        }
+        # Calls admitted while the breaker was in each state
+        self.calls_by_state: Dict[str, int] = {CLOSED: 0, HALF_OPEN: 0}
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run `fn` (a factory for the upstream call) with retries and hedging."""
+        self.counters["calls"] += 1
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                self.breaker.allow()
+            except CircuitOpenError:
+                self.counters["rejected"] += 1
+                raise
+            self.calls_by_state[self.breaker.state] += 1
+
+            try:
+                result = await self._attempt(fn, hedge=self.breaker.state == CLOSED)
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                if not is_transient(e):
+                    # The upstream answered; the request itself was at fault
+                    self.breaker.record_success()
+                    self.counters["failures"] += 1
+                    raise
+                self.breaker.record_failure()
+                if attempt >= self.max_attempts or self.breaker.state == OPEN:
+                    self.counters["failures"] += 1
+                    raise
+                self.counters["retries"] += 1
+                await asyncio.sleep(self._delay(attempt, e))
+            else:
+                self.breaker.record_success()
+                self.counters["successes"] += 1
+                return result
+
+    @asynccontextmanager
+    async def guard(self) -> AsyncIterator[None]:
+        """
+        Circuit breaking only, for calls that cannot be retried or hedged
+        (e.g. streams that have already handed items to the caller).
+        """
+        self.counters["calls"] += 1
+        try:
+            self.breaker.allow()
+        except CircuitOpenError:
+            self.counters["rejected"] += 1
+            raise
+        self.calls_by_state[self.breaker.state] += 1
+        try:
+            yield
+        except (asyncio.CancelledError, GeneratorExit):
+            self.breaker.release()
+            raise
+        except Exception as e:
+            self.counters["failures"] += 1
+            if is_transient(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        else:
+            self.counters["successes"] += 1
+            self.breaker.record_success()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "transitions": dict(self.breaker.transitions),
+            "calls_by_state": dict(self.calls_by_state),
+            "hedge_delay": self._hedge_delay(),
+            **self.counters,
+        }
+
+    async def _attempt(self, fn: Callable[[], Awaitable[T]], hedge: bool) -> T:
+        delay = self._hedge_delay() if hedge else None
+        started = time.monotonic()
+        if delay is None:
+            result = await fn()
+            self._latencies.append(time.monotonic() - started)
+            return result
+
+        primary = asyncio.ensure_future(fn())
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            result = primary.result()
+            self._latencies.append(time.monotonic() - started)
+            return result
+
+        self.counters["hedged"] += 1
+        backup = asyncio.ensure_future(fn())
+        pending = {primary, backup}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self.counters["hedge_wins"] += 1
+                        self._latencies.append(time.monotonic() - started)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge_percentile or len(self._latencies) < self.hedge_min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile / 100))
+        return ordered[index]
+
+    def _delay(self, attempt: int, error: BaseException) -> float:
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+
+_resilience: Optional[Resilience] = None
+
+def get_llm_resilience() -> Resilience:
+    """Return the process-wide resilience layer shared by every generator."""
+    global _resilience
+    if _resilience is None:
+        _resilience = Resilience()
+    return _resilience
@@ -0,0 +1,139 @@
+import asyncio
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence
+from uuid import uuid4
+import redis.asyncio as redis
+from app.core.config import settings
+
+# Delete the lock only if it still holds our token, so a lock that expired
+# and was taken over by another worker is never released by mistake.
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# Extend the lock only while it still holds our token
+_RENEW_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key into a single execution.
+
+    Within a process, callers arriving while a call is in flight await the
+    same result. Calls themselves run under a lock per key, held in process
+    and across uvicorn workers through Redis: a caller that finds the lock
+    taken waits for it to be released and then runs its call, which by
+    then finds the rows committed by the first one instead of starting a
+    new generation. Work that can't share a result (such as a stream) can
+    take the same locks with `lock`. A held Redis lock is renewed for as
+    long as its holder runs, so it only expires when the holder dies. If
+    Redis is unreachable only the in-process locks apply.
+
+    A caller whose shared call was cancelled (say, the first caller's
+    client went away) isn't cancelled with it: it makes the call itself.
+    """
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None):
+        self.redis = redis_client or redis.from_url(settings.REDIS_URL)
+        self.lock_ttl_ms = settings.SINGLE_FLIGHT_LOCK_TTL * 1000
+        self.poll_interval = settings.SINGLE_FLIGHT_POLL_INTERVAL
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # key -> [lock, number of holders and waiters]
+        self._locks: Dict[str, List[Any]] = {}
+
+    async def run(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        lock_keys: Optional[Sequence[str]] = None
+    ) -> Any:
+        """
+        Run `fn` once for all concurrent callers of `key`.
+
+        It runs holding the locks of `lock_keys` (by default just `key`), so
+        a call covering the work of other keys waits for their calls too.
+        """
+        inflight = self._inflight.get(key)
+        while inflight is not None:
+            # Unlike awaiting the future, wait() doesn't pass on its cancellation
+            await asyncio.wait([inflight])
+            if not inflight.cancelled():
+                return inflight.result()
+            inflight = self._inflight.get(key)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            async with self.lock(*(lock_keys or (key,))):
+                result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody was waiting
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    @asynccontextmanager
+    async def lock(self, *keys: str) -> AsyncIterator[None]:
+        """Hold the locks of `keys`, taken in sorted order so holders never deadlock."""
+        async with AsyncExitStack() as stack:
+            for key in sorted(set(keys)):
+                await stack.enter_async_context(self._lock(key))
+            yield
+
+    @asynccontextmanager
+    async def _lock(self, key: str) -> AsyncIterator[None]:
+        entry = self._locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                lock_key = f"singleflight:{key}"
+                token = uuid4().hex
+                held = await self._acquire(lock_key, token)
+                renewal = asyncio.create_task(self._renew(lock_key, token)) if held else None
+                try:
+                    yield
+                finally:
+                    if held:
+                        renewal.cancel()
+                        await self._release(lock_key, token)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+    async def _acquire(self, lock_key: str, token: str) -> bool:
+        try:
+            while not await self.redis.set(lock_key, token, nx=True, px=self.lock_ttl_ms):
+                await asyncio.sleep(self.poll_interval)
+            return True
+        except redis.RedisError:
+            return False
+
+    async def _renew(self, lock_key: str, token: str) -> None:
+        while True:
+            await asyncio.sleep(self.lock_ttl_ms / 3000)
+            try:
+                if not await self.redis.eval(_RENEW_SCRIPT, 1, lock_key, token, int(self.lock_ttl_ms)):
+                    return  # expired meanwhile and taken over
+            except redis.RedisError:
+                pass
+
+    async def _release(self, lock_key: str, token: str) -> None:
+        try:
+            await self.redis.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+        except redis.RedisError:
+            pass
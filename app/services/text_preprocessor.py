@@ -0,0 +1,141 @@
+import math
+import re
+from collections import Counter
+from typing import List, Tuple
+from app.schemas.material import PreprocessingStats
+from app.utils.text import estimate_tokens
+
+# Lines at the top or bottom of a page that are checked for boilerplate
+_EDGE_LINES = 3
+_PAGE_NUMBER = re.compile(
+    r"^(?:page\s*)?[-–—(\[]?\s*\d{1,4}\s*[-–—)\]]?(?:\s*(?:of|/)\s*\d{1,4})?$",
+    re.IGNORECASE
+)
+_HYPHENATED = re.compile(r"(\w+)-\n[ \t]*([a-z]\w*)")
+# Compounds with these keep their hyphen when it falls at a line break
+_COMPOUND_PREFIXES = {"self", "well", "half", "cross", "non"}
+_SPACES = re.compile(r"[ \t\f\v\u00a0\u2000-\u200b\u3000]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+_FILLER_NOTES = re.compile(r"\[(?:music|applause|laughter|laughs|inaudible|silence|noise)\]", re.IGNORECASE)
+# "mm" alone is left alone: it is far more often millimetres than a filler
+_FILLER_WORDS = re.compile(r"(?<![\w'])(?:u+m+|u+h+|e+r+m+|a+h+|h+m+|m+-?h+m+)(?![\w'])[,.]?", re.IGNORECASE)
+_FILLER_PHRASES = re.compile(r",\s*(?:you know|i mean|like),", re.IGNORECASE)
+
+def _line_key(line: str) -> str:
+    # Headers and footers often differ only by a page number or date
+    return re.sub(r"\d+", "#", " ".join(line.split()).lower())
+
+def _rejoin_hyphenated(text: str) -> str:
+    """Join words hyphenated across line breaks, keeping the hyphen of compounds."""
+    unbroken = _HYPHENATED.sub(" ", text)
+    words = {word.lower() for word in re.findall(r"\w+", unbroken)}
+    compounds = {compound.lower() for compound in re.findall(r"\w+-\w+", unbroken)}
+
+    def rejoin(match: re.Match) -> str:
+        head, tail = match.groups()
+        # The rest of the document says how the word is spelled, if it can
+        if (head + tail).lower() in words:
+            return head + tail
+        if f"{head}-{tail}".lower() in compounds or head.lower() in _COMPOUND_PREFIXES:
+            return f"{head}-{tail}"
+        return head + tail
+
+    return _HYPHENATED.sub(rejoin, text)
+
+def _join_caption_lines(lines: List[str]) -> str:
+    # Captions often repeat the last word of a line at the start of the
+    # next; only that seam is deduplicated, since repeats within a line
+    # ("1 1 2 3", "had had") are usually meant
+    joined = []
+    for line in lines:
+        first, _, rest = line.partition(" ")
+        if joined and first.isalpha() and first.lower() == joined[-1].split()[-1].lower():
+            line = rest
+        if line:
+            joined.append(line)
+    return " ".join(joined)
+
+def _collapse_whitespace(text: str) -> str:
+    lines = [_SPACES.sub(" ", line).strip() for line in text.split("\n")]
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+class TextPreprocessor:
+    """
+    Shrinks extracted text before it is stored and sent to the LLM.
+
+    PDF pages lose their running headers and footers (lines repeated at the
+    top or bottom of most pages) and page numbers, words hyphenated across
+    line breaks are rejoined, and whitespace runs are collapsed. Transcripts
+    are joined into running text and lose filler words, caption notes such
+    as "[Music]" and words a caption line repeats from the one before.
+    """
+
+    def __init__(self, boilerplate_ratio: float = 0.5):
+        # Share of pages a line must repeat on to count as boilerplate
+        self.boilerplate_ratio = boilerplate_ratio
+
+    def process_pages(self, pages: List[str]) -> Tuple[str, PreprocessingStats]:
+        original = "\n".join(pages)
+        pages = [page.replace("\r\n", "\n").replace("\r", "\n") for page in pages]
+        boilerplate = self._boilerplate(pages)
+        cleaned = [self._clean_page(page, boilerplate) for page in pages]
+        text = "\n\n".join(page for page in cleaned if page)
+        text = _rejoin_hyphenated(text)
+        text = _collapse_whitespace(text)
+        return text, self._stats(original, text)
+
+    def process_transcript(self, text: str) -> Tuple[str, PreprocessingStats]:
+        original = text
+        # Caption lines are fragments of sentences, not paragraphs
+        text = _join_caption_lines([line.strip() for line in text.splitlines() if line.strip()])
+        text = _FILLER_NOTES.sub(" ", text)
+        text = _FILLER_WORDS.sub(" ", text)
+        text = _FILLER_PHRASES.sub(",", text)
+        text = re.sub(r"\s+([,.?!])", r"\1", text)
+        text = re.sub(r",(?=[,.?!])", "", text)
+        text = _collapse_whitespace(text)
+        return text, self._stats(original, text)
+
+    def _boilerplate(self, pages: List[str]) -> set:
+        if len(pages) < 2:
+            return set()
+        counts = Counter()
+        for page in pages:
+            counts.update({_line_key(line) for line in self._edge_lines(page)})
+        threshold = max(2, math.ceil(len(pages) * self.boilerplate_ratio))
+        return {key for key, count in counts.items() if key and count >= threshold}
+
+    @staticmethod
+    def _edge_lines(page: str) -> List[str]:
+        lines = [line for line in page.split("\n") if line.strip()]
+        if len(lines) <= 2 * _EDGE_LINES:
+            return lines
+        return lines[:_EDGE_LINES] + lines[-_EDGE_LINES:]
+
+    def _clean_page(self, page: str, boilerplate: set) -> str:
+        lines = page.split("\n")
+        content = [i for i, line in enumerate(lines) if line.strip()]
+        edges = set(content[:_EDGE_LINES] + content[-_EDGE_LINES:])
+        kept = []
+        for i, line in enumerate(lines):
+            if i in edges:
+                stripped = line.strip()
+                if _PAGE_NUMBER.match(stripped) or _line_key(stripped) in boilerplate:
+                    continue
+            kept.append(line)
+        return "\n".join(kept).strip()
+
+    @staticmethod
+    def _stats(original: str, processed: str) -> PreprocessingStats:
+        original_bytes = len(original.encode())
+        processed_bytes = len(processed.encode())
+        original_tokens = estimate_tokens(original)
+        processed_tokens = estimate_tokens(processed)
+        return PreprocessingStats(
+            original_bytes=original_bytes,
+            processed_bytes=processed_bytes,
+            bytes_saved=original_bytes - processed_bytes,
+            original_tokens=original_tokens,
+            processed_tokens=processed_tokens,
+            tokens_saved=original_tokens - processed_tokens
+        )
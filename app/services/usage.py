@@ -0,0 +1,149 @@
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Tuple
+import redis.asyncio as redis
+from app.core.config import settings
+from app.utils.text import estimate_tokens
+
+class UsageMeter:
+    """Token usage of the LLM calls made while the meter is active."""
+
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.calls = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, prompt_tokens: int, completion_tokens: int) -> None:
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.calls += 1
+
+_current_meter: ContextVar[Optional[UsageMeter]] = ContextVar("usage_meter", default=None)
+
+@contextmanager
+def metered() -> Iterator[UsageMeter]:
+    """
+    Collect the usage of every LLM call made inside the block, including
+    calls made from tasks it spawns (e.g. chunks generated concurrently).
+    """
+    meter = UsageMeter()
+    token = _current_meter.set(meter)
+    try:
+        yield meter
+    finally:
+        _current_meter.reset(token)
+
+def record_usage(prompt_tokens: int, completion_tokens: int) -> None:
+    """Called by providers after each LLM call."""
+    meter = _current_meter.get()
+    if meter is not None:
+        meter.add(prompt_tokens, completion_tokens)
+
+def estimate_generation_tokens(content: str, count: int) -> int:
+    """Rough cost of generating `count` items from `content`, reserved up front."""
+    return estimate_tokens(content) + count * settings.GENERATION_TOKENS_PER_ITEM
+
+class QuotaExceeded(Exception):
+    """Raised when a user's token bucket can't cover a generation."""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Token quota exceeded, try again later")
+        self.retry_after = retry_after
+
+# Refill the bucket for the time elapsed since it was last touched, then
+# take `cost` tokens. Unless forced, a request the bucket can't cover takes
+# nothing and is refused. Returns {allowed, tokens left}.
+_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local force = ARGV[5] == "1"
+local state = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 1
+if not force and tokens < math.min(cost, capacity) then
+    allowed = 0
+else
+    tokens = tokens - cost
+end
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", tostring(now))
+redis.call("EXPIRE", KEYS[1], ARGV[6])
+return {allowed, tostring(tokens)}
+"""
+
+class TokenQuota:
+    """
+    Per-user token buckets limiting how fast a user can spend LLM tokens.
+
+    A bucket holds up to USER_TOKEN_BUCKET_CAPACITY tokens and refills at
+    USER_TOKEN_REFILL_PER_SECOND. An estimate is taken before a generation
+    and corrected with the actual usage afterwards, so a bucket may go
+    negative and stays closed until it refills. Buckets live in Redis and
+    are updated by a Lua script, so concurrent requests across workers
+    can't overdraw them; if Redis is unreachable, per-process buckets are
+    used instead.
+    """
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None):
+        self.redis = redis_client or redis.from_url(settings.REDIS_URL)
+        self.enabled = settings.USER_TOKEN_QUOTA_ENABLED
+        self.capacity = settings.USER_TOKEN_BUCKET_CAPACITY
+        self.rate = settings.USER_TOKEN_REFILL_PER_SECOND
+        self._local: Dict[int, Tuple[float, float]] = {}
+
+    def _key(self, user_id: int) -> str:
+        return f"quota:tokens:{user_id}"
+
+    async def acquire(self, user_id: int, tokens: int) -> None:
+        """Take `tokens` from the user's bucket or raise QuotaExceeded."""
+        if not self.enabled:
+            return
+        allowed, remaining = await self._take(user_id, tokens, force=False)
+        if not allowed:
+            needed = min(tokens, self.capacity) - remaining
+            raise QuotaExceeded(retry_after=math.ceil(needed / self.rate))
+
+    async def adjust(self, user_id: int, tokens: int) -> None:
+        """Take (or with a negative value, give back) tokens unconditionally."""
+        if self.enabled and tokens:
+            await self._take(user_id, tokens, force=True)
+
+    async def remaining(self, user_id: int) -> float:
+        _, remaining = await self._take(user_id, 0, force=True)
+        return remaining
+
+    async def _take(self, user_id: int, cost: int, force: bool) -> Tuple[bool, float]:
+        now = time.time()
+        try:
+            allowed, remaining = await self.redis.eval(
+                _BUCKET_SCRIPT,
+                1,
+                self._key(user_id),
+                self.capacity,
+                self.rate,
+                now,
+                cost,
+                "1" if force else "0",
+                math.ceil(self.capacity / self.rate) + 60
+            )
+            return bool(int(allowed)), float(remaining)
+        except redis.RedisError:
+            return self._take_local(user_id, cost, force, now)
+
+    def _take_local(self, user_id: int, cost: int, force: bool, now: float) -> Tuple[bool, float]:
+        tokens, ts = self._local.get(user_id, (self.capacity, now))
+        tokens = min(self.capacity, tokens + max(0.0, now - ts) * self.rate)
+        allowed = force or tokens >= min(cost, self.capacity)
+        if allowed:
+            tokens -= cost
+        self._local[user_id] = (tokens, now)
+        return allowed, tokens
@@ -1,21 +1,217 @@
-from typing import Optional
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api.formatters import TextFormatter
+import asyncio
+import random
 import re
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+import redis.asyncio as redis
+from app.core.config import settings
+from app.services.single_flight import SingleFlight
+
+def extract_video_id(url: str) -> str:
+    """The 11-character video id of a YouTube watch, share or embed URL."""
+    match = re.search(r'(?:v=|\/)([0-9A-Za-z_-]{11}).*', url)
+    if not match:
+        raise ValueError("Invalid YouTube URL")
+    return match.group(1)
+
+class TranscriptProvider(ABC):
+    """
+    A source of video transcripts.
+
+    `fetch` is blocking and runs on the transcript thread pool; it returns
+    the transcript as plain text, one caption per line.
+    """
+
+    name: str
+
+    @abstractmethod
+    def fetch(self, video_id: str) -> str:
+        ...
+
+_registry: Dict[str, Callable[[], TranscriptProvider]] = {}
+
+def register_transcript_provider(name: str):
+    """Class or factory decorator adding a provider under `name` (the `YOUTUBE_TRANSCRIPT_PROVIDER` value)."""
+    def decorator(factory):
+        _registry[name] = factory
+        return factory
+    return decorator
+
+def create_transcript_provider(name: Optional[str] = None) -> TranscriptProvider:
+    name = name or settings.YOUTUBE_TRANSCRIPT_PROVIDER
+    if name not in _registry:
+        raise ValueError(
+            f"Unknown transcript provider '{name}'. Available: {', '.join(sorted(_registry))}"
+        )
+    return _registry[name]()
+
+@register_transcript_provider("youtube")
+class YouTubeTranscriptProvider(TranscriptProvider):
+    """Captions from YouTube through youtube-transcript-api."""
+
+    name = "youtube"
+
+    def fetch(self, video_id: str) -> str:
+        from youtube_transcript_api import YouTubeTranscriptApi
+        from youtube_transcript_api.formatters import TextFormatter
+        transcript = YouTubeTranscriptApi().fetch(video_id)
+        return TextFormatter().format_transcript(transcript).strip()
+
+_FAKE_WORDS = (
+    "today we look at how cells turn glucose into energy the mitochondria "
+    "use oxygen to release it and the membrane controls what gets in"
+).split()
+_FAKE_FILLERS = ("um", "uh", "you know", "so")
+
+@register_transcript_provider("fake")
+class FakeTranscriptProvider(TranscriptProvider):
+    """
+    Offline provider for tests, benchmarks and local development.
+
+    Blocks for `YOUTUBE_FAKE_LATENCY` seconds, like a network fetch, and
+    returns a deterministic lecture-style transcript derived from the video
+    id (with the filler words real captions have). `fetches` counts calls.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency: Optional[float] = None, lines: int = 200):
+        self.latency = latency if latency is not None else settings.YOUTUBE_FAKE_LATENCY
+        self.lines = lines
+        self.fetches = 0
+
+    def fetch(self, video_id: str) -> str:
+        self.fetches += 1
+        if self.latency:
+            time.sleep(self.latency)
+        rng = random.Random(video_id)
+        lines = []
+        for line in range(self.lines):
+            words = rng.choices(_FAKE_WORDS, k=9)
+            if line % 3 == 0:
+                words.insert(rng.randrange(len(words)), rng.choice(_FAKE_FILLERS))
+            lines.append(" ".join(words))
+        return "\n".join(lines)
+
+class TranscriptCache:
+    """
+    Transcripts by video id, in process memory and in Redis.
+
+    The memory tier holds the YOUTUBE_TRANSCRIPT_CACHE_ENTRIES most recently
+    used transcripts; Redis shares them across the fleet. Both expire after
+    YOUTUBE_TRANSCRIPT_CACHE_TTL. When Redis is unreachable only the memory
+    tier is used.
+    """
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None):
+        self.redis = redis_client or redis.from_url(settings.REDIS_URL)
+        self.ttl = settings.YOUTUBE_TRANSCRIPT_CACHE_TTL
+        self.max_entries = settings.YOUTUBE_TRANSCRIPT_CACHE_ENTRIES
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    def _key(self, video_id: str) -> str:
+        return f"transcript:{video_id}"
+
+    async def get(self, video_id: str) -> Optional[str]:
+        entry = self._memory.get(video_id)
+        if entry is not None:
+            expires_at, text = entry
+            if expires_at > time.monotonic():
+                self._memory.move_to_end(video_id)
+                return text
+            del self._memory[video_id]
+
+        try:
+            value = await self.redis.get(self._key(video_id))
+        except redis.RedisError:
+            return None
+        if value is None:
+            return None
+        text = value.decode()
+        self._remember(video_id, text)
+        return text
+
+    async def set(self, video_id: str, text: str) -> None:
+        self._remember(video_id, text)
+        try:
+            await self.redis.setex(self._key(video_id), self.ttl, text)
+        except redis.RedisError:
+            pass
+
+    def _remember(self, video_id: str, text: str) -> None:
+        self._memory[video_id] = (time.monotonic() + self.ttl, text)
+        self._memory.move_to_end(video_id)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+def get_transcript_executor() -> ThreadPoolExecutor:
+    """Return the process-wide thread pool transcript fetches run on."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.YOUTUBE_FETCH_WORKERS,
+            thread_name_prefix="transcript"
+        )
+    return _executor
+
+def close_transcript_executor() -> None:
+    """Stop the fetch threads (called on shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
 
 class YouTubeService:
+    """
+    Transcripts of YouTube videos, fetched once and cached.
+
+    Fetches block, so they run on a bounded thread pool
+    (YOUTUBE_FETCH_WORKERS) instead of the event loop. Concurrent requests
+    for the same video share one fetch, across workers too (see
+    SingleFlight), and the result is cached by video id.
+    """
+
+    def __init__(
+        self,
+        provider: Optional[TranscriptProvider] = None,
+        cache: Optional[TranscriptCache] = None,
+        single_flight: Optional[SingleFlight] = None,
+        executor: Optional[ThreadPoolExecutor] = None
+    ):
+        self.provider = provider or create_transcript_provider()
+        self.cache = cache or TranscriptCache()
+        self.single_flight = single_flight or SingleFlight(self.cache.redis)
+        self.executor = executor
+
     async def get_transcript(self, url: str) -> str:
         """Extract transcript from YouTube video URL"""
+        video_id = extract_video_id(url)
+        text = await self.cache.get(video_id)
+        if text is not None:
+            return text
+        return await self.single_flight.run(f"transcript:{video_id}", lambda: self._fetch(video_id))
+
+    async def _fetch(self, video_id: str) -> str:
+        # Another worker may have fetched it while we waited for the lock
+        text = await self.cache.get(video_id)
+        if text is not None:
+            return text
+
+        loop = asyncio.get_running_loop()
         try:
-            # Extract video ID from URL
-            video_id = re.findall(
-                r'(?:v=|\/)([0-9A-Za-z_-]{11}).*',
-                url
-            )[0]
-            
-            transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
-            formatter = TextFormatter()
-            text = formatter.format_transcript(transcript_list)
-            return text.strip()
+            text = await asyncio.wait_for(
+                loop.run_in_executor(self.executor or get_transcript_executor(), self.provider.fetch, video_id),
+                settings.YOUTUBE_FETCH_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            raise ValueError("Error extracting YouTube transcript: timed out")
         except Exception as e:
-            raise ValueError(f"Error extracting YouTube transcript: {str(e)}") 
\ No newline at end of file
+            raise ValueError(f"Error extracting YouTube transcript: {str(e)}")
+
+        await self.cache.set(video_id, text)
+        return text
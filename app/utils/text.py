@@ -0,0 +1,35 @@
+from typing import List, Tuple
+
+# Plain text helpers shared by the models and services; they
+# import nothing from the app so any layer can use them
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English text
+    return len(text) // 4
+
+
+def section_bounds(text: str, max_chars: int) -> List[Tuple[int, int]]:
+    """
+    Cut text into contiguous sections of at most `max_chars` characters.
+
+    Unlike chunking.split_into_chunks, nothing is dropped or repeated: the
+    sections are consecutive (start, end) offsets covering the whole text,
+    so joining them gives the text back. Cuts go after a paragraph break,
+    else a line break, else a space, as long as that keeps the section at
+    least half full; otherwise the section is cut at `max_chars`.
+    """
+    bounds, start = [], 0
+    while len(text) - start > max_chars:
+        limit = start + max_chars
+        cut = limit
+        for separator in ("\n\n", "\n", " "):
+            found = text.rfind(separator, start + max_chars // 2, limit)
+            if found != -1:
+                cut = found + len(separator)
+                break
+        bounds.append((start, cut))
+        start = cut
+    if start < len(text):
+        bounds.append((start, len(text)))
+    return bounds
@@ -0,0 +1,165 @@
+"""
+Background worker for generation jobs.
+
+Run one or more worker processes next to the API:
+
+    python -m app.worker
+"""
+import asyncio
+import signal
+from typing import Any, Awaitable, Callable, Dict, Optional
+from redis.exceptions import RedisError
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.material import Material
+from app.schemas.job import Job
+from app.services.llm_providers import close_llm_provider
+from app.services.generation import GenerationService
+from app.services.jobs import PRIORITY_BACKGROUND, JobFailed, JobQueue
+
+JobHandler = Callable[[Job], Awaitable[Dict[str, Any]]]
+
+class GenerationJobHandler:
+    """Runs a generation job through the same path as the generate endpoints."""
+
+    def __init__(
+        self,
+        generation_service: Optional[GenerationService] = None,
+        session_factory=AsyncSessionLocal
+    ):
+        self.generation_service = generation_service or GenerationService()
+        self.session_factory = session_factory
+
+    async def __call__(self, job: Job) -> Dict[str, Any]:
+        async with self.session_factory() as db:
+            material = await db.get(Material, job.material_id)
+            if not material or material.owner_id != job.user_id:
+                raise JobFailed("Material not found")
+
+            if job.kind == "flashcards":
+                items = await self.generation_service.get_or_generate_flashcards(
+                    db, material, job.user_id, **job.params
+                )
+            elif job.kind == "questions":
+                items = await self.generation_service.get_or_generate_questions(
+                    db, material, job.user_id, **job.params
+                )
+            else:
+                raise JobFailed(f"Unknown job kind: {job.kind}")
+
+        return {"count": len(items)}
+
+class Worker:
+    def __init__(
+        self,
+        queue: JobQueue,
+        handler: JobHandler,
+        concurrency: Optional[int] = None,
+        poll_timeout: float = 1.0
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = concurrency or settings.WORKER_CONCURRENCY
+        # Background jobs (e.g. pre-generation after upload) may only use part
+        # of the slots, so a burst of uploads can't starve interactive jobs
+        self.background_concurrency = min(
+            settings.PREGENERATION_CONCURRENCY,
+            self.concurrency
+        )
+        self.poll_timeout = poll_timeout
+        self.max_backoff = settings.WORKER_REDIS_BACKOFF_MAX
+        self._background_running = 0
+
+    async def run(self, stop: Optional[asyncio.Event] = None) -> None:
+        """
+        Consume jobs until `stop` is set, running up to `concurrency` at once.
+
+        Redis errors don't stop the loop: the worker waits (doubling the wait
+        up to `max_backoff`) and polls again.
+        """
+        stop = stop or asyncio.Event()
+        slots = asyncio.Semaphore(self.concurrency)
+        running = set()
+        backoff = self.poll_timeout
+
+        while not stop.is_set():
+            await slots.acquire()
+            try:
+                job = await self.queue.dequeue(
+                    timeout=self.poll_timeout,
+                    include_background=self._background_running < self.background_concurrency
+                )
+            except RedisError:
+                slots.release()
+                try:
+                    await asyncio.wait_for(stop.wait(), backoff)
+                except asyncio.TimeoutError:
+                    pass
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+            backoff = self.poll_timeout
+            if job is None:
+                slots.release()
+                continue
+
+            background = job.priority <= PRIORITY_BACKGROUND
+            if background:
+                self._background_running += 1
+
+            task = asyncio.create_task(self._process(job))
+            running.add(task)
+            task.add_done_callback(running.discard)
+            task.add_done_callback(lambda _, bg=background: self._release(slots, bg))
+
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+    def _release(self, slots: asyncio.Semaphore, background: bool) -> None:
+        if background:
+            self._background_running -= 1
+        slots.release()
+
+    async def _process(self, job: Job) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            result = await self.handler(job)
+        except JobFailed as e:
+            outcome = self.queue.fail(job, str(e), retry=False)
+        except Exception as e:
+            outcome = self.queue.fail(job, str(e))
+        else:
+            outcome = self.queue.complete(job, result)
+        finally:
+            heartbeat.cancel()
+
+        try:
+            await outcome
+        except RedisError:
+            # The job stays in the processing set and is requeued once its
+            # visibility timeout passes; jobs ask for a total number of items,
+            # so running one again generates nothing more
+            pass
+
+    async def _heartbeat(self, job: Job) -> None:
+        """Keep a long-running job from being reclaimed as stale."""
+        while True:
+            await asyncio.sleep(self.queue.visibility_timeout / 3)
+            try:
+                await self.queue.touch(job.id)
+            except RedisError:
+                pass
+
+async def main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    worker = Worker(JobQueue(), GenerationJobHandler())
+    try:
+        await worker.run(stop)
+    finally:
+        await close_llm_provider()
+
+if __name__ == "__main__":
+    asyncio.run(main())
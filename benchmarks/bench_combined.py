@@ -0,0 +1,95 @@
+"""
+Combined vs separate generation of flashcards and questions.
+
+Generates 20 flashcards and 20 questions for the same material once with
+two calls (the generate-flashcards and generate-questions path) and once
+with a single combined structured-output call, and reports wall time and
+the tokens billed by the local fake LLM.
+
+The fake charges a fixed latency per request plus a per-token cost for the
+prompt and the output, roughly like a hosted model.
+
+    python -m benchmarks.bench_combined --content-chars 40000
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from openai import AsyncOpenAI
+from app.services.ai_generator import AIGenerator
+from benchmarks import fake_llm
+
+def make_content(chars: int) -> str:
+    sentences = []
+    total = 0
+    while total < chars:
+        sentence = f"Fact {len(sentences)}: photosynthesis converts light energy into chemical energy. "
+        sentences.append(sentence)
+        total += len(sentence)
+    return "".join(sentences)[:chars]
+
+
+def reset_usage() -> dict:
+    usage = {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    fake_llm.app.state.usage = usage
+    return usage
+
+
+async def separate(generator: AIGenerator, content: str) -> None:
+    # The endpoints are called one after the other by the client
+    await generator.generate_flashcards(content, num_cards=20)
+    await generator.generate_questions(content, num_questions=20)
+
+
+async def combined(generator: AIGenerator, content: str) -> None:
+    await generator.generate_study_set(content, num_cards=20, num_questions=20)
+
+
+async def measure(name: str, run, generator: AIGenerator, content: str, repeats: int) -> dict:
+    usage = reset_usage()
+    started = time.perf_counter()
+    for _ in range(repeats):
+        await run(generator, content)
+    elapsed = (time.perf_counter() - started) / repeats
+    result = {
+        "latency_s": round(elapsed, 2),
+        "requests": usage["requests"] // repeats,
+        "prompt_tokens": usage["prompt_tokens"] // repeats,
+        "completion_tokens": usage["completion_tokens"] // repeats,
+    }
+    print(f"{name:<9} {result}")
+    return result
+
+
+async def main(content_chars: int, repeats: int, latency: float, prefill: float, decode: float) -> None:
+    fake_llm.app.state.latency = latency
+    fake_llm.app.state.prefill_latency = prefill
+    fake_llm.app.state.decode_latency = decode
+    base_url = fake_llm.serve_in_thread()
+    content = make_content(content_chars)
+
+    client = AsyncOpenAI(api_key="benchmark", base_url=base_url)
+    generator = AIGenerator(client=client)
+    two_calls = await measure("separate", separate, generator, content, repeats)
+    one_call = await measure("combined", combined, generator, content, repeats)
+    await client.close()
+
+    for field in ("latency_s", "prompt_tokens", "completion_tokens"):
+        before, after = two_calls[field], one_call[field]
+        saved = 100 * (before - after) / before if before else 0.0
+        print(f"{field:<18} saved {saved:5.1f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--content-chars", type=int, default=40000)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.3, help="fixed seconds per request")
+    parser.add_argument("--prefill", type=float, default=0.00005, help="seconds per prompt token")
+    parser.add_argument("--decode", type=float, default=0.0005, help="seconds per completion token")
+    args = parser.parse_args()
+    asyncio.run(main(args.content_chars, args.repeats, args.latency, args.prefill, args.decode))
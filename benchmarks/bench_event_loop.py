@@ -0,0 +1,94 @@
+"""
+Event-loop responsiveness while generations are in flight.
+
+Fires concurrent flashcard generations against the local fake LLM and
+probes the app's /health endpoint at the same time, once with the legacy
+blocking client and once with the async AIGenerator.
+
+    python -m benchmarks.bench_event_loop --generations 8 --latency 2
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+from app.main import app
+from app.schemas.ai_content import MultipleFlashcards
+from app.services.ai_generator import AIGenerator
+from benchmarks import fake_llm
+
+CONTENT = "Photosynthesis converts light energy into chemical energy stored in glucose. " * 50
+
+
+class BlockingGenerator:
+    """The pre-async implementation: a sync client called from a coroutine."""
+
+    def __init__(self, base_url: str):
+        self.client = OpenAI(api_key="benchmark", base_url=base_url)
+
+    async def generate_flashcards(self, text: str, num_cards: int = 20):
+        completion = self.client.beta.chat.completions.parse(
+            model="gemini-1.5-flash",
+            messages=[
+                {"role": "system", "content": f"Generate {num_cards} flashcards strictly based on the content given."},
+                {"role": "user", "content": f"Content: {text}"},
+            ],
+            response_format=MultipleFlashcards,
+        )
+        return completion.choices[0].message.parsed.flashcards
+
+
+async def run(generator, generations: int) -> dict:
+    probe_latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+        tasks = [
+            asyncio.create_task(generator.generate_flashcards(CONTENT, num_cards=20))
+            for _ in range(generations)
+        ]
+        started = time.perf_counter()
+        while not all(task.done() for task in tasks):
+            # Time a full probe cycle: the 50 ms pause plus the request.
+            # Anything above 50 ms is time the event loop was unavailable.
+            probe_start = time.perf_counter()
+            await asyncio.sleep(0.05)
+            response = await client.get("/health")
+            assert response.status_code == 200
+            probe_latencies.append(time.perf_counter() - probe_start - 0.05)
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    probe_latencies.sort()
+    return {
+        "wall_s": round(elapsed, 2),
+        "probes": len(probe_latencies),
+        "stall_p50_ms": round(statistics.median(probe_latencies) * 1000, 1),
+        "stall_max_ms": round(probe_latencies[-1] * 1000, 1),
+    }
+
+
+async def main(generations: int, latency: float) -> None:
+    fake_llm.app.state.latency = latency
+    base_url = fake_llm.serve_in_thread()
+
+    blocking = await run(BlockingGenerator(base_url), generations)
+    print(f"blocking client: {blocking}")
+
+    client = AsyncOpenAI(api_key="benchmark", base_url=base_url)
+    non_blocking = await run(AIGenerator(client=client), generations)
+    print(f"async client:    {non_blocking}")
+    await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--generations", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=2.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.generations, args.latency))
@@ -0,0 +1,115 @@
+"""
+End-to-end throughput of the upload -> generate -> quiz flow.
+
+Runs the API in-process with the offline stub LLM provider and drives it
+through an ASGI transport, so nothing leaves the machine except Redis
+calls (start one first, e.g. `docker run -p 6379:6379 redis`). Each
+simulated student uploads a PDF, generates flashcards and questions, then
+fetches and submits a quiz.
+
+    python -m benchmarks.bench_flow --users 200 --concurrency 50 --llm-latency 0
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("LLM_PROVIDER", "stub")
+
+import httpx
+from app.db.session import engine
+from app.main import app
+from app.services.llm_providers import get_llm_provider
+from benchmarks.pdfs import make_pdf
+
+API = "/api/v1"
+
+
+async def sign_up(client: httpx.AsyncClient, index: int) -> dict:
+    email = f"student{index}@example.com"
+    await client.post(f"{API}/auth/signup", json={
+        "email": email, "password": "password123", "full_name": f"Student {index}"
+    })
+    response = await client.post(f"{API}/auth/login", data={"username": email, "password": "password123"})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def student_flow(client: httpx.AsyncClient, headers: dict, pdf: bytes, timings: dict) -> None:
+    async def call(name: str, method: str, url: str, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        response = await client.request(method, url, headers=headers, **kwargs)
+        timings[name].append(time.perf_counter() - started)
+        response.raise_for_status()
+        return response
+
+    material = (await call(
+        "upload", "POST", f"{API}/materials/upload/pdf",
+        files={"file": ("notes.pdf", pdf, "application/pdf")}, data={"title": "Notes"}
+    )).json()
+    material_url = f"{API}/materials/{material['id']}"
+    await call("flashcards", "POST", f"{material_url}/generate-flashcards")
+    await call("questions", "POST", f"{material_url}/generate-questions")
+    quiz = (await call("quiz", "GET", f"{material_url}/questions", params={"num_questions": 5})).json()
+    await call("evaluate", "POST", f"{material_url}/evaluate-questions", json={
+        "session_id": quiz["session_id"],
+        "answers": [
+            {"question_number": i + 1, "selected_option": "A"}
+            for i in range(quiz["total_questions"])
+        ]
+    })
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def main(users: int, concurrency: int, pages: int, llm_latency: float) -> None:
+    engine.echo = False
+    get_llm_provider().latency = llm_latency
+    pdfs = [make_pdf(pages=pages, seed=i) for i in range(users)]
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app", timeout=None) as client:
+            limit = asyncio.Semaphore(concurrency)
+
+            async def bounded(coro):
+                async with limit:
+                    return await coro
+
+            # Password hashing is deliberately slow (and blocks the loop);
+            # sign everyone up beforehand and keep it out of the measurement
+            headers = [await sign_up(client, i) for i in range(users)]
+
+            timings = defaultdict(list)
+            started = time.perf_counter()
+            await asyncio.gather(*(
+                bounded(student_flow(client, headers[i], pdfs[i], timings)) for i in range(users)
+            ))
+            elapsed = time.perf_counter() - started
+
+    total = sum(len(values) for values in timings.values())
+    print(f"{users} students, {total} requests in {elapsed:.2f}s -> {total / elapsed:.0f} req/s")
+    for name, values in timings.items():
+        print(
+            f"  {name:<11} p50 {statistics.median(values) * 1000:7.1f} ms"
+            f"   p99 {percentile(values, 99) * 1000:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds per stub LLM call")
+    args = parser.parse_args()
+    # The app's SQLite file is created relative to the working directory
+    os.chdir(tempfile.mkdtemp(prefix="bench_flow_"))
+    asyncio.run(main(args.users, args.concurrency, args.pages, args.llm_latency))
@@ -0,0 +1,150 @@
+"""
+Queries and latency of the material listing for a user with many materials.
+
+Fills a SQLite database with one user owning `--materials` materials (each
+with its own text and a few flashcards and questions), then requests random
+pages of the listing, once through the previous implementation (two COUNT
+queries per material, full content loaded) and once through the endpoint. Reports statements per request and p50/p99 latency.
+
+    python -m benchmarks.bench_material_listing --materials 10000 --per-page 100
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("LLM_PROVIDER", "stub")
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+from app.api.v1.endpoints.materials import get_user_materials
+from app.models import Base, ContentBlob, Flashcard, Material, MaterialSection, Question, User
+from app.models.content_blob import content_hash
+from app.schemas.material import MaterialListItem, MaterialResponse, MaterialStats
+from app.utils.text import estimate_tokens
+from benchmarks.pdfs import page_lines
+
+
+async def legacy_list(db, current_user, page: int, per_page: int):
+    """The listing before the aggregated query: two COUNTs per material."""
+    query = (
+        select(Material)
+        .where(Material.owner_id == current_user.id)
+        .order_by(Material.created_at.desc())
+    )
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
+    query = query.offset((page - 1) * per_page).limit(per_page)
+    query = query.options(selectinload(Material.blob).selectinload(ContentBlob.sections))
+    items = []
+    for material in (await db.execute(query)).scalars().all():
+        flashcards = await db.scalar(select(func.count()).select_from(Flashcard).where(
+            Flashcard.material_id == material.id, Flashcard.user_id == current_user.id
+        ))
+        questions = await db.scalar(select(func.count()).select_from(Question).where(
+            Question.material_id == material.id, Question.user_id == current_user.id
+        ))
+        items.append(MaterialListItem(
+            **MaterialResponse.model_validate(material).model_dump(),
+            stats=MaterialStats(num_flashcards=flashcards, num_questions=questions)
+        ))
+    return items, total
+
+
+async def current_list(db, current_user, page: int, per_page: int):
+    result = await get_user_materials(
+        page=page, per_page=per_page, source_type=None, sort_by="created_at",
+        order="desc", db=db, current_user=current_user
+    )
+    return result.materials, result.total
+
+
+async def populate(session_factory, materials: int, cards: int) -> User:
+    async with session_factory() as db:
+        user = User(email="bench@example.com", full_name="Bench", hashed_password="x")
+        db.add(user)
+        await db.commit()
+
+    started = datetime(2026, 1, 1)
+    batch = 1000
+    for first in range(0, materials, batch):
+        blobs, sections, rows, flashcards, questions = [], [], [], [], []
+        for i in range(first, min(first + batch, materials)):
+            text = "\n".join(page_lines(0, 30, seed=i))
+            digest = content_hash(text)
+            blobs.append({"hash": digest, "char_count": len(text), "token_estimate": estimate_tokens(text),
+                          "ref_count": 1, "created_at": started})
+            sections.append({"blob_hash": digest, "index": 0, "start": 0, "end": len(text), "text": text,
+                             "token_estimate": estimate_tokens(text), "created_at": started})
+            rows.append({"id": i + 1, "title": f"Lecture {i}", "blob_hash": digest, "source_type": "pdf",
+                         "owner_id": user.id, "created_at": started + timedelta(minutes=i),
+                         "num_flashcards": cards, "num_questions": cards})
+            for n in range(cards):
+                flashcards.append({"id": f"fc_{i}_{n}", "front": "Q", "back": "A",
+                                   "material_id": i + 1, "user_id": user.id})
+                questions.append({"id": f"q_{i}_{n}", "question_text": "Q?", "options": ["A", "B"],
+                                  "answer": "A", "explanation": "E", "category": "C",
+                                  "material_id": i + 1, "user_id": user.id})
+        async with session_factory() as db:
+            for table, values in (
+                (ContentBlob.__table__, blobs), (MaterialSection.__table__, sections),
+                (Material.__table__, rows), (Flashcard.__table__, flashcards), (Question.__table__, questions)
+            ):
+                if values:
+                    await db.execute(table.insert(), values)
+            await db.commit()
+    return user
+
+
+async def main(materials: int, per_page: int, requests: int, cards: int) -> None:
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_material_listing_"), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    user = await populate(session_factory, materials, cards)
+    print(f"{materials} materials with {cards} flashcards and {cards} questions each, {per_page} per page")
+
+    statements = 0
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count(*args):
+        nonlocal statements
+        statements += 1
+
+    pages = max(1, materials // per_page)
+    for name, listing in (("legacy", legacy_list), ("current", current_list)):
+        rng = random.Random(0)
+        latencies, queries = [], []
+        for _ in range(requests):
+            page = rng.randint(1, pages)
+            statements = 0
+            started = time.perf_counter()
+            async with session_factory() as db:
+                items, total = await listing(db, user, page, per_page)
+            latencies.append(time.perf_counter() - started)
+            queries.append(statements)
+            assert total == materials and len(items) == per_page
+            assert all(item.stats.num_flashcards == cards for item in items)
+        latencies.sort()
+        print(
+            f"{name:<8} {statistics.mean(queries):6.1f} statements/request"
+            f"   p50 {statistics.median(latencies) * 1000:7.1f} ms"
+            f"   p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:7.1f} ms"
+        )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--materials", type=int, default=10000)
+    parser.add_argument("--per-page", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--cards", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.materials, args.per_page, args.requests, args.cards))
@@ -0,0 +1,73 @@
+"""
+Pages per second and peak memory of each installed PDF extraction backend.
+
+Writes a corpus of generated PDFs, then extracts all of it with every
+installed backend, each in a fresh process so peak RSS is its own. Also
+checks that all backends return identical text. Install `pypdfium2`
+and/or `pymupdf` to compare them with the PyPDF2 fallback.
+
+    python -m benchmarks.bench_pdf_backends --docs 10 --pages 100
+"""
+import argparse
+import hashlib
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from app.services.pdf_backends import available_backends, create_backend
+from benchmarks.pdfs import make_pdf
+
+
+def extract_corpus(backend: str, paths: list, results) -> None:
+    extractor = create_backend(backend)
+    digest = hashlib.sha256()
+    pages = 0
+    started = time.perf_counter()
+    for path in paths:
+        with extractor.open(path) as document:
+            for text in extractor.iter_pages(document):
+                digest.update(text.encode() + b"\f")
+                pages += 1
+    elapsed = time.perf_counter() - started
+    # ru_maxrss is in kilobytes on Linux
+    results.put((pages, elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, digest.hexdigest()))
+
+
+def main(docs: int, pages: int) -> None:
+    directory = tempfile.mkdtemp(prefix="bench_pdf_backends_")
+    paths = []
+    for i in range(docs):
+        path = os.path.join(directory, f"{i}.pdf")
+        with open(path, "wb") as pdf:
+            # Mixed lengths, the longest being `pages`
+            pdf.write(make_pdf(pages=max(1, pages * (i % 4 + 1) // 4), seed=i))
+        paths.append(path)
+    size = sum(os.path.getsize(path) for path in paths) / 2**20
+    print(f"{docs} documents, {size:.1f} MB")
+
+    context = multiprocessing.get_context("spawn")
+    digests = {}
+    for backend in available_backends():
+        results = context.Queue()
+        process = context.Process(target=extract_corpus, args=(backend, paths, results))
+        process.start()
+        total, elapsed, peak_kb, digest = results.get()
+        process.join()
+        digests[backend] = digest
+        print(
+            f"{backend:<8} {total} pages in {elapsed:6.2f}s"
+            f"   {total / elapsed:7.0f} pages/s   peak RSS {peak_kb / 1024:6.1f} MB"
+        )
+    print("identical output" if len(set(digests.values())) == 1 else f"OUTPUT DIFFERS: {digests}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=100)
+    args = parser.parse_args()
+    main(args.docs, args.pages)
@@ -0,0 +1,74 @@
+"""
+PDF extraction throughput and event-loop stalls for long documents.
+
+Extracts several multi-hundred-page PDFs concurrently, once inline on the
+event loop (the pre-pool implementation) and once through PDFService's
+process pool, while a ticker measures how long the loop is blocked.
+
+    python -m benchmarks.bench_pdf_extraction --docs 4 --pages 300 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import time
+from io import BytesIO
+
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from fastapi import UploadFile
+from PyPDF2 import PdfReader
+from app.services.pdf_service import ExtractionPool, PDFService
+from benchmarks.pdfs import make_pdf
+
+
+async def extract_inline(file: UploadFile):
+    content = await file.read()
+    reader = PdfReader(BytesIO(content))
+    return [page.extract_text() or "" for page in reader.pages]
+
+
+async def ticker(stop: asyncio.Event, stalls: list) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        stalls.append(time.perf_counter() - started - 0.01)
+
+
+async def run(name: str, extract, pdfs) -> None:
+    stop, stalls = asyncio.Event(), []
+    probe = asyncio.create_task(ticker(stop, stalls))
+    started = time.perf_counter()
+    results = await asyncio.gather(*(extract(UploadFile(BytesIO(pdf), filename="doc.pdf")) for pdf in pdfs))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+    pages = sum(len(result) for result in results)
+    print(
+        f"{name:<7} {pages} pages in {elapsed:6.2f}s ({pages / elapsed:6.0f} pages/s)"
+        f"   longest loop stall {max(stalls) * 1000:7.0f} ms"
+    )
+
+
+async def main(docs: int, pages: int, workers: int, pages_per_task: int) -> None:
+    pdfs = [make_pdf(pages=pages, seed=i) for i in range(docs)]
+    print(f"{docs} documents x {pages} pages, {workers} workers, {pages_per_task} pages per task")
+    await run("inline", extract_inline, pdfs)
+
+    pool = ExtractionPool(workers)
+    service = PDFService(pool=pool, pages_per_task=pages_per_task)
+    try:
+        # Spawning the workers is a one-off startup cost
+        await service.extract_pages(UploadFile(BytesIO(make_pdf(pages=1)), filename="warmup.pdf"))
+        await run("pool", service.extract_pages, pdfs)
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--pages-per-task", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.docs, args.pages, args.workers, args.pages_per_task))
@@ -0,0 +1,96 @@
+"""
+Database size, insert throughput and read latency of stored material text
+for each compression codec.
+
+Inserts the same generated lecture notes into a fresh SQLite database per
+codec (one commit per material, like uploads), then times loading the full
+text of random materials in new sessions. Install `zstandard` to include
+zstd.
+
+    python -m benchmarks.bench_text_compression --materials 500 --pages 20
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.core.config import settings
+from app.db.types import zstd_available
+from app.models import Base, Material, User
+from app.services.content_store import ContentStore
+from benchmarks.pdfs import page_lines
+
+
+def material_text(seed: int, pages: int) -> str:
+    return "\n\n".join(
+        "\n".join(page_lines(page, 40, seed)) for page in range(pages)
+    )
+
+
+async def run(codec: str, texts: list, reads: int) -> None:
+    settings.MATERIAL_COMPRESSION = codec
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_text_compression_"), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    store = ContentStore()
+
+    async with session_factory() as db:
+        user = User(email="bench@example.com", full_name="Bench", hashed_password="x")
+        db.add(user)
+        await db.commit()
+
+    ids = []
+    started = time.perf_counter()
+    async with session_factory() as db:
+        for i, text in enumerate(texts):
+            material = Material(title=f"Notes {i}", content=text, source_type="pdf", owner_id=user.id)
+            db.add(material)
+            await db.commit()
+            ids.append(material.id)
+    insert_elapsed = time.perf_counter() - started
+    await engine.dispose()
+    size = os.path.getsize(path) / 2**20
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    rng = random.Random(0)
+    latencies = []
+    for _ in range(reads):
+        started = time.perf_counter()
+        async with session_factory() as db:
+            material = await db.get(Material, rng.choice(ids))
+            await store.load_content(db, material)
+        latencies.append(time.perf_counter() - started)
+    await engine.dispose()
+
+    latencies.sort()
+    print(
+        f"{codec:<5} db {size:7.1f} MB   insert {len(texts) / insert_elapsed:6.0f} materials/s"
+        f"   read p50 {statistics.median(latencies) * 1000:6.2f} ms"
+        f"   p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:6.2f} ms"
+    )
+
+
+def main(materials: int, pages: int, reads: int) -> None:
+    texts = [material_text(seed, pages) for seed in range(materials)]
+    total = sum(len(text) for text in texts) / 2**20
+    print(f"{materials} materials, {total:.1f} MB of text, sections of {settings.MATERIAL_SECTION_CHARS} chars")
+    for codec in ("none", "zlib", "zstd") if zstd_available() else ("none", "zlib"):
+        asyncio.run(run(codec, texts, reads))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--materials", type=int, default=500)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--reads", type=int, default=500)
+    args = parser.parse_args()
+    main(args.materials, args.pages, args.reads)
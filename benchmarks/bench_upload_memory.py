@@ -0,0 +1,161 @@
+"""
+Server memory while large PDFs are uploaded concurrently.
+
+Starts the API under uvicorn in a subprocess (once per mode), uploads the
+same large PDF from several clients at once, and reports the server's
+peak RSS (and that of its PDF extraction workers). `buffered` is the
+pre-streaming implementation, which read the whole upload into bytes and
+parsed it in the server process; `streamed` is the current one, where
+workers parse the document from a file on disk. Finally an upload over
+MAX_UPLOAD_BYTES is sent to show it is refused early. Linux only (reads
+/proc).
+
+    python -m benchmarks.bench_upload_memory --uploads 10 --size-mb 50
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+import httpx
+from benchmarks.pdfs import make_pdf
+
+API = "/api/v1"
+MODES = ("buffered", "streamed")
+
+
+def serve(mode: str, port: int) -> None:
+    import uvicorn
+    from PyPDF2 import PdfReader
+    from app.db.session import engine
+    from app.main import app
+    from app.services.pdf_service import PDFService
+
+    if mode == "buffered":
+        async def buffered_extract_pages(self, file):
+            content = await file.read()
+            reader = PdfReader(BytesIO(content))
+            return [page.extract_text() or "" for page in reader.pages]
+
+        PDFService.extract_pages = buffered_extract_pages
+    engine.echo = False
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def children(pid: int) -> list:
+    with open(f"/proc/{pid}/task/{pid}/children") as listing:
+        return [int(child) for child in listing.read().split()]
+
+
+def memory_kb(pid: int, field: str) -> int:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise RuntimeError(f"{field} not reported for pid {pid}")
+
+
+async def wait_until_up(client: httpx.AsyncClient) -> None:
+    for _ in range(100):
+        try:
+            await client.get("/health")
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+async def sign_up(client: httpx.AsyncClient) -> dict:
+    credentials = {"email": "uploader@example.com", "password": "password123"}
+    await client.post(f"{API}/auth/signup", json={**credentials, "full_name": "Uploader"})
+    response = await client.post(f"{API}/auth/login", data={
+        "username": credentials["email"], "password": credentials["password"]
+    })
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def upload(client: httpx.AsyncClient, headers: dict, path: str) -> httpx.Response:
+    # The file handle is streamed by httpx, so the client never holds it all
+    with open(path, "rb") as pdf:
+        return await client.post(
+            f"{API}/materials/upload/pdf", headers=headers,
+            files={"file": ("large.pdf", pdf, "application/pdf")}, data={"title": "Large"}
+        )
+
+
+async def measure(mode: str, port: int, uploads: int, path: str, oversized: str, max_bytes: int) -> None:
+    env = {
+        **os.environ,
+        "SECRET_KEY": "benchmark",
+        "LLM_PROVIDER": "stub",
+        "MAX_UPLOAD_BYTES": str(max_bytes),
+        "PYTHONPATH": os.getcwd(),
+    }
+    workdir = tempfile.mkdtemp(prefix=f"bench_upload_{mode}_")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.bench_upload_memory", "--serve", mode, "--port", str(port)],
+        cwd=workdir, env=env
+    )
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None) as client:
+            await wait_until_up(client)
+            headers = await sign_up(client)
+            idle = memory_kb(server.pid, "VmRSS")
+
+            started = time.perf_counter()
+            responses = await asyncio.gather(*(upload(client, headers, path) for _ in range(uploads)))
+            elapsed = time.perf_counter() - started
+            for response in responses:
+                response.raise_for_status()
+            peak = memory_kb(server.pid, "VmHWM")
+            workers = [memory_kb(child, "VmHWM") for child in children(server.pid)]
+            print(
+                f"{mode:<9} idle {idle / 1024:7.1f} MB   peak {peak / 1024:7.1f} MB"
+                f"   (+{(peak - idle) / 1024:.1f} MB)   {uploads} uploads in {elapsed:.2f}s"
+            )
+            if workers:
+                print(f"{'':<9} {len(workers)} extraction workers, peak {max(workers) / 1024:.1f} MB each")
+
+            if mode == MODES[-1]:
+                started = time.perf_counter()
+                response = await upload(client, headers, oversized)
+                print(
+                    f"oversized upload -> {response.status_code} "
+                    f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+                )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def main(uploads: int, size_mb: int, port: int) -> None:
+    workdir = tempfile.mkdtemp(prefix="bench_upload_")
+    path = os.path.join(workdir, "large.pdf")
+    with open(path, "wb") as pdf:
+        pdf.write(make_pdf(pages=5, padding=size_mb * 1024 * 1024))
+    max_bytes = (size_mb + 1) * 1024 * 1024
+    oversized = os.path.join(workdir, "oversized.pdf")
+    with open(oversized, "wb") as pdf:
+        pdf.write(make_pdf(pages=5, padding=max_bytes))
+
+    print(f"{uploads} concurrent uploads of a {os.path.getsize(path) / 2**20:.1f} MB PDF")
+    for offset, mode in enumerate(MODES):
+        await measure(mode, port + offset, uploads, path, oversized, max_bytes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uploads", type=int, default=10)
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--serve", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.serve, args.port)
+    else:
+        asyncio.run(main(args.uploads, args.size_mb, args.port))
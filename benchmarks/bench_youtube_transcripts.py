@@ -0,0 +1,70 @@
+"""
+Throughput and event-loop stalls of YouTube transcript uploads.
+
+Fires concurrent transcript requests for a handful of popular videos at the
+fake transcript provider, which blocks like a network fetch. Once with the
+fetch called directly on the event loop (the pre-pool implementation) and
+once through YouTubeService's thread pool and transcript cache. Redis at
+REDIS_URL is used when reachable; without it the cache is process-local.
+
+    python -m benchmarks.bench_youtube_transcripts --requests 50 --videos 5 --latency 0.3
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from app.services.youtube_service import (
+    FakeTranscriptProvider,
+    YouTubeService,
+    close_transcript_executor,
+    extract_video_id,
+)
+from benchmarks.bench_pdf_extraction import ticker
+
+
+async def run(name: str, get_transcript, urls, provider: FakeTranscriptProvider) -> None:
+    provider.fetches = 0
+    stop, stalls = asyncio.Event(), []
+    probe = asyncio.create_task(ticker(stop, stalls))
+    started = time.perf_counter()
+    await asyncio.gather(*(get_transcript(url) for url in urls))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+    print(
+        f"{name:<7} {len(urls)} requests in {elapsed:6.2f}s ({len(urls) / elapsed:6.1f} req/s)"
+        f"   {provider.fetches:3d} fetches   longest loop stall {max(stalls) * 1000:6.0f} ms"
+    )
+
+
+async def main(requests: int, videos: int, latency: float) -> None:
+    # Unique ids per run, so a shared Redis doesn't answer from a previous one
+    run_id = f"{int(time.time()) % 100000:05d}"
+    urls = [
+        f"https://www.youtube.com/watch?v=b{run_id}{i % videos:05x}"
+        for i in range(requests)
+    ]
+    provider = FakeTranscriptProvider(latency=latency)
+    print(f"{requests} requests for {videos} videos, {latency}s per fetch")
+
+    async def inline(url: str) -> str:
+        return provider.fetch(extract_video_id(url))
+
+    await run("inline", inline, urls, provider)
+    service = YouTubeService(provider=provider)
+    try:
+        await run("pooled", service.get_transcript, urls, provider)
+    finally:
+        close_transcript_executor()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--videos", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.3)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.videos, args.latency))
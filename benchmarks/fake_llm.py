@@ -0,0 +1,121 @@
+"""
+Local fake of the OpenAI-compatible chat completions endpoint.
+
+Answers structured-output requests with schema-valid flashcards and
+questions derived from the prompt, after a configurable delay, so the
+generator can be exercised without network access or API spend.
+"""
+import asyncio
+import json
+import socket
+import threading
+import time
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+from app.services.llm_providers import build_stub_payload
+
+app = FastAPI()
+app.state.latency = 1.0  # seconds to wait before answering
+# Optional per-token costs on top of `latency`, to model prompt processing
+# and output decoding time of a real model
+app.state.prefill_latency = 0.0
+app.state.decode_latency = 0.0
+# Fault injection: status codes to fail the next requests with, and extra
+# seconds to delay the next requests by (both consumed front to back)
+app.state.errors = []
+app.state.delays = []
+# Running totals over all non-streaming requests
+app.state.usage = {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+
+def build_payload(prompt: str, content: str, schema: dict) -> dict:
+    """Build a response document matching the requested JSON schema."""
+    return build_stub_payload(prompt, content, schema.get("properties", {}))
+
+
+async def stream_completion(model: str, text: str):
+    """Emit the answer as chat.completion.chunk events, spread over the latency."""
+    pieces = [text[i:i + 40] for i in range(0, len(text), 40)]
+    await asyncio.sleep(app.state.latency * 0.1)
+    for piece in pieces:
+        chunk = {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+        await asyncio.sleep(app.state.latency * 0.9 / len(pieces))
+    chunk["choices"] = [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+    yield f"data: {json.dumps(chunk)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    if app.state.delays:
+        await asyncio.sleep(app.state.delays.pop(0))
+    if app.state.errors:
+        status_code = app.state.errors.pop(0)
+        return JSONResponse(
+            status_code=status_code,
+            content={"error": {"message": f"injected {status_code}", "code": status_code}}
+        )
+    messages = body["messages"]
+    prompt = " ".join(m["content"] for m in messages if m["role"] == "system")
+    content = " ".join(m["content"] for m in messages if m["role"] == "user")
+    schema = body.get("response_format", {}).get("json_schema", {}).get("schema", {})
+    text = json.dumps(build_payload(prompt, content, schema))
+
+    if body.get("stream"):
+        return StreamingResponse(
+            stream_completion(body.get("model", "fake"), text),
+            media_type="text/event-stream"
+        )
+
+    prompt_tokens = sum(len(m["content"]) for m in messages) // 4
+    completion_tokens = len(text) // 4
+    await asyncio.sleep(
+        app.state.latency
+        + prompt_tokens * app.state.prefill_latency
+        + completion_tokens * app.state.decode_latency
+    )
+    usage = app.state.usage
+    usage["requests"] += 1
+    usage["prompt_tokens"] += prompt_tokens
+    usage["completion_tokens"] += completion_tokens
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": text},
+            "finish_reason": "stop"
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    }
+
+
+def serve_in_thread(fake_app: FastAPI = app) -> str:
+    """Run the fake server on a free local port and return its base URL."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(
+        fake_app, host="127.0.0.1", port=port, log_level="warning"
+    ))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
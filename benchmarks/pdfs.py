@@ -0,0 +1,93 @@
+"""
+Synthetic PDF documents for benchmarks.
+
+Writes small, valid PDFs by hand (Helvetica text, one content stream per
+page) so benchmarks don't need a PDF authoring library.
+"""
+import random
+from typing import List, Optional
+
+WORDS = (
+    "cell membrane protein energy glucose enzyme nucleus mitochondria ribosome "
+    "photosynthesis chlorophyll respiration diffusion osmosis gradient molecule "
+    "structure function transport synthesis reaction catalyst substrate product "
+    "organism tissue organ system signal receptor hormone gene expression"
+).split()
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def page_lines(page: int, lines_per_page: int, seed: int = 0) -> List[str]:
+    """Deterministic sentences for one page."""
+    rng = random.Random(seed * 100003 + page)
+    lines = []
+    for line in range(lines_per_page):
+        words = rng.choices(WORDS, k=10)
+        lines.append(f"{' '.join(words).capitalize()} {page}.{line}.")
+    return lines
+
+
+def make_pdf(
+    pages: int = 3,
+    lines_per_page: int = 40,
+    header: Optional[str] = "Biology 101 Lecture Notes",
+    page_numbers: bool = True,
+    seed: int = 0,
+    padding: int = 0
+) -> bytes:
+    """
+    Build a PDF with `pages` pages of text, an optional running header and
+    page numbers. `padding` adds an unused binary stream of that many
+    bytes, standing in for embedded images in large documents.
+    """
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")  # filled in once the page tree exists
+    pages_obj = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    page_ids = []
+    for page in range(pages):
+        commands = ["BT", "/F1 10 Tf", "14 TL", "72 800 Td"]
+        if header:
+            commands.append(f"({_escape(header)}) Tj T*")
+        for line in page_lines(page, lines_per_page, seed):
+            commands.append(f"({_escape(line)}) Tj T*")
+        commands.append("ET")
+        if page_numbers:
+            commands += ["BT", "/F1 10 Tf", "300 40 Td", f"({page + 1}) Tj", "ET"]
+        stream = "\n".join(commands).encode("latin-1")
+        content = add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (pages_obj, font, content)
+        ))
+
+    if padding:
+        data = random.Random(seed).randbytes(padding)
+        add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(data), data))
+
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_obj
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[pages_obj - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog, xref
+    )
+    return bytes(out)
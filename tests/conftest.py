@@ -0,0 +1,41 @@
+import asyncio
+import os
+import pytest
+
+# Settings require these; tests never talk to the real services
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from app.models import Base, User
+
+
+@pytest.fixture
+def engine(tmp_path) -> AsyncEngine:
+    """Async engine on a fresh SQLite database with every table created."""
+    path = tmp_path / "test.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(sync_engine)
+    sync_engine.dispose()
+    # Tests run their scenario with asyncio.run; without pooling no
+    # connection outlives the event loop it was opened on
+    return create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+
+
+@pytest.fixture
+def session_factory(engine) -> async_sessionmaker:
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+@pytest.fixture
+def user(session_factory) -> User:
+    async def create() -> User:
+        async with session_factory() as db:
+            user = User(email="student@example.com", full_name="Student", hashed_password="x")
+            db.add(user)
+            await db.commit()
+            return user
+
+    return asyncio.run(create())
@@ -0,0 +1,122 @@
+import asyncio
+import time
+from typing import Dict, Optional
+import redis.asyncio as redis
+
+
+class FakeRedis:
+    """
+    In-memory stand-in for the subset of redis.asyncio used by the services.
+
+    Values are stored and returned as bytes, like the real client without
+    decode_responses.
+    """
+
+    def __init__(self):
+        self.values: Dict[str, bytes] = {}
+        self.expiry: Dict[str, float] = {}
+        self.zsets: Dict[str, Dict[bytes, float]] = {}
+        self.hashes: Dict[str, Dict[bytes, int]] = {}
+
+    @staticmethod
+    def _bytes(value) -> bytes:
+        return value if isinstance(value, bytes) else str(value).encode()
+
+    def _expire_stale(self, key: str) -> None:
+        if key in self.expiry and self.expiry[key] <= time.time():
+            self.values.pop(key, None)
+            self.expiry.pop(key, None)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        self._expire_stale(key)
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None, px=None, nx=False):
+        self._expire_stale(key)
+        if nx and key in self.values:
+            return None
+        self.values[key] = self._bytes(value)
+        if ex is not None:
+            self.expiry[key] = time.time() + ex
+        elif px is not None:
+            self.expiry[key] = time.time() + px / 1000
+        return True
+
+    async def setex(self, key, ttl, value):
+        return await self.set(key, value, ex=ttl)
+
+    async def expire(self, key, ttl):
+        if key in self.values:
+            self.expiry[key] = time.time() + ttl
+            return True
+        return False
+
+    async def delete(self, *keys):
+        removed = 0
+        for key in keys:
+            removed += self.values.pop(key, None) is not None
+            self.expiry.pop(key, None)
+        return removed
+
+    async def eval(self, script, numkeys, *args):
+        # Only SingleFlight's compare-and-delete and compare-and-extend lock
+        # scripts are supported; others fail like an unreachable server would
+        if 'redis.call("del"' not in script and 'redis.call("pexpire"' not in script:
+            raise redis.ConnectionError("scripting is not supported by FakeRedis")
+        key, token = args[0], args[1]
+        self._expire_stale(key)
+        if self.values.get(key) != self._bytes(token):
+            return 0
+        if 'redis.call("del"' in script:
+            return await self.delete(key)
+        self.expiry[key] = time.time() + int(args[2]) / 1000
+        return 1
+
+    async def zadd(self, key, mapping):
+        zset = self.zsets.setdefault(key, {})
+        added = 0
+        for member, score in mapping.items():
+            member = self._bytes(member)
+            added += member not in zset
+            zset[member] = score
+        return added
+
+    async def zrem(self, key, *members):
+        zset = self.zsets.get(key, {})
+        return sum(zset.pop(self._bytes(m), None) is not None for m in members)
+
+    async def zrangebyscore(self, key, low, high):
+        zset = self.zsets.get(key, {})
+        return [m for m, s in sorted(zset.items(), key=lambda i: i[1]) if low <= s <= high]
+
+    async def bzpopmin(self, keys, timeout=0):
+        keys = [keys] if isinstance(keys, str) else keys
+        deadline = time.time() + timeout
+        while True:
+            for key in keys:
+                zset = self.zsets.get(key)
+                if zset:
+                    member, score = min(zset.items(), key=lambda i: i[1])
+                    del zset[member]
+                    return (key.encode(), member, score)
+            if time.time() >= deadline:
+                return None
+            await asyncio.sleep(0.01)
+
+    async def hincrby(self, key, field, amount=1):
+        fields = self.hashes.setdefault(key, {})
+        field = self._bytes(field)
+        fields[field] = fields.get(field, 0) + amount
+        return fields[field]
+
+    async def hgetall(self, key):
+        return {f: self._bytes(v) for f, v in self.hashes.get(key, {}).items()}
+
+
+class UnreachableRedis:
+    """Client whose every command fails as if the server were down."""
+
+    def __getattr__(self, name):
+        async def command(*args, **kwargs):
+            raise redis.ConnectionError("Redis is unreachable")
+        return command
@@ -0,0 +1,151 @@
+import asyncio
+import pytest
+from app.core.config import settings
+from app.services.ai_generator import AIGenerator, _take_spread
+from app.services.chunking import pack_sections, split_into_chunks, spread_counts
+from app.services.llm_providers import StubProvider
+from app.services.resilience import Resilience
+from app.utils.text import section_bounds
+
+
+def make_text(paragraphs: int) -> str:
+    return "\n\n".join(
+        f"Paragraph {i}. " + " ".join(f"word{i}_{n}" for n in range(12)) + "."
+        for i in range(paragraphs)
+    )
+
+
+@pytest.mark.parametrize("max_chars,overlap", [(120, 0), (120, 30), (200, 50), (61, 15)])
+def test_chunks_stay_within_bounds_and_overlap(max_chars, overlap):
+    text = make_text(20) + "\n\n" + "A very long paragraph without breaks. " * 10
+
+    chunks = split_into_chunks(text, max_chars, overlap)
+
+    assert len(chunks) > 1
+    # Separators between an overlap tail and the next unit count too
+    assert all(len(chunk) <= max_chars for chunk in chunks)
+    words = text.split()
+    assert set(" ".join(chunks).split()) == set(words)
+    if overlap:
+        for previous, chunk in zip(chunks, chunks[1:]):
+            # Each chunk starts with the tail of the one before
+            shared = max(n for n in range(overlap + 1) if previous.endswith(chunk[:n]))
+            assert shared > 0
+
+
+def test_overlap_tail_and_separator_fit_in_the_chunk():
+    # A unit just under max_chars - overlap used to overflow by the separator
+    text = "x" * 30 + "\n\n" + " ".join(["abc"] * 15)
+
+    chunks = split_into_chunks(text, 64, 4)
+
+    assert chunks[1].startswith("xxxx\n\n")
+    assert all(len(chunk) <= 64 for chunk in chunks)
+
+
+def test_short_text_is_a_single_chunk():
+    assert split_into_chunks("  Cells.  ", 100, 20) == ["Cells."]
+    assert split_into_chunks("   ", 100) == []
+
+
+def test_sections_are_packed_as_stored():
+    text = make_text(20)
+    sections = [text[start:end] for start, end in section_bounds(text, 100)]
+
+    chunks = pack_sections(sections, 250, 30)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 250 for chunk in chunks)
+    # Whole sections plus the text just before them, nothing re-split
+    assert all(chunk in text for chunk in chunks)
+    assert any(chunks[0] == "".join(sections[:k]).strip() for k in range(1, len(sections)))
+    assert text.strip().endswith(chunks[-1])
+    # A section longer than a chunk is still split
+    assert all(len(chunk) <= 60 for chunk in pack_sections([text], 60, 10))
+
+
+def test_spread_counts_sum_to_the_total_and_sample_the_whole_document():
+    assert spread_counts(10, 4) == [2, 3, 2, 3]
+    assert spread_counts(2, 5) == [0, 1, 0, 1, 0]
+    assert spread_counts(3, 0) == []
+    for total in range(12):
+        counts = spread_counts(total, 5)
+        assert sum(counts) == total and max(counts) - min(counts) <= 1
+
+
+def test_take_spread_picks_round_robin_in_document_order():
+    per_chunk = [["a1", "a2", "a3"], ["b1"], [], ["d1", "d2"]]
+    assert _take_spread(per_chunk, 4) == ["a1", "a2", "b1", "d1"]
+    assert _take_spread(per_chunk, 5) == ["a1", "a2", "b1", "d1", "d2"]
+    # Asking for more than exists returns everything
+    assert _take_spread(per_chunk, 10) == ["a1", "a2", "a3", "b1", "d1", "d2"]
+
+
+def test_map_reduce_dedupes_fills_and_returns_the_exact_counts(monkeypatch):
+    monkeypatch.setattr(settings, "GENERATION_CHUNK_SIZE", 200)
+    monkeypatch.setattr(settings, "GENERATION_CHUNK_OVERLAP", 0)
+    text = make_text(6)
+    chunks = split_into_chunks(text, 200)
+    requests = []
+
+    async def request(chunk, counts):
+        index = chunks.index(chunk)
+        round_ = sum(1 for i, _ in requests if i == index)
+        requests.append((index, list(counts)))
+        # The first round under-delivers flashcards and repeats one of
+        # another chunk's; questions come back complete
+        cards = [f"Card {index}.{round_}.{n}" for n in range(counts[0])]
+        if round_ == 0 and cards:
+            cards = cards[:-1] + ["card 0.0.0!"]
+        questions = [f"Question {index}.{n}" for n in range(counts[1])]
+        return [cards, questions]
+
+    async def scenario():
+        generator = AIGenerator(provider=StubProvider(latency=0), resilience=Resilience())
+        return await generator._generate_chunked_multi(
+            text, [7, 5], request, keys=[str, str], excludes=[["Card 1.0.0"], []]
+        )
+
+    cards, questions = asyncio.run(scenario())
+
+    assert len(chunks) >= 3
+    first_round = [counts for _, counts in requests[:len(chunks)]]
+    assert [counts[0] for counts in first_round] == spread_counts(7, len(chunks))
+    assert [counts[1] for counts in first_round] == spread_counts(5, len(chunks))
+    # A fill round asked only for the missing flashcards
+    assert any(counts[1] == 0 and counts[0] > 0 for _, counts in requests[len(chunks):])
+    assert len(cards) == 7 and len(questions) == 5
+    assert len({card.lower().strip("!") for card in cards}) == 7
+    assert "Card 1.0.0" not in cards
+    # Kept in document order
+    assert [int(q.split()[1].split(".")[0]) for q in questions] == sorted(
+        int(q.split()[1].split(".")[0]) for q in questions
+    )
+
+
+def test_stream_fills_the_shortfall_of_its_chunks(monkeypatch):
+    monkeypatch.setattr(settings, "GENERATION_CHUNK_SIZE", 200)
+    monkeypatch.setattr(settings, "GENERATION_CHUNK_OVERLAP", 0)
+    text = make_text(6)
+    chunks = split_into_chunks(text, 200)
+    requests = []
+
+    async def stream_chunk(chunk, n):
+        index = chunks.index(chunk)
+        round_ = sum(1 for i, _ in requests if i == index)
+        requests.append((index, n))
+        # Every chunk comes back one item short the first time
+        for i in range(n - 1 if round_ == 0 else n):
+            yield f"Card {index}.{round_}.{i}"
+
+    async def scenario():
+        generator = AIGenerator(provider=StubProvider(latency=0), resilience=Resilience())
+        return [card async for card in generator._stream_chunked(text, 7, stream_chunk, key=str)]
+
+    cards = asyncio.run(scenario())
+
+    assert len(chunks) >= 3
+    assert len(cards) == 7 and len(set(cards)) == 7
+    first_round = [n for n in spread_counts(7, len(chunks)) if n]
+    # The fill round asked only for what the first one was short
+    assert sum(n for _, n in requests[len(first_round):]) == len(first_round)
@@ -0,0 +1,148 @@
+import asyncio
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from app.core.config import settings
+from app.db.types import RAW, ZLIB, compress_text, decompress_text, zstd_available
+from app.models import ContentBlob, Flashcard, Material, MaterialSection
+from app.services.content_store import ContentStore
+
+
+def test_identical_text_shares_one_refcounted_blob(session_factory, user):
+    async def scenario():
+        store = ContentStore()
+
+        async def blobs():
+            async with session_factory() as db:
+                query = select(ContentBlob).options(selectinload(ContentBlob.sections))
+                return {blob.text: blob.ref_count for blob in (await db.execute(query)).scalars()}
+
+        async with session_factory() as db:
+            # Two identical texts in one flush, a third in a later one
+            first, second = [
+                Material(title=f"Cells {i}", content="Cells are the unit of life.",
+                         source_hash="abc", source_type="pdf", owner_id=user.id)
+                for i in range(2)
+            ]
+            other = Material(title="Atoms", content="Atoms make up matter.", source_type="pdf", owner_id=user.id)
+            db.add_all([first, second, other])
+            await db.commit()
+            third = Material(title="Cells again", content="Cells are the unit of life.", source_type="pdf", owner_id=user.id)
+            db.add(third)
+            await db.commit()
+            db.add(Flashcard(id="fc_1", material_id=first.id, user_id=user.id, front="Q", back="A"))
+            await db.commit()
+
+        assert await blobs() == {"Cells are the unit of life.": 3, "Atoms make up matter.": 1}
+
+        async with session_factory() as db:
+            blob = await store.find_by_source(db, "abc")
+            assert blob.text == "Cells are the unit of life."
+            assert await store.find_by_source(db, "missing") is None
+
+            for material_id in (first.id, second.id, other.id):
+                await store.delete_material(db, await db.get(Material, material_id))
+            assert (await db.execute(select(Flashcard))).first() is None
+
+        assert await blobs() == {"Cells are the unit of life.": 1}
+
+        async with session_factory() as db:
+            material = await db.get(Material, third.id)
+            assert await store.load_content(db, material) == "Cells are the unit of life."
+            assert material.content == "Cells are the unit of life."
+            await store.delete_material(db, material)
+        assert await blobs() == {}
+        async with session_factory() as db:
+            # Sections went with their blob
+            assert (await db.execute(select(MaterialSection))).first() is None
+
+    asyncio.run(scenario())
+
+
+def test_sections_cover_the_text(monkeypatch):
+    monkeypatch.setattr(settings, "MATERIAL_SECTION_CHARS", 50)
+    paragraphs = [f"Paragraph {i} about cells and the energy they need to live." for i in range(6)]
+    text = "\n\n".join(paragraphs) + " " + "x" * 120
+
+    blob = ContentBlob.from_text(text)
+    assert blob.text == text
+    assert blob.text is blob.text
+    assert [s.index for s in blob.sections] == list(range(len(blob.sections)))
+    for previous, section in zip(blob.sections, blob.sections[1:]):
+        assert previous.end == section.start
+    for section in blob.sections:
+        assert section.text == text[section.start:section.end]
+        assert len(section.text) <= 50
+        assert section.token_estimate == len(section.text) // 4
+    # Cut after a separator where one keeps the section at least half full
+    assert blob.sections[0].text.endswith(" ")
+    assert blob.char_count == len(text)
+
+
+def test_section_text_is_stored_compressed(engine, session_factory, user, monkeypatch):
+    monkeypatch.setattr(settings, "MATERIAL_COMPRESSION_MIN_BYTES", 100)
+    long_text = "Mitochondria produce most of the cell's energy. " * 40
+    for codec in ("none", "zlib", "zstd") if zstd_available() else ("none", "zlib"):
+        monkeypatch.setattr(settings, "MATERIAL_COMPRESSION", codec)
+        assert decompress_text(compress_text(long_text)) == long_text
+        assert decompress_text(compress_text("Short.")) == "Short."
+        assert compress_text("Short.")[:1] == RAW
+    monkeypatch.setattr(settings, "MATERIAL_COMPRESSION", "zlib")
+    assert compress_text(long_text)[:1] == ZLIB
+
+    async def scenario():
+        async with session_factory() as db:
+            db.add(Material(title="Cells", content=long_text, source_type="pdf", owner_id=user.id))
+            await db.commit()
+
+        async with engine.connect() as conn:
+            stored = (await conn.exec_driver_sql("SELECT text FROM material_sections")).scalars().all()
+        assert all(isinstance(value, bytes) for value in stored)
+        assert sum(map(len, stored)) < len(long_text) // 4
+
+        async with session_factory() as db:
+            material = (await db.execute(select(Material))).scalar_one()
+            assert await ContentStore().load_content(db, material) == long_text
+            # Joined once, until the sections are loaded again
+            assert material.content is material.content
+            await db.refresh(material.blob, ["sections"])
+            assert "_text" not in material.blob.__dict__
+            assert material.content == long_text
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_uploads_and_deletes_keep_shared_content(session_factory, user):
+    async def scenario():
+        store = ContentStore()
+        text = "Cells are the unit of life. " * 50
+
+        async def upload(i: int) -> int:
+            async with session_factory() as db:
+                material = Material(title=f"Cells {i}", content=text, source_type="pdf", owner_id=user.id)
+                db.add(material)
+                await asyncio.sleep(0)
+                await db.commit()
+                return material.id
+
+        async def delete(material_id: int) -> None:
+            async with session_factory() as db:
+                await store.delete_material(db, await db.get(Material, material_id))
+
+        # Concurrent first uploads of one text, then more alongside deletes
+        first = await asyncio.gather(*(upload(i) for i in range(4)))
+        uploaded = await asyncio.gather(*(upload(i) for i in range(4, 7)), *(delete(m) for m in first[:3]))
+        surviving = [first[3]] + uploaded[:3]
+
+        async with session_factory() as db:
+            blob = (await db.execute(select(ContentBlob))).scalar_one()
+            assert blob.ref_count == len(surviving) == 4
+            for material_id in surviving:
+                material = await db.get(Material, material_id)
+                assert await store.load_content(db, material) == text
+
+        await asyncio.gather(*(delete(m) for m in surviving))
+        async with session_factory() as db:
+            assert (await db.execute(select(ContentBlob))).first() is None
+            assert (await db.execute(select(MaterialSection))).first() is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,222 @@
+import asyncio
+from typing import List
+from sqlalchemy import func, select
+from app.models import Flashcard, Material, Question, TokenUsage, User
+from app.schemas.ai_content import Flashcard as FlashcardSchema, SingleQuestion, StudySet
+from app.services.ai_generator import AIGenerator
+from app.services.generation import GenerationService
+from app.services.generation_cache import GenerationCache
+from app.services.llm_providers import StubProvider
+from app.services.resilience import Resilience
+from app.services.single_flight import SingleFlight
+from app.services.usage import TokenQuota
+from tests.fake_redis import FakeRedis
+
+
+def make_flashcards(n: int) -> List[FlashcardSchema]:
+    return [FlashcardSchema(id=f"fc_{i}", front=f"Front {i}", back=f"Back {i}") for i in range(n)]
+
+
+def make_questions(n: int) -> List[SingleQuestion]:
+    return [
+        SingleQuestion(
+            id=f"q_{i}",
+            category="Biology",
+            question=f"Question {i}?",
+            options=["A", "B", "C", "D"],
+            answer="A",
+            explanation="Because."
+        )
+        for i in range(n)
+    ]
+
+
+class StubGenerator:
+    def __init__(self, latency: float = 0):
+        self.calls = []
+        self.latency = latency
+
+    async def generate_flashcards(self, text: str, num_cards: int = 20, **kwargs):
+        self.calls.append("flashcards")
+        await asyncio.sleep(self.latency)
+        return make_flashcards(num_cards)
+
+    async def generate_questions(self, text: str, num_questions: int = 20, **kwargs):
+        self.calls.append("questions")
+        await asyncio.sleep(self.latency)
+        return make_questions(num_questions)
+
+    async def generate_study_set(self, text: str, num_cards: int = 20, num_questions: int = 20, **kwargs):
+        self.calls.append("study_set")
+        await asyncio.sleep(self.latency)
+        return StudySet(flashcards=make_flashcards(num_cards), questions=make_questions(num_questions))
+
+
+async def add_material(session_factory, owner: User) -> Material:
+    async with session_factory() as db:
+        material = Material(title="Cells", content="Cells are the unit of life.", source_type="pdf", owner_id=owner.id)
+        db.add(material)
+        await db.commit()
+    return material
+
+
+def make_service(generator) -> GenerationService:
+    redis_client = FakeRedis()
+    return GenerationService(
+        generator,
+        GenerationCache(redis_client),
+        SingleFlight(redis_client),
+        TokenQuota(redis_client)
+    )
+
+
+def test_study_set_generates_both_sets_in_one_call(session_factory, user):
+    async def scenario():
+        material = await add_material(session_factory, user)
+        generator = StubGenerator()
+        service = make_service(generator)
+
+        async with session_factory() as db:
+            other = User(email="other@example.com", full_name="Other", hashed_password="x")
+            db.add(other)
+            await db.commit()
+            study_set = await service.get_or_generate_study_set(db, material, user.id, num_cards=4, num_questions=3)
+        async with session_factory() as db:
+            counts = (
+                await db.scalar(select(func.count()).select_from(Flashcard)),
+                await db.scalar(select(func.count()).select_from(Question)),
+            )
+            # A second user's flashcards come from the cache entry the combined call filled
+            cards = await service.get_or_generate_flashcards(db, material, other.id, num_cards=4)
+        return study_set, counts, cards, generator.calls
+
+    study_set, counts, cards, calls = asyncio.run(scenario())
+    assert len(study_set.flashcards) == 4
+    assert len(study_set.questions) == 3
+    assert counts == (4, 3)
+    assert [card.front for card in cards] == [card.front for card in study_set.flashcards]
+    assert calls == ["study_set"]
+
+
+def test_study_set_only_generates_the_missing_kind(session_factory, user):
+    async def scenario():
+        material = await add_material(session_factory, user)
+        generator = StubGenerator()
+        service = make_service(generator)
+
+        async with session_factory() as db:
+            flashcards = await service.get_or_generate_flashcards(db, material, user.id, num_cards=4)
+            study_set = await service.get_or_generate_study_set(db, material, user.id, num_cards=4, num_questions=3)
+        return flashcards, study_set, generator.calls
+
+    flashcards, study_set, calls = asyncio.run(scenario())
+    assert [card.id for card in study_set.flashcards] == [card.id for card in flashcards]
+    assert len(study_set.questions) == 3
+    assert calls == ["flashcards", "questions"]
+
+
+def test_study_set_waits_for_concurrent_single_kind_calls(session_factory, user):
+    async def scenario():
+        material = await add_material(session_factory, user)
+        generator = StubGenerator(latency=0.05)
+        service = make_service(generator)
+
+        async def call(method, **params):
+            async with session_factory() as db:
+                return await getattr(service, method)(db, material, user.id, **params)
+
+        flashcards, study_set, questions = await asyncio.gather(
+            call("get_or_generate_flashcards", num_cards=4),
+            call("get_or_generate_study_set", num_cards=4, num_questions=3),
+            call("get_or_generate_questions", num_questions=3)
+        )
+        async with session_factory() as db:
+            counts = (
+                await db.scalar(select(func.count()).select_from(Flashcard)),
+                await db.scalar(select(func.count()).select_from(Question)),
+            )
+        return flashcards, study_set, questions, counts
+
+    flashcards, study_set, questions, counts = asyncio.run(scenario())
+    assert counts == (4, 3)
+    assert sorted(card.id for card in study_set.flashcards) == sorted(card.id for card in flashcards)
+    assert sorted(q.id for q in study_set.questions) == sorted(q.id for q in questions)
+
+
+def test_top_up_during_a_generation_gets_its_own_items(session_factory, user):
+    async def scenario():
+        material = await add_material(session_factory, user)
+        generator = StubGenerator(latency=0.05)
+        service = make_service(generator)
+
+        async def call(**params):
+            async with session_factory() as db:
+                return await service.get_or_generate_questions(db, material, user.id, **params)
+
+        async def top_up():
+            # Arrives while the first generation is running
+            await asyncio.sleep(0.01)
+            return await call(num_questions=5)
+
+        first, twin, topped_up = await asyncio.gather(call(num_questions=3), call(num_questions=3), top_up())
+        async with session_factory() as db:
+            stored = await db.scalar(select(func.count()).select_from(Question))
+        return first, twin, topped_up, stored, generator.calls
+
+    first, twin, topped_up, stored, calls = asyncio.run(scenario())
+    assert [q.id for q in twin] == [q.id for q in first]
+    assert len(topped_up) == 5
+    assert stored == 5
+    assert calls == ["questions", "questions"]
+
+
+def test_top_up_generates_only_the_missing_items(session_factory, user):
+    async def scenario():
+        material = await add_material(session_factory, user)
+        service = make_service(AIGenerator(provider=StubProvider(latency=0), resilience=Resilience()))
+        async with session_factory() as db:
+            first = await service.get_or_generate_questions(db, material, user.id, num_questions=3)
+            topped_up = await service.get_or_generate_questions(db, material, user.id, num_questions=5)
+            unchanged = await service.get_or_generate_questions(db, material, user.id, num_questions=4)
+            more = await service.get_or_generate_questions(db, material, user.id, additional=2)
+        async with session_factory() as db:
+            stored = await db.scalar(select(func.count()).select_from(Question))
+            usage = (await db.execute(select(TokenUsage.completion_tokens))).scalars().all()
+        return first, topped_up, unchanged, more, stored, usage
+
+    first, topped_up, unchanged, more, stored, usage = asyncio.run(scenario())
+    assert [q.id for q in topped_up[:3]] == [q.id for q in first]
+    assert len(topped_up) == 5
+    assert len(unchanged) == 5
+    assert len(more) == 7
+    assert len({q.question for q in more}) == 7
+    assert stored == 7
+    # Three generations, the top-ups paying only for their own items
+    assert len(usage) == 3
+    assert usage[1] < usage[0]
+
+
+class ShortGenerator(StubGenerator):
+    """Returns one flashcard fewer than asked, like a model cutting its answer short."""
+
+    async def generate_flashcards(self, text: str, num_cards: int = 20, **kwargs):
+        return (await super().generate_flashcards(text, num_cards, **kwargs))[:-1]
+
+
+def test_short_generations_are_not_shared_through_the_cache(session_factory, user):
+    async def scenario():
+        material = await add_material(session_factory, user)
+        generator = ShortGenerator()
+        service = make_service(generator)
+        async with session_factory() as db:
+            other = User(email="other@example.com", full_name="Other", hashed_password="x")
+            db.add(other)
+            await db.commit()
+            first = await service.get_or_generate_flashcards(db, material, user.id, num_cards=4)
+            second = await service.get_or_generate_flashcards(db, material, other.id, num_cards=4)
+        return first, second, generator.calls
+
+    first, second, calls = asyncio.run(scenario())
+    assert len(first) == len(second) == 3
+    # The second user got a generation of their own, not the short one
+    assert calls == ["flashcards", "flashcards"]
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import time
+from app.core.config import settings
+from app.services import generation_cache
+from app.services.generation_cache import GenerationCache
+from tests.fake_redis import FakeRedis, UnreachableRedis
+
+ITEMS = [{"id": "fc_1", "front": "What is a cell?", "back": "The unit of life."}]
+
+
+def test_key_covers_everything_that_shapes_the_output(monkeypatch):
+    cache = GenerationCache(FakeRedis())
+    key = cache.make_key("Cells are  the unit\nof life.", "flashcards", 20)
+
+    assert key.startswith("gencache:flashcards:")
+    # Whitespace differences don't matter, the content does
+    assert cache.make_key("Cells are the unit of life.", "flashcards", 20) == key
+    assert cache.make_key("Atoms make up matter.", "flashcards", 20) != key
+    assert cache.make_key("Cells are the unit of life.", "questions", 20) != key
+    assert cache.make_key("Cells are the unit of life.", "flashcards", 10) != key
+
+    monkeypatch.setattr(settings, "LLM_MODEL", "another-model")
+    assert cache.make_key("Cells are the unit of life.", "flashcards", 20) != key
+    monkeypatch.undo()
+    monkeypatch.setattr(generation_cache, "PROMPT_VERSION", generation_cache.PROMPT_VERSION + 1)
+    assert cache.make_key("Cells are the unit of life.", "flashcards", 20) != key
+
+
+def test_hits_and_misses_are_counted_and_ttl_refreshed():
+    async def scenario():
+        redis_client = FakeRedis()
+        cache = GenerationCache(redis_client)
+        cache.ttl = 60
+        key = cache.make_key("Cells.", "flashcards", 1)
+
+        assert await cache.get(key) is None
+        await cache.set(key, ITEMS)
+        redis_client.expiry[key] = time.time() + 5
+        assert await cache.get(key) == ITEMS
+        # A hit pushes the expiry back out to the full TTL
+        assert redis_client.expiry[key] > time.time() + 55
+        assert await cache.get(key) == ITEMS
+
+        assert (cache.hits, cache.misses) == (2, 1)
+        assert await cache.stats() == {"hits": 2, "misses": 1}
+
+        # Counters shared through Redis include other processes' lookups
+        other = GenerationCache(redis_client)
+        assert await other.get(cache.make_key("Atoms.", "flashcards", 1)) is None
+        assert await cache.stats() == {"hits": 2, "misses": 2}
+
+    asyncio.run(scenario())
+
+
+def test_disk_tier_backs_redis_and_evicts_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "GENERATION_CACHE_DIR", str(tmp_path))
+
+    async def scenario():
+        cache = GenerationCache(FakeRedis())
+        keys = [cache.make_key(f"Material {i}.", "flashcards", 1) for i in range(3)]
+        for key in keys:
+            await cache.set(key, ITEMS)
+        entry_size = cache._disk_path(keys[0]).stat().st_size
+        # Oldest first, then the first entry is used again
+        for age, key in zip((300, 200, 100), keys):
+            os.utime(cache._disk_path(key), (time.time() - age, time.time() - age))
+        cache.redis = FakeRedis()
+        assert await cache.get(keys[0]) == ITEMS
+        # Read back from disk into Redis
+        assert await cache.redis.get(keys[0]) is not None
+
+        cache.disk_max_bytes = entry_size * 3
+        newest = cache.make_key("Material 3.", "flashcards", 1)
+        await cache.set(newest, ITEMS)
+
+        on_disk = {key for key in keys + [newest] if cache._disk_path(key).exists()}
+        assert on_disk == {keys[0], keys[2], newest}
+
+    asyncio.run(scenario())
+
+
+def test_unreachable_redis_falls_back_to_disk_and_local_counters(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "GENERATION_CACHE_DIR", str(tmp_path))
+
+    async def scenario():
+        cache = GenerationCache(UnreachableRedis())
+        key = cache.make_key("Cells.", "questions", 1)
+        assert await cache.get(key) is None
+        await cache.set(key, ITEMS)
+        assert await cache.get(key) == ITEMS
+        assert await cache.stats() == {"hits": 1, "misses": 1}
+
+    asyncio.run(scenario())
@@ -0,0 +1,298 @@
+import asyncio
+from typing import List
+import httpx
+import redis.asyncio as redis
+from fastapi import FastAPI
+from app.api.v1.endpoints import materials
+from app.core.dependencies import get_async_db, get_current_active_user
+from app.models import Flashcard, Material
+from app.schemas.ai_content import Flashcard as FlashcardSchema
+from app.schemas.job import Job, JobState
+from app.services.generation import GenerationService
+from app.services.generation_cache import GenerationCache
+from app.services.jobs import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, JobFailed, JobQueue
+from app.services.single_flight import SingleFlight
+from app.worker import GenerationJobHandler, Worker
+from tests.fake_redis import FakeRedis
+
+
+class StubGenerator:
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_flashcards(self, text: str, num_cards: int = 20, **kwargs) -> List[FlashcardSchema]:
+        self.calls += 1
+        return [
+            FlashcardSchema(id=f"fc_{i}", front=f"Front {i}", back=f"Back {i}")
+            for i in range(num_cards)
+        ]
+
+
+def make_queue() -> JobQueue:
+    queue = JobQueue(FakeRedis())
+    queue.retry_backoff = 0.01
+    return queue
+
+
+async def run_until_finished(worker: Worker, queue: JobQueue, job_ids: List[str]):
+    stop = asyncio.Event()
+    task = asyncio.create_task(worker.run(stop))
+    for _ in range(500):
+        jobs = [await queue.get(job_id) for job_id in job_ids]
+        if all(job.state in (JobState.SUCCEEDED, JobState.FAILED) for job in jobs):
+            break
+        await asyncio.sleep(0.01)
+    stop.set()
+    await task
+    return jobs
+
+
+def test_higher_priority_jobs_are_dequeued_first():
+    async def scenario():
+        queue = make_queue()
+        low = await queue.enqueue("flashcards", 1, 1, priority=PRIORITY_BACKGROUND)
+        high = await queue.enqueue("questions", 2, 1, priority=PRIORITY_INTERACTIVE)
+        first = await queue.dequeue(timeout=0)
+        second = await queue.dequeue(timeout=0)
+        return low, high, first, second
+
+    low, high, first, second = asyncio.run(scenario())
+    assert first.id == high.id
+    assert second.id == low.id
+    assert first.state == JobState.RUNNING
+    assert first.attempts == 1
+
+
+def test_failed_jobs_are_retried_with_backoff():
+    attempts = []
+
+    async def flaky(job):
+        attempts.append(job.attempts)
+        if len(attempts) < 3:
+            raise RuntimeError("upstream unavailable")
+        return {"count": 20}
+
+    async def scenario():
+        queue = make_queue()
+        job = await queue.enqueue("flashcards", 1, 1)
+        return await run_until_finished(Worker(queue, flaky, poll_timeout=0.01), queue, [job.id])
+
+    [job] = asyncio.run(scenario())
+    assert attempts == [1, 2, 3]
+    assert job.state == JobState.SUCCEEDED
+    assert job.result == {"count": 20}
+
+
+def test_jobs_fail_after_max_attempts_or_permanent_errors():
+    async def always_fails(job):
+        if job.kind == "questions":
+            raise JobFailed("Material not found")
+        raise RuntimeError("upstream unavailable")
+
+    async def scenario():
+        queue = make_queue()
+        retried = await queue.enqueue("flashcards", 1, 1)
+        permanent = await queue.enqueue("questions", 1, 1)
+        return await run_until_finished(Worker(queue, always_fails, poll_timeout=0.01), queue, [retried.id, permanent.id])
+
+    retried, permanent = asyncio.run(scenario())
+    assert retried.state == JobState.FAILED
+    assert retried.attempts == 3
+    assert retried.error == "upstream unavailable"
+    assert permanent.state == JobState.FAILED
+    assert permanent.attempts == 1
+
+
+def test_worker_respects_concurrency_limit():
+    active = 0
+    peak = 0
+
+    async def slow(job):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+        return {}
+
+    async def scenario():
+        queue = make_queue()
+        jobs = [await queue.enqueue("flashcards", i, 1) for i in range(6)]
+        return await run_until_finished(Worker(queue, slow, concurrency=2, poll_timeout=0.01), queue, [j.id for j in jobs])
+
+    jobs = asyncio.run(scenario())
+    assert all(job.state == JobState.SUCCEEDED for job in jobs)
+    assert peak == 2
+
+
+def test_background_jobs_keep_slots_free_for_interactive_jobs():
+    active_background = 0
+    peak_background = 0
+    order = []
+
+    async def slow(job):
+        nonlocal active_background, peak_background
+        if job.priority == PRIORITY_BACKGROUND:
+            active_background += 1
+            peak_background = max(peak_background, active_background)
+        order.append(job.kind)
+        await asyncio.sleep(0.05)
+        if job.priority == PRIORITY_BACKGROUND:
+            active_background -= 1
+        return {}
+
+    async def scenario():
+        queue = make_queue()
+        jobs = [await queue.enqueue("flashcards", i, 1, priority=PRIORITY_BACKGROUND) for i in range(3)]
+        jobs += [await queue.enqueue("questions", i, 1) for i in range(2)]
+        worker = Worker(queue, slow, concurrency=3, poll_timeout=0.01)
+        worker.background_concurrency = 1
+        return await run_until_finished(worker, queue, [j.id for j in jobs])
+
+    jobs = asyncio.run(scenario())
+    assert all(job.state == JobState.SUCCEEDED for job in jobs)
+    assert peak_background == 1
+    assert order[:2] == ["questions", "questions"]
+
+
+def test_generation_job_stores_flashcards(session_factory, user):
+    async def scenario():
+        async with session_factory() as db:
+            material = Material(title="Cells", content="Cells are the unit of life.", source_type="pdf", owner_id=user.id)
+            db.add(material)
+            await db.commit()
+
+        redis_client = FakeRedis()
+        generator = StubGenerator()
+        handler = GenerationJobHandler(
+            GenerationService(generator, GenerationCache(redis_client), SingleFlight(redis_client)),
+            session_factory=session_factory
+        )
+        queue = make_queue()
+        job = await queue.enqueue("flashcards", material.id, user.id, params={"num_cards": 5})
+        [job] = await run_until_finished(Worker(queue, handler, poll_timeout=0.01), queue, [job.id])
+
+        async with session_factory() as db:
+            stored = (await db.execute(Flashcard.__table__.select())).all()
+        return job, stored, generator.calls
+
+    job, stored, calls = asyncio.run(scenario())
+    assert job.state == JobState.SUCCEEDED
+    assert job.result == {"count": 5}
+    assert len(stored) == 5
+    assert calls == 1
+
+
+def test_queued_top_ups_generate_nothing_when_replayed(session_factory, user, monkeypatch):
+    async def scenario():
+        async with session_factory() as db:
+            material = Material(title="Cells", content="Cells are the unit of life.", source_type="pdf", owner_id=user.id)
+            db.add(material)
+            await db.commit()
+
+        redis_client = FakeRedis()
+        handler = GenerationJobHandler(
+            GenerationService(StubGenerator(), GenerationCache(redis_client), SingleFlight(redis_client)),
+            session_factory=session_factory
+        )
+        queue = make_queue()
+        monkeypatch.setattr(materials, "job_queue", queue)
+        app = FastAPI()
+        app.include_router(materials.router, prefix="/materials")
+
+        async def db_session():
+            async with session_factory() as db:
+                yield db
+
+        app.dependency_overrides[get_async_db] = db_session
+        app.dependency_overrides[get_current_active_user] = lambda: user
+
+        await handler(Job(id="job_0", kind="flashcards", material_id=material.id, user_id=user.id,
+                          params={"num_cards": 5}))
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.post(
+                f"/materials/{material.id}/generate-flashcards", params={"additional": 2, "background": True}
+            )
+        job = Job.model_validate(response.json())
+        # A job reclaimed after its visibility timeout runs a second time
+        results = [await handler(job), await handler(job)]
+
+        async with session_factory() as db:
+            stored = (await db.execute(Flashcard.__table__.select())).all()
+        return job, results, stored
+
+    job, results, stored = asyncio.run(scenario())
+    assert job.params == {"num_cards": 7}
+    assert results == [{"count": 7}, {"count": 7}]
+    assert len(stored) == 7
+
+
+class FlakyRedis(FakeRedis):
+    """Fails the first `failures` blocking pops like a dropped connection."""
+
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+
+    async def bzpopmin(self, keys, timeout=0):
+        if self.failures:
+            self.failures -= 1
+            raise redis.ConnectionError("Connection reset by peer")
+        return await super().bzpopmin(keys, timeout)
+
+
+def test_worker_keeps_running_through_redis_errors():
+    async def handler(job):
+        return {"count": 1}
+
+    async def scenario():
+        queue = JobQueue(FlakyRedis(failures=3))
+        job = await queue.enqueue("flashcards", 1, 1)
+        return await run_until_finished(Worker(queue, handler, poll_timeout=0.01), queue, [job.id]), queue
+
+    [job], queue = asyncio.run(scenario())
+    assert job.state == JobState.SUCCEEDED
+    assert queue.redis.failures == 0
+    assert queue.redis.zsets[JobQueue.PROCESSING_KEY] == {}
+
+
+def test_jobs_of_a_dead_worker_are_requeued():
+    async def handler(job):
+        return {"count": 1}
+
+    async def scenario():
+        queue = make_queue()
+        job = await queue.enqueue("flashcards", 1, 1)
+        # A worker takes the job and dies without finishing it
+        assert (await queue.dequeue(timeout=0)).id == job.id
+        assert await queue.dequeue(timeout=0) is None
+        queue.redis.zsets[JobQueue.PROCESSING_KEY][job.id.encode()] = 0
+        return await run_until_finished(Worker(queue, handler, poll_timeout=0.01), queue, [job.id])
+
+    [job] = asyncio.run(scenario())
+    assert job.state == JobState.SUCCEEDED
+    assert job.attempts == 2
+
+
+def test_heartbeats_keep_long_jobs_from_being_reclaimed():
+    runs = 0
+
+    async def slow(job):
+        nonlocal runs
+        runs += 1
+        await asyncio.sleep(0.2)
+        return {}
+
+    async def scenario():
+        queue = make_queue()
+        queue.visibility_timeout = 0.06
+        job = await queue.enqueue("flashcards", 1, 1)
+        return await run_until_finished(Worker(queue, slow, concurrency=2, poll_timeout=0.01), queue, [job.id])
+
+    [job] = asyncio.run(scenario())
+    assert job.state == JobState.SUCCEEDED
+    assert runs == 1
+
+
+def test_jobs_default_to_interactive_priority():
+    assert Job(id="job_1", kind="flashcards", material_id=1, user_id=1).priority == PRIORITY_INTERACTIVE
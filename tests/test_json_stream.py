@@ -0,0 +1,30 @@
+import json
+from app.services.json_stream import JSONArrayItemParser
+
+DOCUMENT = json.dumps({
+    "questions": [
+        {"id": "1", "question": "Braces } and [brackets] in \"strings\"?", "options": ["a", "b"]},
+        {"id": "2", "question": "Second", "options": []},
+    ],
+    "other": [{"id": "ignored"}],
+})
+
+
+def feed_in_pieces(size: int):
+    parser = JSONArrayItemParser("questions")
+    items = []
+    for start in range(0, len(DOCUMENT), size):
+        items.extend(parser.feed(DOCUMENT[start:start + size]))
+    return items
+
+
+def test_items_are_identical_for_any_split():
+    expected = json.loads(DOCUMENT)["questions"]
+    for size in (1, 2, 5, 17, len(DOCUMENT)):
+        assert feed_in_pieces(size) == expected
+
+
+def test_items_are_emitted_as_soon_as_they_close():
+    parser = JSONArrayItemParser("flashcards")
+    assert parser.feed('{"flashcards": [{"id": "1", "front": "F"') == []
+    assert parser.feed(', "back": "B"}, {"id"') == [{"id": "1", "front": "F", "back": "B"}]
@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+from app.core.config import settings
+from app.schemas.ai_content import MultipleFlashcards, MultipleQuestions
+from app.services.ai_generator import AIGenerator
+from app.services.llm_providers import StubProvider, create_provider
+from app.services.resilience import Resilience
+
+CONTENT = "Enzymes lower the activation energy of reactions. Each enzyme binds a specific substrate."
+
+
+def test_create_provider_selects_registered_provider():
+    assert isinstance(create_provider("stub"), StubProvider)
+    with pytest.raises(ValueError):
+        create_provider("missing")
+
+
+def test_stub_provider_is_deterministic_and_schema_valid():
+    async def scenario():
+        provider = StubProvider(latency=0)
+        messages = [
+            {"role": "system", "content": "Generate 4 flashcards strictly based on the content given."},
+            {"role": "user", "content": f"Content: {CONTENT}"},
+        ]
+        first = await provider.parse(messages, MultipleFlashcards)
+        second = await provider.parse(messages, MultipleFlashcards)
+        streamed = "".join([delta async for delta in provider.stream(messages, MultipleFlashcards)])
+        return first, second, streamed
+
+    first, second, streamed = asyncio.run(scenario())
+    assert len(first.flashcards) == 4
+    assert first == second
+    assert MultipleFlashcards.model_validate_json(streamed) == first
+
+
+def test_generator_runs_offline_on_the_stub_provider():
+    async def scenario():
+        generator = AIGenerator(provider=StubProvider(latency=0), resilience=Resilience())
+        questions = await generator.generate_questions(CONTENT, num_questions=3)
+        streamed = [q async for q in generator.stream_questions(CONTENT, num_questions=3)]
+        return questions, streamed
+
+    questions, streamed = asyncio.run(scenario())
+    assert len(questions) == 3
+    assert [q.question for q in streamed] == [q.question for q in questions]
+    assert all(q.id.startswith("q_") for q in questions)
+
+
+def test_generators_sharing_a_provider_share_its_concurrency_cap(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_MAX_CONCURRENCY", 2)
+    provider = StubProvider(latency=0.02)
+    active = peak = 0
+    parse = provider.parse
+
+    async def counting_parse(*args, **kwargs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        try:
+            return await parse(*args, **kwargs)
+        finally:
+            active -= 1
+    provider.parse = counting_parse
+
+    async def scenario():
+        # A generator per request, as services and scripts create them
+        generators = [AIGenerator(provider=provider, resilience=Resilience()) for _ in range(4)]
+        await asyncio.gather(*(g.generate_questions(CONTENT, num_questions=2) for g in generators))
+
+    asyncio.run(scenario())
+    assert peak == 2
@@ -0,0 +1,98 @@
+import asyncio
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app.api.v1.endpoints.materials import get_user_materials
+from app.check_counters import find_drift, repair
+from app.models import Flashcard, Material, Question, User
+
+
+def test_listing_reads_counts_without_per_item_queries(engine, session_factory, user):
+    async def scenario():
+        async with session_factory() as db:
+            other = User(email="other@example.com", full_name="Other", hashed_password="x")
+            db.add(other)
+            await db.flush()
+            started = datetime(2026, 1, 1)
+            materials = [
+                Material(title=f"Lecture {i}", content=f"Notes for lecture {i}.",
+                         source_type="youtube" if i % 2 else "pdf", owner_id=user.id,
+                         created_at=started + timedelta(hours=i))
+                for i in range(5)
+            ]
+            db.add_all(materials)
+            db.add(Material(title="Not mine", content="Other notes.", source_type="pdf", owner_id=other.id))
+            await db.flush()
+            # Lecture 3 has cards and questions
+            db.add_all([
+                Flashcard(id=f"fc_{n}", material_id=materials[3].id, user_id=user.id, front="Q", back="A")
+                for n in range(3)
+            ])
+            db.add(Question(id="q_0", material_id=materials[3].id, user_id=user.id, question_text="Q?",
+                            options=["A", "B"], answer="A", explanation="E", category="C"))
+            await db.commit()
+
+        statements = []
+        event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        async def listing(**params):
+            params = {"page": 1, "per_page": 2, "source_type": None, "sort_by": "created_at", "order": "desc", **params}
+            async with session_factory() as db:
+                return await get_user_materials(db=db, current_user=user, **params)
+
+        first = await listing()
+        # The total and the page, however many items it holds
+        assert len(statements) == 2
+        assert first.total == 5
+        assert [m.title for m in first.materials] == ["Lecture 4", "Lecture 3"]
+        assert first.materials[1].stats.model_dump() == {"num_flashcards": 3, "num_questions": 1}
+        assert first.materials[0].stats.model_dump() == {"num_flashcards": 0, "num_questions": 0}
+        assert "content" not in first.materials[0].model_dump()
+
+        last = await listing(page=3, order="asc")
+        assert [m.title for m in last.materials] == ["Lecture 4"] and last.total == 5
+        youtube = await listing(per_page=10, source_type="youtube")
+        assert [m.title for m in youtube.materials] == ["Lecture 3", "Lecture 1"] and youtube.total == 2
+
+        beyond = await listing(page=10)
+        assert beyond.materials == [] and beyond.total == 5
+
+    asyncio.run(scenario())
+
+
+def test_counters_follow_inserts_and_deletes(session_factory, user):
+    async def scenario():
+        async with session_factory() as db:
+            material = Material(title="Cells", content="Cells.", source_type="pdf", owner_id=user.id)
+            # Items flushed together with a new material
+            material.flashcards = [Flashcard(id="fc_new", user_id=user.id, front="Q", back="A")]
+            db.add(material)
+            await db.commit()
+            assert material.num_flashcards == 1 and material.num_questions == 0
+
+            db.add_all([
+                Flashcard(id=f"fc_{n}", material_id=material.id, user_id=user.id, front="Q", back="A")
+                for n in range(4)
+            ])
+            db.add(Question(id="q_0", material_id=material.id, user_id=user.id, question_text="Q?",
+                            options=["A", "B"], answer="A", explanation="E", category="C"))
+            await db.commit()
+            # The loaded instance sees the stored counters without a reload
+            assert (material.num_flashcards, material.num_questions) == (5, 1)
+
+            await db.delete(await db.get(Flashcard, "fc_0"))
+            await db.commit()
+
+        async with session_factory() as db:
+            stored = await db.get(Material, material.id)
+            assert (stored.num_flashcards, stored.num_questions) == (4, 1)
+            assert await find_drift(db) == []
+
+            # Rows written behind the ORM's back are reported and repaired
+            await db.execute(Question.__table__.delete())
+            await db.commit()
+            drift = await find_drift(db)
+            assert [(d.material_id, d.num_questions, d.actual_questions) for d in drift] == [(material.id, 1, 0)]
+            await repair(db, drift)
+            assert await find_drift(db) == []
+
+    asyncio.run(scenario())
@@ -0,0 +1,74 @@
+from pathlib import Path
+import pytest
+import sqlalchemy as sa
+from alembic import command
+from alembic.config import Config
+from sqlalchemy.orm import Session
+from app.models import Base, ContentBlob, Material, MaterialSection
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# The materials table as it was before the migrations
+baseline = sa.MetaData()
+sa.Table("users", baseline, sa.Column("id", sa.Integer, primary_key=True))
+baseline_materials = sa.Table(
+    "materials", baseline,
+    sa.Column("id", sa.Integer, primary_key=True, index=True),
+    sa.Column("title", sa.String, index=True),
+    sa.Column("content", sa.Text),
+    sa.Column("source_type", sa.String),
+    sa.Column("source_url", sa.String, nullable=True),
+    sa.Column("owner_id", sa.Integer, sa.ForeignKey("users.id")),
+    sa.Column("created_at", sa.DateTime),
+)
+
+
+def alembic_config(url: str) -> Config:
+    # No ini file, so env.py leaves the test run's logging alone
+    config = Config()
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    config.set_main_option("sqlalchemy.url", url)
+    return config
+
+
+@pytest.mark.parametrize("started_app", [False, True])
+def test_migrations_upgrade_a_baseline_db(tmp_path, started_app):
+    url = f"sqlite:///{tmp_path / 'baseline.db'}"
+    engine = sa.create_engine(url)
+    with engine.begin() as conn:
+        # Tables the migrations only index are created as they are today
+        for name in ("users", "flashcards", "questions", "progress"):
+            Base.metadata.tables[name].create(conn)
+        baseline_materials.create(conn)
+        conn.execute(sa.text(
+            "INSERT INTO users (id, email, full_name, hashed_password, is_active) "
+            "VALUES (1, 'student@example.com', 'Student', 'x', 1)"
+        ))
+        conn.execute(baseline_materials.insert(), [
+            {"title": "Cells", "content": "Cells are the unit of life.\n\n" * 40, "source_type": "pdf", "owner_id": 1},
+            {"title": "Cells again", "content": "Cells are the unit of life.\n\n" * 40, "source_type": "pdf", "owner_id": 1},
+            {"title": "Atoms", "content": "Atoms make up matter.", "source_type": "youtube", "owner_id": 1},
+        ])
+    if started_app:
+        # What the app's lifespan does on startup, before anyone runs Alembic
+        Base.metadata.create_all(engine)
+
+    command.upgrade(alembic_config(url), "head")
+
+    with Session(engine) as db:
+        materials = db.scalars(sa.select(Material).order_by(Material.id)).all()
+        blobs = {blob.hash: blob for blob in db.scalars(sa.select(ContentBlob))}
+        texts = {material.title: blobs[material.blob_hash].text for material in materials}
+        sections = db.scalar(sa.select(sa.func.count()).select_from(MaterialSection))
+    columns = {column["name"] for column in sa.inspect(engine).get_columns("content_blobs")}
+    engine.dispose()
+
+    assert texts == {
+        "Cells": "Cells are the unit of life.\n\n" * 40,
+        "Cells again": "Cells are the unit of life.\n\n" * 40,
+        "Atoms": "Atoms make up matter.",
+    }
+    assert sorted(blob.ref_count for blob in blobs.values()) == [1, 2]
+    assert all(blob.char_count == len(blob.text) for blob in blobs.values())
+    assert sections >= len(blobs)
+    assert "text" not in columns
@@ -0,0 +1,37 @@
+import os
+import tempfile
+import pytest
+from app.services.pdf_backends import available_backends, create_backend, normalize_page_text
+from benchmarks.pdfs import make_pdf
+
+
+def extract(backend: str, path: str):
+    extractor = create_backend(backend)
+    with extractor.open(path) as document:
+        return list(extractor.iter_pages(document))
+
+
+def test_installed_backends_agree():
+    corpus = [
+        make_pdf(pages=3, seed=1),
+        make_pdf(pages=2, lines_per_page=0, header=None, page_numbers=False),
+        make_pdf(pages=4, header="Chem (201) \\ notes", seed=2),
+    ]
+    backends = available_backends()
+    assert backends[-1] == "pypdf2"
+    with tempfile.TemporaryDirectory() as directory:
+        for i, pdf in enumerate(corpus):
+            path = os.path.join(directory, f"{i}.pdf")
+            with open(path, "wb") as out:
+                out.write(pdf)
+            results = {backend: extract(backend, path) for backend in backends}
+            expected = results["pypdf2"]
+            assert all(pages == expected for pages in results.values()), results.keys()
+    assert expected[0].startswith("Chem (201) \\ notes\n")
+
+
+def test_normalize_and_selection():
+    assert normalize_page_text(" ﬁrst  line \r\nsecond\x00\tline\r\n\r\n") == "first line\nsecond line"
+    assert create_backend().name == available_backends()[0]
+    with pytest.raises(ValueError, match="Unknown PDF backend"):
+        create_backend("ghostscript")
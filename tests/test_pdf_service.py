@@ -0,0 +1,69 @@
+import asyncio
+from io import BytesIO
+import pytest
+from fastapi import HTTPException, UploadFile
+from app.services.material_parser import MaterialParser
+from app.services.pdf_service import ExtractionPool, PDFService
+from benchmarks.pdfs import make_pdf
+
+
+def upload(pdf: bytes) -> UploadFile:
+    return UploadFile(BytesIO(pdf), filename="notes.pdf")
+
+
+def test_page_ranges_reassembled_in_order():
+    async def scenario():
+        pool = ExtractionPool(workers=2)
+        try:
+            service = PDFService(pool=pool, pages_per_task=3)
+            pages = await service.extract_pages(upload(make_pdf(pages=10, lines_per_page=2)))
+            with pytest.raises(ValueError):
+                await service.extract_pages(upload(b"not a pdf"))
+        finally:
+            pool.shutdown()
+        return pages
+
+    pages = asyncio.run(scenario())
+    assert len(pages) == 10
+    # Lines end in "<page>.<line>."
+    assert all(f" {i}.0." in page for i, page in enumerate(pages))
+
+
+def test_timeout_kills_workers_and_pool_recovers():
+    async def scenario():
+        pool = ExtractionPool(workers=1)
+        try:
+            pdf = make_pdf(pages=20)
+            with pytest.raises(ValueError, match="longer than"):
+                await PDFService(pool=pool, timeout=0.001).extract_pages(upload(pdf))
+            assert pool.generation == 1
+            return await PDFService(pool=pool).extract_pages(upload(pdf))
+        finally:
+            pool.shutdown()
+
+    assert len(asyncio.run(scenario())) == 20
+
+
+def test_iter_pages_streams_in_order_and_tolerates_empty_pages():
+    async def scenario():
+        pool = ExtractionPool(workers=2)
+        try:
+            service = PDFService(pool=pool, pages_per_task=2)
+            pdf = make_pdf(pages=5, lines_per_page=0, header=None, page_numbers=False)
+            blank = [page async for page in service.iter_pages(upload(pdf))]
+            numbered = [page async for page in service.iter_pages(upload(make_pdf(pages=5)))]
+        finally:
+            pool.shutdown()
+        return blank, numbered
+
+    blank, numbered = asyncio.run(scenario())
+    assert blank == [""] * 5
+    assert [page.strip().splitlines()[-1] for page in numbered] == ["1", "2", "3", "4", "5"]
+
+
+def test_material_parser_uses_shared_extractor():
+    text = asyncio.run(MaterialParser.parse_pdf(upload(make_pdf(pages=2, lines_per_page=1))))
+    assert text.startswith("Biology 101 Lecture Notes") and text.endswith("2")
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(MaterialParser.parse_pdf(upload(b"not a pdf")))
+    assert error.value.status_code == 400
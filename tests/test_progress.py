@@ -0,0 +1,35 @@
+import asyncio
+from sqlalchemy import func, select
+from app.models import Material, Progress
+from app.services.progress import ProgressService
+
+
+def test_concurrent_first_visits_create_one_progress_row(session_factory, user):
+    async def scenario():
+        async with session_factory() as db:
+            material = Material(title="Cells", content="Cells.", source_type="pdf", owner_id=user.id)
+            db.add(material)
+            await db.commit()
+
+        service = ProgressService()
+        # Every session looks before any inserts, as concurrent requests would
+        lookup = service.get_progress
+        ready = asyncio.Barrier(5)
+
+        async def get_progress_together(*args):
+            progress = await lookup(*args)
+            if progress is None:
+                await ready.wait()
+            return progress
+        service.get_progress = get_progress_together
+
+        async def visit():
+            async with session_factory() as db:
+                return await service._get_or_create_progress(db, material.id, user.id)
+
+        rows = await asyncio.gather(*(visit() for _ in range(5)))
+        assert len({progress.id for progress in rows}) == 1
+        async with session_factory() as db:
+            assert await db.scalar(select(func.count()).select_from(Progress)) == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,52 @@
+import asyncio
+import re
+from sqlalchemy import delete, event, func, select
+from app.api.v1.endpoints.materials import get_user_materials
+from app.models import Flashcard, Material, Progress, Question
+from app.services.progress import ProgressService
+
+# A plan step reading one of these tables without an index
+TABLE_SCAN = re.compile(r"^SCAN (flashcards|questions|progress|materials)\b")
+
+
+def test_material_and_user_lookups_use_indexes(engine, session_factory, user):
+    async def scenario():
+        async with session_factory() as db:
+            material = Material(title="Cells", content="Cells.", source_type="pdf", owner_id=user.id)
+            db.add(material)
+            await db.commit()
+
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith(("SELECT", "INSERT", "UPDATE", "DELETE")):
+                statements.append((statement, parameters))
+
+        event.listen(engine.sync_engine, "before_cursor_execute", capture)
+        # The lookups the endpoints and services make
+        async with session_factory() as db:
+            await get_user_materials(page=1, per_page=20, source_type=None, sort_by="created_at",
+                                     order="desc", db=db, current_user=user)
+            await get_user_materials(page=1, per_page=20, source_type=None, sort_by="created_at",
+                                     order="asc", db=db, current_user=user)
+            progress_service = ProgressService()
+            await progress_service.get_material_stats(db, material.id, user.id)
+            await progress_service.get_weak_areas(db, material.id, user.id)
+            for model in (Flashcard, Question):
+                await db.execute(select(model).where(model.material_id == material.id, model.user_id == user.id))
+                await db.execute(select(func.count()).where(model.material_id == material.id))
+                await db.execute(delete(model).where(model.material_id == material.id))
+            await db.execute(delete(Progress).where(Progress.material_id == material.id))
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+        assert any("progress" in statement for statement, _ in statements)
+        async with engine.connect() as conn:
+            for statement, parameters in statements:
+                plan = (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)).all()
+                details = [row[-1] for row in plan]
+                scans = [detail for detail in details if TABLE_SCAN.match(detail)]
+                assert not scans, f"{statement!r} scans a table: {details}"
+                if "ORDER BY materials.created_at" in statement:
+                    assert not any("TEMP B-TREE" in detail for detail in details), details
+
+    asyncio.run(scenario())
@@ -0,0 +1,100 @@
+import asyncio
+import time
+import openai
+import pytest
+from openai import AsyncOpenAI
+from app.services.ai_generator import AIGenerator
+from app.services.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, Resilience
+from benchmarks import fake_llm
+
+CONTENT = "Mitochondria produce most of the chemical energy needed by the cell."
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    return fake_llm.serve_in_thread()
+
+
+@pytest.fixture(autouse=True)
+def reset_fake():
+    fake_llm.app.state.latency = 0.0
+    fake_llm.app.state.errors = []
+    fake_llm.app.state.delays = []
+    fake_llm.app.state.usage = {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+
+def generate(base_url: str, resilience: Resilience, times: int = 1):
+    async def scenario():
+        client = AsyncOpenAI(api_key="test", base_url=base_url, max_retries=0)
+        generator = AIGenerator(client=client, resilience=resilience)
+        results = []
+        for _ in range(times):
+            try:
+                results.append(await generator.generate_flashcards(CONTENT, num_cards=3))
+            except Exception as e:
+                results.append(e)
+        await client.close()
+        return results
+
+    return asyncio.run(scenario())
+
+
+def test_transient_errors_are_retried(base_url):
+    fake_llm.app.state.errors = [429, 503]
+    resilience = Resilience(max_attempts=3, backoff=0.01)
+
+    [cards] = generate(base_url, resilience)
+
+    assert len(cards) == 3
+    assert fake_llm.app.state.usage["requests"] == 1
+    assert resilience.counters["retries"] == 2
+    assert resilience.breaker.state == CLOSED
+
+
+def test_client_errors_and_exhausted_retries_are_raised(base_url):
+    fake_llm.app.state.errors = [400, 500, 500]
+    resilience = Resilience(max_attempts=2, backoff=0.01)
+
+    bad_request, server_error = generate(base_url, resilience, times=2)
+
+    assert isinstance(bad_request, openai.BadRequestError)
+    assert isinstance(server_error, openai.InternalServerError)
+    assert resilience.counters["retries"] == 1
+    assert resilience.counters["failures"] == 2
+
+
+def test_circuit_opens_fails_fast_and_recovers(base_url):
+    fake_llm.app.state.errors = [500, 500]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2)
+    resilience = Resilience(breaker=breaker, max_attempts=1, backoff=0.01)
+
+    first, second, rejected = generate(base_url, resilience, times=3)
+    assert breaker.state == OPEN
+    assert isinstance(rejected, CircuitOpenError)
+    assert fake_llm.app.state.usage["requests"] == 0
+
+    time.sleep(0.25)
+    [cards] = generate(base_url, resilience)
+
+    assert len(cards) == 3
+    assert breaker.state == CLOSED
+    assert breaker.transitions == {CLOSED: 1, OPEN: 1, HALF_OPEN: 1}
+    assert resilience.calls_by_state[HALF_OPEN] == 1
+    assert resilience.counters["rejected"] == 1
+
+
+def test_slow_calls_are_hedged(base_url):
+    fake_llm.app.state.latency = 0.02
+    resilience = Resilience(hedge_percentile=90, hedge_min_samples=5)
+    generate(base_url, resilience, times=5)
+
+    # The next request stalls; the hedge sent after ~p90 answers instead
+    fake_llm.app.state.delays = [2.0]
+    started = time.perf_counter()
+    [cards] = generate(base_url, resilience)
+    elapsed = time.perf_counter() - started
+
+    assert len(cards) == 3
+    assert elapsed < 1.0
+    assert resilience.counters["hedged"] == 1
+    assert resilience.counters["hedge_wins"] == 1
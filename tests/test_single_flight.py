@@ -0,0 +1,212 @@
+import asyncio
+from app.services.single_flight import SingleFlight
+from tests.fake_redis import FakeRedis, UnreachableRedis
+
+
+def make_single_flight(redis_client) -> SingleFlight:
+    single_flight = SingleFlight(redis_client)
+    single_flight.poll_interval = 0.01
+    return single_flight
+
+
+def test_concurrent_callers_share_one_call():
+    calls = 0
+
+    async def generate():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return ["card"] * calls
+
+    async def scenario():
+        redis_client = FakeRedis()
+        single_flight = make_single_flight(redis_client)
+        results = await asyncio.gather(*(single_flight.run("1:2:flashcards", generate) for _ in range(5)))
+        other = await single_flight.run("1:3:flashcards", generate)
+        return results, other, redis_client
+
+    results, other, redis_client = asyncio.run(scenario())
+    assert results == [["card"]] * 5
+    # Different keys don't share; finished calls don't linger
+    assert other == ["card", "card"]
+    assert calls == 2
+    assert redis_client.values == {}
+
+
+def test_errors_reach_every_waiting_caller():
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        raise RuntimeError("upstream unavailable")
+
+    async def scenario():
+        single_flight = make_single_flight(FakeRedis())
+        return await asyncio.gather(
+            *(single_flight.run("1:2:questions", failing) for _ in range(3)),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_redis_lock_serializes_workers():
+    # Two SingleFlight instances stand in for two uvicorn workers
+    events = []
+
+    def generate(name):
+        async def call():
+            events.append(f"{name} start")
+            await asyncio.sleep(0.05)
+            events.append(f"{name} end")
+            return name
+        return call
+
+    async def scenario():
+        redis_client = FakeRedis()
+        first, second = make_single_flight(redis_client), make_single_flight(redis_client)
+        task = asyncio.create_task(first.run("1:2:flashcards", generate("first")))
+        await asyncio.sleep(0.01)
+        assert redis_client.values.get("singleflight:1:2:flashcards") is not None
+        results = await asyncio.gather(task, second.run("1:2:flashcards", generate("second")))
+        return results, redis_client
+
+    results, redis_client = asyncio.run(scenario())
+    assert results == ["first", "second"]
+    assert events == ["first start", "first end", "second start", "second end"]
+    assert redis_client.values == {}
+
+
+def test_expired_lock_is_not_released_by_its_former_holder():
+    async def scenario():
+        redis_client = FakeRedis()
+        single_flight = make_single_flight(redis_client)
+
+        async def outlive_lock():
+            # The lock expires and another worker takes it over
+            redis_client.values["singleflight:key"] = b"other-token"
+            return "done"
+
+        assert await single_flight.run("key", outlive_lock) == "done"
+        return redis_client
+
+    redis_client = asyncio.run(scenario())
+    assert redis_client.values == {"singleflight:key": b"other-token"}
+
+
+def test_unreachable_redis_still_deduplicates_in_process():
+    calls = 0
+
+    async def generate():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        return calls
+
+    async def scenario():
+        single_flight = make_single_flight(UnreachableRedis())
+        return await asyncio.gather(*(single_flight.run("1:2:flashcards", generate) for _ in range(3)))
+
+    assert asyncio.run(scenario()) == [1, 1, 1]
+    assert calls == 1
+
+
+def test_lock_holders_and_calls_wait_for_each_other():
+    events = []
+    single_flight = make_single_flight(UnreachableRedis())
+
+    async def hold(name):
+        async with single_flight.lock("1:2:flashcards"):
+            events.append(f"{name} start")
+            await asyncio.sleep(0.03)
+            events.append(f"{name} end")
+
+    async def call():
+        events.append("call")
+        return "cards"
+
+    async def scenario():
+        first = asyncio.create_task(hold("stream"))
+        await asyncio.sleep(0.01)
+        result, _ = await asyncio.gather(single_flight.run("1:2:flashcards", call), hold("second stream"))
+        await first
+        return result
+
+    assert asyncio.run(scenario()) == "cards"
+    assert events == ["stream start", "stream end", "call", "second stream start", "second stream end"]
+    assert single_flight._locks == {}
+
+
+def test_cancelled_call_is_taken_over_by_a_waiting_caller():
+    calls = 0
+
+    async def generate():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return calls
+
+    async def scenario():
+        single_flight = make_single_flight(FakeRedis())
+        first = asyncio.create_task(single_flight.run("1:2:flashcards", generate))
+        await asyncio.sleep(0.01)
+        waiting = [asyncio.create_task(single_flight.run("1:2:flashcards", generate)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        # The first caller's client goes away
+        first.cancel()
+        results = await asyncio.gather(*waiting)
+        return first, results
+
+    first, results = asyncio.run(scenario())
+    assert first.cancelled()
+    assert results == [2, 2]
+    assert calls == 2
+
+
+def test_cancelled_waiter_leaves_the_call_running():
+    async def generate():
+        await asyncio.sleep(0.05)
+        return "cards"
+
+    async def scenario():
+        single_flight = make_single_flight(FakeRedis())
+        first = asyncio.create_task(single_flight.run("1:2:flashcards", generate))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(single_flight.run("1:2:flashcards", generate))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        return await first, await asyncio.gather(waiter, return_exceptions=True)
+
+    result, [waited] = asyncio.run(scenario())
+    assert result == "cards"
+    assert isinstance(waited, asyncio.CancelledError)
+
+
+def test_lock_is_renewed_while_its_holder_runs():
+    events = []
+
+    def generate(name):
+        async def call():
+            events.append(f"{name} start")
+            # Outlasts the lock's TTL several times over
+            await asyncio.sleep(0.2)
+            events.append(f"{name} end")
+            return name
+        return call
+
+    async def scenario():
+        redis_client = FakeRedis()
+        first, second = make_single_flight(redis_client), make_single_flight(redis_client)
+        first.lock_ttl_ms = second.lock_ttl_ms = 60
+        task = asyncio.create_task(first.run("1:2:flashcards", generate("first")))
+        await asyncio.sleep(0.01)
+        await asyncio.gather(task, second.run("1:2:flashcards", generate("second")))
+        return redis_client
+
+    redis_client = asyncio.run(scenario())
+    assert events == ["first start", "first end", "second start", "second end"]
+    assert redis_client.values == {}
@@ -0,0 +1,132 @@
+import asyncio
+import json
+from typing import List
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import func, select
+from app.api.v1.endpoints import materials
+from app.core.dependencies import get_async_db, get_current_active_user, get_session_factory
+from app.models import Flashcard, Material, Question, User
+from app.services.ai_generator import AIGenerator
+from app.services.generation import GenerationService
+from app.services.generation_cache import GenerationCache
+from app.services.llm_providers import StubProvider
+from app.services.resilience import Resilience
+from app.services.single_flight import SingleFlight
+from app.services.usage import TokenQuota
+from tests.fake_redis import FakeRedis
+
+
+def make_service(latency: float = 0) -> GenerationService:
+    redis_client = FakeRedis()
+    single_flight = SingleFlight(redis_client)
+    single_flight.poll_interval = 0.01
+    return GenerationService(
+        AIGenerator(provider=StubProvider(latency=latency), resilience=Resilience()),
+        GenerationCache(redis_client),
+        single_flight,
+        TokenQuota(redis_client)
+    )
+
+
+async def add_material(session_factory, owner: User) -> Material:
+    async with session_factory() as db:
+        material = Material(title="Cells", content="Cells are the unit of life. " * 20,
+                            source_type="pdf", owner_id=owner.id)
+        db.add(material)
+        await db.commit()
+    return material
+
+
+def make_app(session_factory, user: User, monkeypatch, service: GenerationService) -> FastAPI:
+    app = FastAPI()
+    app.include_router(materials.router, prefix="/materials")
+
+    async def db_session():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = db_session
+    app.dependency_overrides[get_session_factory] = lambda: session_factory
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    monkeypatch.setattr(materials, "generation_service", service)
+    return app
+
+
+def parse_events(body: str) -> List[tuple]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_stream_endpoints_emit_items_and_store_them(session_factory, user, monkeypatch):
+    async def scenario():
+        material = await add_material(session_factory, user)
+        app = make_app(session_factory, user, monkeypatch, make_service())
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            flashcards = await client.post(f"/materials/{material.id}/generate-flashcards/stream")
+            questions = await client.post(
+                f"/materials/{material.id}/generate-questions/stream", params={"num_questions": 6}
+            )
+        async with session_factory() as db:
+            stored = (
+                await db.scalar(select(func.count()).select_from(Flashcard)),
+                await db.scalar(select(func.count()).select_from(Question)),
+            )
+        return flashcards, questions, stored
+
+    flashcards, questions, stored = asyncio.run(scenario())
+    assert flashcards.headers["content-type"].startswith("text/event-stream")
+    card_events = parse_events(flashcards.text)
+    question_events = parse_events(questions.text)
+    assert [name for name, _ in card_events] == ["flashcard"] * 20 + ["done"]
+    assert card_events[-1][1] == {"count": 20}
+    assert [name for name, _ in question_events] == ["question"] * 6 + ["done"]
+    assert stored == (20, 6)
+
+
+def test_concurrent_streams_and_generate_calls_store_one_set(session_factory, user):
+    async def scenario():
+        material = await add_material(session_factory, user)
+        service = make_service(latency=0.05)
+
+        async def stream():
+            async with session_factory() as db:
+                return [card async for card in service.stream_flashcards(db, material, user.id, 5)]
+
+        async def generate():
+            async with session_factory() as db:
+                return await service.get_or_generate_flashcards(db, material, user.id, num_cards=5)
+
+        # A double-tapped stream racing a plain generate call
+        results = await asyncio.gather(stream(), stream(), generate())
+        async with session_factory() as db:
+            stored = (await db.execute(select(Flashcard.id))).scalars().all()
+        return results, stored
+
+    results, stored = asyncio.run(scenario())
+    assert len(stored) == 5
+    for cards in results:
+        assert sorted(card.id for card in cards) == sorted(stored)
+
+
+def test_double_tapped_stream_endpoint_stores_one_set(session_factory, user, monkeypatch):
+    async def scenario():
+        material = await add_material(session_factory, user)
+        app = make_app(session_factory, user, monkeypatch, make_service(latency=0.05))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = await asyncio.gather(*(
+                client.post(f"/materials/{material.id}/generate-questions/stream") for _ in range(2)
+            ))
+        async with session_factory() as db:
+            stored = await db.scalar(select(func.count()).select_from(Question))
+        return responses, stored
+
+    responses, stored = asyncio.run(scenario())
+    assert stored == 20
+    for response in responses:
+        assert parse_events(response.text)[-1] == ("done", {"count": 20})
@@ -0,0 +1,91 @@
+from app.services.text_preprocessor import TextPreprocessor
+
+
+TOPICS = ["Nucleus", "Cytoplasm", "Golgi", "Vesicles"]
+
+
+def make_pages(count: int):
+    return [
+        "\n".join([
+            "BIOL 101   Lecture Notes",
+            f"Chapter 2 - Cells ({2024 + page % 2})",
+            f"{TOPICS[page]}: the mito-",
+            "chondria   produces energy   for the cell.",
+            f"Ribosomes  synthesise proteins on page {page + 1}.",
+            f"Lysosomes digest {TOPICS[page]} waste.",
+            f"Vacuoles store {TOPICS[page]} water.",
+            "",
+            "",
+            "",
+            f"Membranes regulate {TOPICS[page]} transport.",
+            f"- {page + 1} -",
+        ])
+        for page in range(count)
+    ]
+
+
+def test_pages_lose_boilerplate_page_numbers_and_hyphenation():
+    text, stats = TextPreprocessor().process_pages(make_pages(4))
+
+    assert "Lecture Notes" not in text
+    assert "Chapter 2" not in text
+    assert "- 3 -" not in text
+    assert "the mitochondria produces energy for the cell." in text
+    assert "Ribosomes synthesise proteins on page 3." in text
+    assert "\n\n\n" not in text
+    assert text.count("Membranes regulate") == 4
+    assert stats.bytes_saved == stats.original_bytes - stats.processed_bytes > 0
+    assert stats.tokens_saved > 0
+
+
+def test_hyphenated_compounds_keep_their_hyphen():
+    pages = ["Exercise builds self-\ncontrol and a long-\nterm habit of\nmito-\nchondria use.\nA long-term study."]
+
+    text, _ = TextPreprocessor().process_pages(pages)
+
+    assert text == "Exercise builds self-control and a long-term habit of\nmitochondria use.\nA long-term study."
+
+
+def test_hyphenation_follows_spellings_used_elsewhere():
+    pages = ["The self-\nish gene.\nSelfish genes spread."]
+
+    text, _ = TextPreprocessor().process_pages(pages)
+
+    assert text.startswith("The selfish gene.")
+
+
+def test_single_page_keeps_its_header():
+    text, _ = TextPreprocessor().process_pages(make_pages(1))
+
+    assert text.startswith("BIOL 101 Lecture Notes")
+
+
+def test_transcript_filler_is_removed():
+    transcript = "[Music]\num so today we\nwe look at uh enzymes,\nyou know, how they\nwork [Applause]"
+
+    text, stats = TextPreprocessor().process_transcript(transcript)
+
+    assert text == "so today we look at enzymes, how they work"
+    assert stats.processed_bytes == len(text)
+
+
+def test_transcript_keeps_units_that_look_like_fillers():
+    transcript = "so the cell is 10 mm wide\nmhm and this one is 5 MM, mm-hmm, hmm"
+
+    text, _ = TextPreprocessor().process_transcript(transcript)
+
+    assert text == "so the cell is 10 mm wide and this one is 5 MM,"
+
+
+def test_transcript_keeps_numbers_and_meant_repeats():
+    transcript = "the fibonacci numbers are 1 1 2 3 5 8\nand by then we had had enough\nenough said"
+
+    text, _ = TextPreprocessor().process_transcript(transcript)
+
+    assert text == "the fibonacci numbers are 1 1 2 3 5 8 and by then we had had enough said"
+
+
+def test_transcript_keeps_repeated_numbers_across_lines():
+    text, _ = TextPreprocessor().process_transcript("count 1\n1 2 3")
+
+    assert text == "count 1 1 2 3"
@@ -0,0 +1,50 @@
+import asyncio
+import pytest
+from tempfile import SpooledTemporaryFile
+from fastapi import FastAPI, Request, UploadFile
+from fastapi.testclient import TestClient
+from app.core.middleware import BodySizeLimitMiddleware
+from app.services.pdf_service import PDFService
+from benchmarks.pdfs import make_pdf
+
+
+def make_client(max_bytes: int) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(BodySizeLimitMiddleware, max_bytes=max_bytes)
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    return TestClient(app)
+
+
+def test_body_size_limit():
+    client = make_client(max_bytes=1000)
+    assert client.post("/echo", content=b"x" * 1000).json() == {"size": 1000}
+
+    # Refused from the declared Content-Length
+    response = client.post("/echo", content=b"x" * 1001)
+    assert response.status_code == 413
+    assert response.json()["detail"] == "Request body exceeds the maximum size of 1000 bytes"
+
+    # Refused while streaming when no length is declared
+    response = client.post("/echo", content=iter([b"x" * 600, b"x" * 600]))
+    assert response.status_code == 413
+    assert "maximum size" in response.json()["detail"]
+
+
+@pytest.mark.parametrize("max_bytes,shown", [(512 * 1024, "512 KB"), (1536 * 1024, "1.5 MB"), (50 * 1024 * 1024, "50 MB")])
+def test_body_size_limit_is_shown_in_readable_units(max_bytes, shown):
+    assert BodySizeLimitMiddleware(None, max_bytes).detail.endswith(f" {shown}")
+
+
+def test_pdf_extracted_from_spooled_file():
+    spooled = SpooledTemporaryFile(max_size=1024)
+    spooled.write(make_pdf(pages=2, padding=4096))
+    # Rolled over to disk and left at the end, as the multipart parser does
+    assert spooled._rolled
+
+    pages = asyncio.run(PDFService().extract_pages(UploadFile(spooled, filename="notes.pdf")))
+    assert len(pages) == 2
+    assert "Biology 101 Lecture Notes" in pages[1]
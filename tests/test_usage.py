@@ -0,0 +1,112 @@
+import asyncio
+import pytest
+from sqlalchemy import select
+from app.models import Material, TokenUsage
+from app.services.ai_generator import AIGenerator
+from app.services.generation import GenerationService
+from app.services.generation_cache import GenerationCache
+from app.services.llm_providers import StubProvider
+from app.services.resilience import Resilience
+from app.services.single_flight import SingleFlight
+from app.services.usage import QuotaExceeded, TokenQuota, record_usage
+from tests.fake_redis import FakeRedis
+
+
+def make_quota(capacity: int = 1000, rate: float = 10.0) -> TokenQuota:
+    # FakeRedis can't run the bucket script, so this exercises the in-memory fallback
+    quota = TokenQuota(FakeRedis())
+    quota.capacity = capacity
+    quota.rate = rate
+    return quota
+
+
+def test_token_bucket_refuses_and_refunds():
+    async def scenario():
+        quota = make_quota()
+        await quota.acquire(1, 800)
+        with pytest.raises(QuotaExceeded) as exceeded:
+            await quota.acquire(1, 500)
+        # Other users have buckets of their own
+        await quota.acquire(2, 500)
+        await quota.adjust(1, -600)
+        await quota.acquire(1, 500)
+        return exceeded.value, await quota.remaining(1)
+
+    exceeded, remaining = asyncio.run(scenario())
+    assert exceeded.retry_after == 30
+    assert 300 <= remaining < 310
+
+
+def test_generation_records_usage_and_charges_quota(session_factory, user):
+    async def scenario():
+        async with session_factory() as db:
+            material = Material(title="Cells", content="Cells are the unit of life. " * 40, source_type="pdf", owner_id=user.id)
+            db.add(material)
+            await db.commit()
+
+        redis_client = FakeRedis()
+        quota = make_quota(capacity=100_000)
+        service = GenerationService(
+            AIGenerator(provider=StubProvider(latency=0), resilience=Resilience()),
+            GenerationCache(redis_client),
+            SingleFlight(redis_client),
+            quota
+        )
+        async with session_factory() as db:
+            await service.get_or_generate_flashcards(db, material, user.id, num_cards=5)
+            # Served from the stored rows: nothing to charge or record
+            await service.get_or_generate_flashcards(db, material, user.id, num_cards=5)
+        async with session_factory() as db:
+            rows = (await db.execute(select(TokenUsage))).scalars().all()
+
+        await quota.adjust(user.id, 100_000)
+        with pytest.raises(QuotaExceeded):
+            async with session_factory() as db:
+                await service.get_or_generate_questions(db, material, user.id, num_questions=5)
+        return rows, await quota.remaining(user.id)
+
+    rows, remaining = asyncio.run(scenario())
+    [row] = rows
+    assert row.kind == "flashcards"
+    assert row.llm_calls == 1
+    assert row.prompt_tokens > 0 and row.completion_tokens > 0
+    assert remaining < 0
+
+
+class FailingGenerator:
+    """Spends tokens on a first call, then fails like an upstream outage."""
+
+    async def generate_questions(self, text, num_questions: int = 20, **kwargs):
+        record_usage(300, 120)
+        raise RuntimeError("upstream unavailable")
+
+    async def stream_questions(self, text, num_questions: int = 20, **kwargs):
+        record_usage(300, 120)
+        raise RuntimeError("upstream unavailable")
+        yield
+
+
+def test_failed_generations_are_still_billed(session_factory, user):
+    async def scenario():
+        async with session_factory() as db:
+            material = Material(title="Cells", content="Cells are the unit of life. " * 40, source_type="pdf", owner_id=user.id)
+            db.add(material)
+            await db.commit()
+
+        redis_client = FakeRedis()
+        quota = make_quota(capacity=100_000)
+        service = GenerationService(FailingGenerator(), GenerationCache(redis_client), SingleFlight(redis_client), quota)
+        async with session_factory() as db:
+            with pytest.raises(RuntimeError):
+                await service.get_or_generate_questions(db, material, user.id, num_questions=5)
+            with pytest.raises(RuntimeError):
+                async for _ in service.stream_questions(db, material, user.id, 5):
+                    pass
+        async with session_factory() as db:
+            rows = (await db.execute(select(TokenUsage))).scalars().all()
+        return rows, await quota.remaining(user.id)
+
+    rows, remaining = asyncio.run(scenario())
+    assert [(row.kind, row.prompt_tokens, row.completion_tokens) for row in rows] == [("questions", 300, 120)] * 2
+    # Both attempts were charged against the bucket
+    assert remaining < 100_000 - 800
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from sqlalchemy import select
+from app.services.single_flight import SingleFlight
+from app.services.youtube_service import (
+    FakeTranscriptProvider,
+    TranscriptCache,
+    YouTubeService,
+    extract_video_id,
+)
+from tests.fake_redis import FakeRedis
+
+URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+def make_service(redis_client, provider, executor):
+    cache = TranscriptCache(redis_client)
+    return YouTubeService(provider, cache, SingleFlight(redis_client), executor)
+
+
+def test_extract_video_id():
+    assert extract_video_id(URL) == "dQw4w9WgXcQ"
+    assert extract_video_id("https://youtu.be/dQw4w9WgXcQ?t=42") == "dQw4w9WgXcQ"
+    with pytest.raises(ValueError):
+        extract_video_id("https://example.com/video")
+
+
+def test_fetches_once_off_the_event_loop():
+    async def scenario():
+        redis_client = FakeRedis()
+        provider = FakeTranscriptProvider(latency=0.2)
+        executor = ThreadPoolExecutor(max_workers=2)
+        service = make_service(redis_client, provider, executor)
+
+        # The loop keeps ticking while fetches block their threads
+        ticks = 0
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        probe = asyncio.create_task(ticker())
+        texts = await asyncio.gather(*(service.get_transcript(URL) for _ in range(5)))
+        probe.cancel()
+        assert ticks >= 10
+        assert len(set(texts)) == 1 and "mitochondria" in texts[0]
+        assert provider.fetches == 1
+
+        # Another worker finds it in Redis
+        other = make_service(redis_client, provider, executor)
+        started = time.perf_counter()
+        assert await other.get_transcript(URL) == texts[0]
+        assert time.perf_counter() - started < 0.1
+        assert provider.fetches == 1
+        executor.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_fetch_errors_are_not_cached():
+    class FlakyProvider(FakeTranscriptProvider):
+        def fetch(self, video_id):
+            if self.fetches == 0:
+                self.fetches += 1
+                raise RuntimeError("Subtitles are disabled for this video")
+            return super().fetch(video_id)
+
+    async def scenario():
+        executor = ThreadPoolExecutor(max_workers=1)
+        provider = FlakyProvider()
+        service = make_service(FakeRedis(), provider, executor)
+        with pytest.raises(ValueError, match="Subtitles are disabled"):
+            await service.get_transcript(URL)
+        assert await service.get_transcript(URL)
+        assert provider.fetches == 2
+        executor.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_memory_tier_expires_and_is_bounded(monkeypatch):
+    async def scenario():
+        cache = TranscriptCache(FakeRedis())
+        cache.max_entries = 2
+        for video_id in ("a", "b", "c"):
+            await cache.set(video_id, f"text {video_id}")
+        assert list(cache._memory) == ["b", "c"]
+        # Evicted from memory, still in Redis
+        assert await cache.get("a") == "text a"
+
+        cache.ttl = 0
+        await cache.set("d", "text d")
+        cache.redis.values.clear()
+        assert await cache.get("d") is None
+
+    asyncio.run(scenario())
+
+
+def test_batch_import_streams_results_and_commits_once(session_factory, user, monkeypatch):
+    from app.api.v1.endpoints import materials
+    from app.models import Material
+    from app.schemas.material import YouTubeImportVideo
+
+    async def scenario():
+        executor = ThreadPoolExecutor(max_workers=4)
+        monkeypatch.setattr(
+            materials, "youtube_service", make_service(FakeRedis(), FakeTranscriptProvider(latency=0.05), executor)
+        )
+        videos = [
+            YouTubeImportVideo(url=f"https://www.youtube.com/watch?v=lecture{i:04d}", title=f"Lecture {i}")
+            for i in range(6)
+        ] + [YouTubeImportVideo(url="https://example.com/video", title="Broken")]
+
+        lines = [json.loads(line) async for line in materials._import_videos(videos, user.id, False, session_factory)]
+        executor.shutdown()
+
+        statuses = [line.get("status") for line in lines[:-1]]
+        assert statuses.count("fetched") == 6 and statuses.count("failed") == 1
+        # Every stored video is reported after the single commit
+        assert statuses[-6:] == ["imported"] * 6
+        assert lines[-1] == {"imported": 6, "failed": 1}
+
+        async with session_factory() as db:
+            stored = (await db.execute(select(Material).order_by(Material.id))).scalars().all()
+        assert [m.title for m in stored] == [f"Lecture {i}" for i in range(6)]
+        assert [line["material_id"] for line in lines[-7:-1]] == [m.id for m in stored]
+
+    asyncio.run(scenario())
+
+
+def test_batch_import_reports_each_failure_and_keeps_going(session_factory, user, monkeypatch):
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+    from app.api.v1.endpoints import materials
+    from app.models import Material
+    from app.schemas.material import YouTubeImportVideo
+
+    class BrokenService:
+        async def get_transcript(self, url):
+            if url.endswith("broken0000"):
+                raise RuntimeError("connection reset")
+            return f"Transcript of {url}"
+
+    def refuse_unstorable(session, flush_context, instances):
+        # Stands in for the blob listeners rejecting a material's content
+        if any(isinstance(obj, Material) and obj.title == "Unstorable" for obj in session.new):
+            raise ValueError("Content blob vanished")
+
+    async def scenario():
+        monkeypatch.setattr(materials, "youtube_service", BrokenService())
+        videos = [
+            YouTubeImportVideo(url="https://www.youtube.com/watch?v=lecture0000", title="Lecture 0"),
+            YouTubeImportVideo(url="https://www.youtube.com/watch?v=broken0000", title="Broken"),
+            YouTubeImportVideo(url="https://www.youtube.com/watch?v=lecture0001", title="Unstorable"),
+            YouTubeImportVideo(url="https://www.youtube.com/watch?v=lecture0002", title="Lecture 2"),
+        ]
+        event.listen(Session, "before_flush", refuse_unstorable)
+        try:
+            lines = [json.loads(line) async for line in materials._import_videos(videos, user.id, False, session_factory)]
+        finally:
+            event.remove(Session, "before_flush", refuse_unstorable)
+
+        async with session_factory() as db:
+            stored = (await db.execute(select(Material.title).order_by(Material.id))).scalars().all()
+        return lines, stored
+
+    lines, stored = asyncio.run(scenario())
+    results = {(line["title"], line["status"]): line.get("error") for line in lines[:-1]}
+    assert results[("Broken", "failed")] == "Could not fetch the transcript"
+    assert results[("Unstorable", "failed")] == "Could not store the imported material"
+    assert ("Lecture 0", "imported") in results and ("Lecture 2", "imported") in results
+    assert lines[-1] == {"imported": 2, "failed": 2}
+    assert stored == ["Lecture 0", "Lecture 2"]